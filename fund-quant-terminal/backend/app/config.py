@@ -39,6 +39,60 @@ class Settings(BaseSettings):
     # 新闻 RSS 源（逗号分隔，URL 中 {fund_code} 会替换为基金代码）
     NEWS_FEED_URLS: str = "https://rsshub.app/finance/eastmoney/roll,https://rsshub.app/finance/eastmoney/fund/{fund_code},https://rsshub.app/finance/sina/roll"
 
+    # 上游 HTTP 共享连接池：总连接上限、keep-alive 连接上限与空闲保持（秒）、默认超时（秒）、是否启用 HTTP/2（需安装 h2）
+    HTTP_POOL_MAX_CONNECTIONS: int = 100
+    HTTP_POOL_MAX_KEEPALIVE: int = 20
+    HTTP_POOL_KEEPALIVE_EXPIRY: float = 30.0
+    HTTP_CLIENT_TIMEOUT: float = 30.0
+    HTTP_CLIENT_HTTP2: bool = True
+
+    # RSS 抓取并发上限与单个 feed 超时（秒）
+    NEWS_FETCH_CONCURRENCY: int = 4
+    NEWS_FEED_TIMEOUT: float = 15.0
+
+    # 新闻统一采集管道：启用的来源（rss,wallstreetcn,eastmoney,cailianshe,sina）、每个快讯来源拉取条数、
+    # 阶段间队列容量（背压上限）与打分/写入批大小
+    NEWS_PIPELINE_SOURCES: str = "rss,wallstreetcn,eastmoney,cailianshe"
+    NEWS_PIPELINE_SOURCE_LIMIT: int = 50
+    NEWS_PIPELINE_QUEUE_SIZE: int = 200
+    NEWS_PIPELINE_BATCH_SIZE: int = 100
+
+    # 数据保留：超过天数的 news_raw（按 pub_date）与 decision_logs（按 timestamp）每日压缩归档至 *_archive 冷集合，
+    # 0 表示不归档，最小 31 天（列表接口最长查询 30 天）；RETENTION_BATCH_SIZE 为每个归档块的文档数
+    NEWS_RETENTION_DAYS: int = 90
+    DECISION_LOGS_RETENTION_DAYS: int = 365
+    RETENTION_BATCH_SIZE: int = 500
+
+    # 定时任务调度：是否在本进程参与调度（多 worker 时经 Mongo 租约选主，仅 leader 执行）、
+    # leader 租约时长与调度检查间隔（秒）、运行历史保留天数
+    SCHEDULER_ENABLED: bool = True
+    SCHEDULER_LEASE_SECONDS: int = 30
+    SCHEDULER_TICK_SECONDS: float = 5.0
+    SCHEDULER_RUN_HISTORY_DAYS: int = 90
+
+    # 快讯增量轮询：频道（来源[:频道]，逗号分隔）、交易时段轮询间隔上下限（秒）、非交易时段间隔倍数、
+    # 每次轮询的目标新条目数（间隔 = 目标 / 观测速率）
+    NEWS_LIVE_POLL_ENABLED: bool = True
+    NEWS_LIVE_CHANNELS: str = "wallstreetcn:global-channel,cailianshe"
+    NEWS_LIVE_MIN_INTERVAL: float = 5.0
+    NEWS_LIVE_MAX_INTERVAL: float = 120.0
+    NEWS_LIVE_OFFHOURS_FACTOR: float = 5.0
+    NEWS_LIVE_TARGET_PER_POLL: float = 2.0
+
+    # 新闻实体链接：代码/名称词典（assets、fund_metrics）重建间隔（分钟）
+    ENTITY_LINKER_REFRESH_MINUTES: int = 30
+
+    # 新闻实时推送（SSE）：每个连接的事件队列上限（满时丢弃最旧）、断线补发的环形缓冲条数、心跳间隔（秒）
+    NEWS_STREAM_QUEUE_SIZE: int = 500
+    NEWS_STREAM_REPLAY: int = 1000
+    NEWS_STREAM_HEARTBEAT: float = 15.0
+    # 多 worker 时经 news_raw change stream 在各进程间分发推送（需副本集，不可用时退化为进程内发布）
+    NEWS_STREAM_CHANGE_FEED: bool = True
+
+    # 新闻近似去重（SimHash）：判为重复的最大汉明距离（决定 LSH 分段数）与查找规范条目的滚动窗口（小时）
+    NEWS_DEDUP_MAX_DISTANCE: int = 4
+    NEWS_DEDUP_WINDOW_HOURS: int = 48
+
     # 华尔街见闻 API 基地址。快讯 lives 需用 api-one.wallstcn.com（api-prod 返回空）
     WALLSTREETCN_BASE_URL: str = "https://api-one.wallstcn.com"
 
@@ -52,6 +106,29 @@ class Settings(BaseSettings):
     # 财联社 RSS 基地址（RSSHub），当 CAILIANSHERSS_SOURCE=rsshub 时使用
     CAILIANSHERSS_RSS_BASE_URL: str = "https://rsshub.app"
 
+    # 资产汇总缓存有效期（秒）。写路径会主动失效，TTL 兜底多进程/外部写入
+    PORTFOLIO_SUMMARY_CACHE_TTL: int = 60
+
+    # 列表接口总数缓存有效期（秒），过期后下次请求时重新计数
+    LIST_COUNT_CACHE_TTL: int = 60
+
+    # 情绪词典扩展（逗号分隔，追加到 app/services/sentiment.py 内置词表）
+    SENTIMENT_POSITIVE_WORDS: str = ""
+    SENTIMENT_NEGATIVE_WORDS: str = ""
+    SENTIMENT_NEGATION_WORDS: str = ""
+
+    # 无风险年化收益率，用于 Sharpe / Sortino
+    RISK_FREE_RATE: float = 0.02
+
+    # 基金筛选：夜间为基金列表同步净值序列，只拉取超过 MAX_AGE 小时未更新的基金（最久未更新优先），
+    # 每晚最多 SYNC_LIMIT 只（0 为不限），并发 SYNC_CONCURRENCY
+    FUND_HISTORY_SYNC_LIMIT: int = 2000
+    FUND_HISTORY_MAX_AGE_HOURS: int = 20
+    FUND_HISTORY_SYNC_CONCURRENCY: int = 4
+
+    # 回测参数扫描进程数，0 表示使用 CPU 核数
+    BACKTEST_SWEEP_WORKERS: int = 0
+
     @property
     def cors_origins_list(self) -> List[str]:
         """解析 CORS 源列表"""
@@ -39,6 +39,8 @@ async def ensure_indexes() -> None:
         await db.decision_logs.create_index("user_action", name="ix_user_action")
         await db.decision_logs.create_index([("timestamp", -1)], name="ix_timestamp_desc")
         await db.decision_logs.create_index("source", name="ix_source")
+        # 游标分页 (timestamp, _id)
+        await db.decision_logs.create_index([("timestamp", -1), ("_id", -1)], name="ix_timestamp_id_desc")
         logger.info("decision_logs 索引创建完成")
     except Exception as e:
         logger.warning("decision_logs 索引创建: %s", e)
@@ -62,12 +64,14 @@ async def ensure_indexes() -> None:
         await db.assets.create_index("symbol", name="ix_symbol")
         await db.assets.create_index("asset_type", name="ix_asset_type")
         await db.assets.create_index([("created_at", -1)], name="ix_created_at_desc")
+        await db.assets.create_index([("created_at", -1), ("_id", -1)], name="ix_created_at_id_desc")
         logger.info("assets 索引创建完成")
     except Exception as e:
         logger.warning("assets 索引创建: %s", e)
 
     try:
         await db.holding_histories.create_index([("symbol", 1), ("asset_type", 1)], unique=True, name="ix_symbol_type")
+        await db.holding_histories.create_index([("updated_at", -1)], name="ix_updated_at")
         logger.info("holding_histories 索引创建完成")
     except Exception as e:
         logger.warning("holding_histories 索引: %s", e)
@@ -79,11 +83,63 @@ async def ensure_indexes() -> None:
     except Exception as e:
         logger.warning("holding_transactions 索引: %s", e)
 
+    try:
+        await db.portfolio_snapshots.create_index("date", unique=True, name="ix_date_unique")
+        logger.info("portfolio_snapshots 索引创建完成")
+    except Exception as e:
+        logger.warning("portfolio_snapshots 索引: %s", e)
+
+    try:
+        await db.backtest_runs.create_index([("created_at", -1)], name="ix_created_at_desc")
+        await db.backtest_sweeps.create_index([("created_at", -1)], name="ix_created_at_desc")
+        await db.backtest_sweep_results.create_index([("sweep_id", 1), ("index", 1)], name="ix_sweep_index")
+        for metric in ("sharpe", "total_return", "annual_return", "max_drawdown", "volatility"):
+            await db.backtest_sweep_results.create_index(
+                [("sweep_id", 1), (f"metrics.{metric}", -1)], name=f"ix_sweep_{metric}"
+            )
+        logger.info("backtest_runs 索引创建完成")
+    except Exception as e:
+        logger.warning("backtest_runs 索引: %s", e)
+
+    try:
+        # 冷归档：按时间范围定位归档块
+        for name in ("news_raw_archive", "decision_logs_archive"):
+            await db[name].create_index([("start", 1), ("end", 1)], name="ix_start_end")
+            # 归档前按文档 _id 查已归档的文档，避免中断重跑时重复归档
+            await db[name].create_index("ids", name="ix_ids")
+        await db.retention_runs.create_index([("started_at", -1)], name="ix_started_at_desc")
+        logger.info("归档集合索引创建完成")
+    except Exception as e:
+        logger.warning("归档集合索引: %s", e)
+
+    try:
+        # 定时任务：leader 租约过期自动清理，运行历史按任务查询并按保留天数过期
+        await db.scheduler_locks.create_index("expires_at", expireAfterSeconds=0, name="ix_expires_at_ttl")
+        await db.scheduler_runs.create_index([("job_id", 1), ("started_at", -1)], name="ix_job_id_started_at")
+        await db.scheduler_runs.create_index(
+            "started_at", expireAfterSeconds=settings.SCHEDULER_RUN_HISTORY_DAYS * 86400, name="ix_started_at_ttl",
+        )
+        logger.info("scheduler 索引创建完成")
+    except Exception as e:
+        logger.warning("scheduler 索引: %s", e)
+
+    try:
+        await db.fund_metrics.create_index("code", unique=True, name="ix_code_unique")
+        await db.fund_metrics.create_index("computed_at", name="ix_computed_at")
+        logger.info("fund_metrics 索引创建完成")
+    except Exception as e:
+        logger.warning("fund_metrics 索引: %s", e)
+
     try:
         await db.news_raw.create_index("pub_date", name="ix_pub_date")
         await db.news_raw.create_index([("pub_date", -1)], name="ix_pub_date_desc")
         await db.news_raw.create_index("link", unique=True, name="ix_link_unique")
         await db.news_raw.create_index("fund_code", name="ix_fund_code")
+        await db.news_raw.create_index([("pub_date", -1), ("_id", -1)], name="ix_pub_date_id_desc")
+        await db.news_raw.create_index([("search_terms", 1), ("pub_date", -1)], name="ix_search_terms_pub_date")
+        await db.news_raw.create_index([("simhash_bands", 1), ("pub_date", -1)], name="ix_simhash_bands_pub_date")
+        await db.news_raw.create_index([("dup_of", 1), ("pub_date", -1)], name="ix_dup_of_pub_date")
+        await db.news_raw.create_index([("symbols", 1), ("pub_date", -1)], name="ix_symbols_pub_date")
         logger.info("news_raw 索引创建完成")
     except Exception as e:
         logger.warning("news_raw 索引: %s", e)
@@ -1,7 +1,8 @@
 # =====================================================
 # FastAPI 主应用入口
 # 配置 CORS、路由、生命周期（@asynccontextmanager）、全局异常处理、日志
-# APScheduler 定时新闻采集（每 4 小时）
+# 定时任务（新闻采集每 4 小时、基金指标 02:30、数据归档 03:30）经 Mongo 租约选主，多 worker 下只执行一次；
+# 快讯轮询与启动回填同样只在 leader 进程运行，随租约获得/失去启停
 # =====================================================
 
 import asyncio
@@ -9,7 +10,8 @@ from contextlib import asynccontextmanager
 from pathlib import Path
 from typing import Any
 
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 from fastapi import Depends, FastAPI, HTTPException, Request
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
@@ -18,39 +20,83 @@ from fastapi.responses import JSONResponse
 from app.config import settings
 from app.database import close_database, get_database
 from app.utils.logger import logger
-from app.routers import agent_prompts, assets, cailianshe, config_router, data, decisions, eastmoney, grok, mongo, sina, wallstreetcn
+from app.routers import agent_prompts, assets, backtest, cailianshe, config_router, data, decisions, eastmoney, grok, mongo, retention, scheduler, sina, wallstreetcn
 from app.routers.news import router as news_router
 from app.schemas.response import api_success
 
 WATCHED_FUNDS_CONFIG_ID = "watched_funds"
-_scheduler: AsyncIOScheduler | None = None
+# leader 期间的后台回填任务，失去租约或退出时取消
+_leader_tasks: set = set()
 
+# 定时任务的异常由调度器记录到 scheduler_runs 并写日志，返回值中的标量字段作为运行结果保存
 
-async def _scheduled_news_fetch() -> None:
-    """定时任务：从 config 读取关注的基金，抓取 RSS 新闻并写入 news_raw"""
-    try:
-        db = await get_database()
-        doc = await db["config"].find_one({"_id": WATCHED_FUNDS_CONFIG_ID})
-        fund_codes = list(doc.get("fund_codes", [])) if doc else []
-        fund_codes = [str(c).strip().split(".")[0].zfill(6) for c in fund_codes if c]
 
-        from app.services.news_fetch import NewsFetchService
-        news_service = NewsFetchService()
-        total = 0
+async def _scheduled_news_fetch() -> dict:
+    """定时任务：从 config 读取关注的基金，经统一采集管道抓取各来源新闻并写入 news_raw"""
+    db = await get_database()
+    doc = await db["config"].find_one({"_id": WATCHED_FUNDS_CONFIG_ID})
+    fund_codes = list(doc.get("fund_codes", [])) if doc else []
+    fund_codes = [str(c).strip().split(".")[0].zfill(6) for c in fund_codes if c]
 
-        for fc in fund_codes:
-            try:
-                items = await news_service.fetch_and_save(db, fund_code=fc, days=3)
-                total += len(items)
-            except Exception as e:
-                logger.warning("定时新闻采集 单只基金 %s 失败: %s", fc, e)
+    from app.services.news_pipeline import get_news_pipeline
 
-        general = await news_service.fetch_and_save(db, fund_code=None, days=3)
-        total += len(general)
+    # 本轮所有基金共享一次 URL 去重抓取，抓取后再按基金打标
+    result = await get_news_pipeline().run(db, fund_codes=fund_codes, days=3)
+    stats = result["write"]
+    logger.info(
+        "新闻采集完成，%d个来源，共%d条（新增%d，更新%d）",
+        len(result["sources"]), stats["received"], stats["inserted"], stats["modified"],
+    )
+    return {"sources": len(result["sources"]), **stats}
 
-        logger.info("新闻采集完成，共%d条", total)
-    except Exception as e:
-        logger.exception("定时新闻采集失败: %s", e)
+
+async def _scheduled_retention() -> dict:
+    """定时任务：news_raw、decision_logs 超过保留期的数据压缩归档至冷集合"""
+    from app.services.retention import run_retention
+
+    db = await get_database()
+    run = await run_retention(db)
+    return {r["collection"]: r.get("archived", 0) for r in run["collections"]}
+
+
+async def _scheduled_fund_metrics() -> dict:
+    """夜间任务：同步基金列表净值后重算基金筛选指标"""
+    from app.services.fund_screener import get_fund_screener_service
+
+    db = await get_database()
+    return await get_fund_screener_service().refresh(db)
+
+
+def _spawn_leader_task(coro) -> None:
+    task = asyncio.create_task(coro)
+    _leader_tasks.add(task)
+    task.add_done_callback(_leader_tasks.discard)
+
+
+async def _on_leader_start() -> None:
+    """成为 leader：后台回填历史新闻检索词、初始化情绪日汇总（均幂等），启动快讯轮询"""
+    from app.services.news_rollup import ensure_rollup
+    from app.services.news_search import backfill_search_terms
+
+    db = await get_database()
+    _spawn_leader_task(backfill_search_terms(db))
+    _spawn_leader_task(ensure_rollup(db))
+    if settings.NEWS_LIVE_POLL_ENABLED:
+        from app.services.live_poller import get_live_poller
+
+        await get_live_poller().start(db)
+
+
+async def _on_leader_stop() -> None:
+    """失去 leader 租约或进程退出：取消未完成的回填任务（下次成为 leader 时重跑），停止快讯轮询"""
+    tasks = list(_leader_tasks)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    if settings.NEWS_LIVE_POLL_ENABLED:
+        from app.services.live_poller import get_live_poller
+
+        await get_live_poller().stop()
 
 
 def _get_grok_prompt_path() -> Path:
@@ -129,8 +175,8 @@ async def _sync_agent_role_to_file():
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """应用生命周期管理：startup 创建索引，shutdown 关闭 Motor 客户端"""
-    global _scheduler
     from app.database import create_indexes
+    from app.services.scheduler import get_scheduler
 
     # ----- Startup -----
     try:
@@ -141,6 +187,12 @@ async def lifespan(app: FastAPI):
         await create_indexes()
         logger.info("Database indexes created successfully")
 
+        # 每个 worker 订阅 news_raw change stream，推送其他进程写入的新闻
+        if settings.NEWS_STREAM_CHANGE_FEED:
+            from app.services.news_hub import get_change_feed
+
+            await get_change_feed().start(db)
+
         await _validate_llm_keys_on_startup(db)
 
         doc = await db["config"].find_one({"_id": "tokens"})
@@ -158,10 +210,15 @@ async def lifespan(app: FastAPI):
 
         await _sync_agent_role_to_file()
 
-        _scheduler = AsyncIOScheduler()
-        _scheduler.add_job(_scheduled_news_fetch, "interval", hours=4, id="news_fetch")
-        _scheduler.start()
-        logger.info("APScheduler 已启动，新闻采集每 4 小时执行")
+        if settings.SCHEDULER_ENABLED:
+            scheduler = get_scheduler()
+            scheduler.add_job("news_fetch", _scheduled_news_fetch, IntervalTrigger(hours=4), "新闻采集")
+            scheduler.add_job("fund_metrics", _scheduled_fund_metrics, CronTrigger(hour=2, minute=30), "基金筛选指标计算")
+            scheduler.add_job("retention", _scheduled_retention, CronTrigger(hour=3, minute=30), "数据归档")
+            scheduler.add_leader_hook(_on_leader_start, _on_leader_stop)
+            await scheduler.start(db)
+        else:
+            await _on_leader_start()
     except Exception as e:
         logger.error("MongoDB 连接失败: %s", e)
         raise
@@ -169,10 +226,16 @@ async def lifespan(app: FastAPI):
     yield
 
     # ----- Shutdown -----
-    if _scheduler:
-        _scheduler.shutdown(wait=False)
-        _scheduler = None
-        logger.info("APScheduler 已关闭")
+    if settings.SCHEDULER_ENABLED:
+        await get_scheduler().stop()
+        logger.info("scheduler 已关闭")
+    else:
+        await _on_leader_stop()
+    from app.services.news_hub import get_change_feed
+    from app.utils.http_pool import close_http_clients
+
+    await get_change_feed().stop()
+    await close_http_clients()
     await close_database()
     logger.info("Motor client closed")
 
@@ -236,7 +299,11 @@ app.include_router(data.router, prefix="/api/data", tags=["数据"])
 app.include_router(decisions.router, prefix="/api/decisions", tags=["决策"])
 # 资产路由：/api/assets
 app.include_router(assets.router, prefix="/api/assets", tags=["资产"])
+# 回测路由：/api/backtest
+app.include_router(backtest.router, prefix="/api/backtest", tags=["回测"])
 app.include_router(mongo.router, prefix="/api/mongo", tags=["MongoDB"])
+app.include_router(retention.router, prefix="/api/retention", tags=["数据归档"])
+app.include_router(scheduler.router, prefix="/api/scheduler", tags=["定时任务"])
 app.include_router(news_router, prefix="/api/news", tags=["news"])
 app.include_router(grok.router, prefix="/api", tags=["Grok"])
 app.include_router(config_router.router, prefix="/api", tags=["配置"])
@@ -284,3 +351,11 @@ async def root():
 async def health():
     """健康检查"""
     return api_success(data={"status": "healthy"})
+
+
+@app.get("/health/http")
+async def health_http():
+    """上游 HTTP 共享连接池：各客户端连接数/空闲数，各 host 请求数、错误数、在途请求与耗时"""
+    from app.utils.http_pool import http_pool_stats
+
+    return api_success(data=http_pool_stats())
@@ -6,18 +6,28 @@
 from datetime import datetime
 from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from bson import ObjectId
 
 from app.database import get_database
 from app.models.asset import AssetCreate
 from app.schemas.assets_schemas import AssetsUpdateRequest, HoldingTransactionCreate
-from app.schemas.response import api_success
-from app.services.account_service import get_capital, set_capital
-from app.services.assets import update_assets as update_assets_service
+from app.schemas.response import api_page, api_success
+from app.services.assets import compute_from_transactions, update_assets as update_assets_service
+from app.services.correlation import CorrelationService, get_correlation_service
 from app.services.data_fetcher import DataFetcherService
+from app.services.equity_curve import EquityCurveService, get_equity_curve_service
+from app.services.nav_matrix import history_points
+from app.services.risk_metrics import RiskMetricsService, get_risk_metrics_service
+from app.services.transaction_import import detect_format, import_transactions
+from app.services.portfolio_aggregate import (
+    PortfolioAggregateService,
+    get_portfolio_aggregate_service,
+    invalidate_portfolio_summary,
+)
 from app.utils.logger import logger
+from app.utils.pagination import count_cache, keyset_page
 
 data_service = DataFetcherService()
 
@@ -40,9 +50,10 @@ async def list_assets(
     skip: int = 0,
     symbol: Optional[str] = None,
     asset_type: Optional[str] = None,
+    cursor: Optional[str] = None,
     db: AsyncIOMotorDatabase = Depends(get_database),
 ) -> dict:
-    """获取资产列表"""
+    """获取资产列表：按 (created_at, _id) 倒序游标分页，翻页传上次返回的 next_cursor（skip 仅兼容旧调用）"""
     try:
         coll = db[COLLECTION]
         query = {}
@@ -50,10 +61,12 @@ async def list_assets(
             query["symbol"] = symbol
         if asset_type:
             query["asset_type"] = asset_type
-        cursor = coll.find(query).sort("created_at", -1).skip(skip).limit(limit)
-        docs = await cursor.to_list(length=limit)
+        docs, next_cursor = await keyset_page(coll, query, ("created_at", -1), limit, cursor=cursor, skip=skip)
+        total = await count_cache.count(coll, query)
         data = [_serialize_doc(d) for d in docs]
-        return api_success(data=data)
+        return api_page(data, next_cursor=next_cursor, total=total)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except HTTPException:
         raise
     except Exception as e:
@@ -71,12 +84,7 @@ async def _store_holding_history(
     if not symbol or not data:
         return
     try:
-        history_data = []
-        for r in data:
-            date_val = r.get("date") or r.get("净值日期") or r.get("日期")
-            value_val = r.get("nav") or r.get("单位净值") or r.get("收盘") or r.get("close")
-            if date_val and value_val is not None:
-                history_data.append({"date": str(date_val), "value": float(value_val)})
+        history_data = history_points(data)
         if not history_data:
             return
         await db[HISTORY_COLLECTION].update_one(
@@ -101,6 +109,8 @@ async def create_asset(
         doc["updated_at"] = datetime.utcnow()
         result = await coll.insert_one(doc)
         doc["_id"] = result.inserted_id
+        invalidate_portfolio_summary()
+        count_cache.invalidate(COLLECTION)
 
         # 新增后拉取历史信息并存储
         sym = (item.symbol or "").strip().split(".")[0]
@@ -178,6 +188,8 @@ async def assets_sync(db: AsyncIOMotorDatabase = Depends(get_database)) -> dict:
                 logger.warning("sync 单条失败 %s %s: %s", sym, asset_type, e)
                 failed += 1
 
+        if updated:
+            invalidate_portfolio_summary()
         return api_success(
             data={"updated": updated, "failed": failed, "total": len(docs)},
             message=f"同步完成：成功 {updated}，失败 {failed}",
@@ -247,28 +259,6 @@ async def get_holding_transactions(
         raise HTTPException(status_code=500, detail=str(e))
 
 
-def _compute_from_transactions(txs: List[Dict[str, Any]]) -> tuple[float, float]:
-    """从历史交易重算持仓数量与成本价，返回 (quantity, cost_price)"""
-    qty = 0.0
-    cost = 0.0
-    for t in sorted(txs, key=lambda x: (x.get("date") or "", x.get("created_at") or datetime.min)):
-        typ = (t.get("type") or "").lower()
-        tq = float(t.get("quantity") or 0)
-        tp = float(t.get("price") or 0)
-        if typ == "buy":
-            if tq <= 0 or tp <= 0:
-                continue
-            new_qty = qty + tq
-            cost = (qty * cost + tq * tp) / new_qty if new_qty else tp
-            qty = new_qty
-        elif typ == "sell":
-            if tq <= 0:
-                continue
-            qty = max(0.0, qty - tq)
-            # 卖出不改变成本价
-    return (qty, cost)
-
-
 @router.get("/history/{asset_type}/{symbol}/summary")
 async def get_holding_summary(
     asset_type: str,
@@ -298,7 +288,7 @@ async def get_holding_summary(
         tx_cursor = db[TRANSACTION_COLLECTION].find(tx_query)
         txs = await tx_cursor.to_list(length=500)
         if txs:
-            quantity, cost_price = _compute_from_transactions(txs)
+            quantity, cost_price = compute_from_transactions(txs)
         elif asset:
             quantity = float(asset.get("quantity") or 0)
             cost_price = float(asset.get("cost_price") or 0)
@@ -524,6 +514,7 @@ async def create_transaction(
                 {"_id": asset["_id"]},
                 {"$set": {"quantity": new_qty, "cost_price": cost_price, "updated_at": datetime.utcnow()}},
             )
+        invalidate_portfolio_summary()
 
         return api_success(data=_serialize_doc(tx_doc), message="交易记录已添加")
     except HTTPException:
@@ -533,6 +524,39 @@ async def create_transaction(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/transactions/import")
+async def import_transactions_bulk(
+    request: Request,
+    format: Optional[str] = Query(None, description="csv 或 ndjson，缺省按 Content-Type 推断"),
+    asset_type: str = Query("fund", description="行内未给出 asset_type 时的默认资产类型"),
+    encoding: str = Query("utf-8-sig", description="文件编码，券商导出常见 gbk"),
+    db: AsyncIOMotorDatabase = Depends(get_database),
+) -> dict:
+    """批量导入券商导出的交易记录（请求体为原始 CSV/NDJSON，流式解析），结束后重算受影响持仓"""
+    try:
+        try:
+            fmt = detect_format(format, request.headers.get("content-type"))
+            "".encode(encoding)
+        except (ValueError, LookupError) as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        report = await import_transactions(
+            db,
+            request.stream(),
+            fmt=fmt,
+            default_asset_type=(asset_type or "fund").lower(),
+            encoding=encoding,
+        )
+        return api_success(
+            data=report,
+            message=f"导入完成：成功 {report['inserted']}，失败 {report['failed']}",
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("import_transactions_bulk 异常: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.delete("/history/{asset_type}/{symbol}/transactions/{transaction_id}")
 async def delete_transaction(
     asset_type: str,
@@ -590,6 +614,7 @@ async def delete_transaction(
                     "updated_at": datetime.utcnow(),
                 })
         await coll_tx.delete_one({"_id": ObjectId(transaction_id)})
+        invalidate_portfolio_summary()
         return api_success(data=None, message="交易已删除")
     except HTTPException:
         raise
@@ -618,6 +643,7 @@ async def clear_holding_transactions(
             {"symbol": sym, "asset_type": at},
             {"$set": {"quantity": 0, "updated_at": datetime.utcnow()}},
         )
+        invalidate_portfolio_summary()
         return api_success(
             data={"deleted": result.deleted_count},
             message=f"已清空 {result.deleted_count} 条历史操作",
@@ -630,29 +656,14 @@ async def clear_holding_transactions(
 
 
 @router.get("/summary")
-async def assets_summary(db: AsyncIOMotorDatabase = Depends(get_database)) -> dict:
-    """资产汇总：现金、持仓、总价值"""
+async def assets_summary(
+    db: AsyncIOMotorDatabase = Depends(get_database),
+    aggregate: PortfolioAggregateService = Depends(get_portfolio_aggregate_service),
+) -> dict:
+    """资产汇总：现金、持仓、总价值（共享缓存，写路径失效）"""
     try:
-        capital = await get_capital(db)
-        coll = db[COLLECTION]
-        cursor = coll.find({})
-        docs = await cursor.to_list(length=500)
-        holdings = []
-        holdings_value = 0.0
-        for d in docs:
-            h = _serialize_doc(d)
-            holdings.append(h)
-            price = h.get("current_price") or h.get("cost_price") or 0
-            holdings_value += (h.get("quantity") or 0) * price
-        total_value = capital + holdings_value
-        return api_success(
-            data={
-                "capital": capital,
-                "holdings": holdings,
-                "holdings_value": round(holdings_value, 2),
-                "total_value": round(total_value, 2),
-            }
-        )
+        summary = await aggregate.get_summary(db)
+        return api_success(data=summary)
     except HTTPException:
         raise
     except Exception as e:
@@ -660,12 +671,70 @@ async def assets_summary(db: AsyncIOMotorDatabase = Depends(get_database)) -> di
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/equity-curve")
+async def assets_equity_curve(
+    start: Optional[str] = Query(None, description="开始日期 YYYY-MM-DD"),
+    end: Optional[str] = Query(None, description="结束日期 YYYY-MM-DD"),
+    refresh: bool = Query(True, description="是否先增量计算新净值日；False 时仅读已保存快照"),
+    full: bool = Query(False, description="强制全量重建"),
+    db: AsyncIOMotorDatabase = Depends(get_database),
+    service: EquityCurveService = Depends(get_equity_curve_service),
+) -> dict:
+    """组合资产曲线：每日持仓市值、现金、总资产与日收益（由交易回放净值历史重建）"""
+    try:
+        if full:
+            await service.refresh(db, full=True)
+        data = await service.get_curve(db, start=start, end=end, refresh=refresh and not full)
+        return api_success(data=data)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("assets_equity_curve 异常: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/risk")
+async def assets_risk(
+    window: int = Query(250, ge=20, le=2520, description="收益观测窗口（交易日数）"),
+    db: AsyncIOMotorDatabase = Depends(get_database),
+    service: RiskMetricsService = Depends(get_risk_metrics_service),
+) -> dict:
+    """组合风险指标：年化波动率、最大回撤、Sharpe、Sortino、VaR/CVaR 及各持仓风险贡献"""
+    try:
+        data = await service.compute(db, window=window)
+        return api_success(data=data)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("assets_risk 异常: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/correlation")
+async def assets_correlation(
+    window: int = Query(250, ge=20, le=2520, description="收益观测窗口（交易日数）"),
+    threshold: float = Query(0.7, ge=-1, le=1, description="聚类阈值：簇内平均相关系数下限"),
+    db: AsyncIOMotorDatabase = Depends(get_database),
+    service: CorrelationService = Depends(get_correlation_service),
+) -> dict:
+    """持仓两两收益相关矩阵与层次聚类（识别高相关持仓集中度）"""
+    try:
+        data = await service.compute(db, window=window, threshold=threshold)
+        return api_success(data=data)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("assets_correlation 异常: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.post("/update")
 async def assets_update(
     body: AssetsUpdateRequest,
     db: AsyncIOMotorDatabase = Depends(get_database),
 ) -> dict:
-    """交易执行后更新：资本、持仓。所有写操作在同一事务中原子提交"""
+    """交易执行后更新：资本、持仓。持仓按差异批量写入，所有写操作在同一事务中原子提交。
+    传入 assets 时 data 为 {inserted, changed, unchanged, deleted} 统计"""
     try:
         needs_update = body.capital is not None or body.assets is not None
         if not needs_update:
@@ -674,13 +743,14 @@ async def assets_update(
         client = db.client
         async with await client.start_session() as session:
             async with session.start_transaction():
-                await update_assets_service(
+                stats = await update_assets_service(
                     db,
                     capital=body.capital,
                     assets=body.assets,
                     session=session,
                 )
-        return api_success(data=None, message="更新成功")
+        invalidate_portfolio_summary()
+        return api_success(data=stats, message="更新成功")
     except HTTPException:
         raise
     except Exception as e:
@@ -725,6 +795,7 @@ async def update_asset(
         )
         if not result:
             raise HTTPException(status_code=404, detail="资产不存在")
+        invalidate_portfolio_summary()
         return api_success(data=_serialize_doc(result))
     except HTTPException:
         raise
@@ -744,6 +815,8 @@ async def delete_asset(
         result = await coll.delete_one({"_id": ObjectId(asset_id)})
         if result.deleted_count == 0:
             raise HTTPException(status_code=404, detail="资产不存在")
+        invalidate_portfolio_summary()
+        count_cache.invalidate(COLLECTION)
         return api_success(data=None, message="已删除")
     except HTTPException:
         raise
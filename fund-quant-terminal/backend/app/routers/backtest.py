@@ -0,0 +1,121 @@
+# =====================================================
+# 回测 API 路由
+# POST /run, GET /runs, GET /runs/{run_id}
+# POST /sweep, GET /sweeps/{sweep_id}
+# =====================================================
+
+from bson import ObjectId
+from fastapi import APIRouter, Depends, HTTPException, Query
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.database import get_database
+from app.schemas.backtest_schemas import BacktestRequest, BacktestSweepRequest
+from app.schemas.response import api_success
+from app.services.backtest import BacktestService, get_backtest_service
+from app.services.backtest_sweep import RANK_METRICS, BacktestSweepService, get_backtest_sweep_service
+from app.utils.logger import logger
+
+router = APIRouter()
+
+
+@router.post("/run")
+async def backtest_run(
+    body: BacktestRequest,
+    db: AsyncIOMotorDatabase = Depends(get_database),
+    service: BacktestService = Depends(get_backtest_service),
+) -> dict:
+    """提交回测：定投、阈值再平衡、情绪门控定投，基于本地净值历史向量化计算"""
+    try:
+        data = await service.run(db, body.model_dump(), save=body.save)
+        return api_success(data=data, message="回测完成")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("backtest_run 异常: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/runs")
+async def backtest_list_runs(
+    limit: int = Query(20, ge=1, le=200),
+    db: AsyncIOMotorDatabase = Depends(get_database),
+    service: BacktestService = Depends(get_backtest_service),
+) -> dict:
+    """最近的回测记录（不含逐日曲线）"""
+    try:
+        data = await service.list_runs(db, limit=limit)
+        return api_success(data=data)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("backtest_list_runs 异常: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/runs/{run_id}")
+async def backtest_get_run(
+    run_id: str,
+    db: AsyncIOMotorDatabase = Depends(get_database),
+    service: BacktestService = Depends(get_backtest_service),
+) -> dict:
+    """单次回测详情（含资产曲线）"""
+    if not ObjectId.is_valid(run_id):
+        raise HTTPException(status_code=400, detail="无效的回测 ID")
+    try:
+        doc = await service.get_run(db, run_id)
+        if not doc:
+            raise HTTPException(status_code=404, detail="回测记录不存在")
+        return api_success(data=doc)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("backtest_get_run 异常: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/sweep")
+async def backtest_sweep(
+    body: BacktestSweepRequest,
+    db: AsyncIOMotorDatabase = Depends(get_database),
+    service: BacktestSweepService = Depends(get_backtest_sweep_service),
+) -> dict:
+    """提交参数扫描：后台进程池并行运行，返回 sweep id，进度与排名通过 GET /sweeps/{id} 查询"""
+    try:
+        data = await service.start(db, body.model_dump())
+        return api_success(data=data, message="参数扫描已开始")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("backtest_sweep 异常: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/sweeps/{sweep_id}")
+async def backtest_get_sweep(
+    sweep_id: str,
+    rank_by: str = Query(None, description="排序指标，缺省为提交时的 rank_by"),
+    limit: int = Query(20, ge=1, le=500),
+    db: AsyncIOMotorDatabase = Depends(get_database),
+    service: BacktestSweepService = Depends(get_backtest_sweep_service),
+) -> dict:
+    """参数扫描进度与按指标排名的结果（运行中也可查询已完成部分）"""
+    if not ObjectId.is_valid(sweep_id):
+        raise HTTPException(status_code=400, detail="无效的扫描 ID")
+    if rank_by and rank_by not in RANK_METRICS:
+        raise HTTPException(status_code=400, detail=f"rank_by 须为 {', '.join(RANK_METRICS)} 之一")
+    try:
+        doc = await service.get(db, sweep_id)
+        if not doc:
+            raise HTTPException(status_code=404, detail="扫描记录不存在")
+        doc.pop("top", None)
+        doc["ranked"] = await service.ranked(db, sweep_id, rank_by=rank_by or doc.get("rank_by") or "sharpe", limit=limit)
+        return api_success(data=doc)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("backtest_get_sweep 异常: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
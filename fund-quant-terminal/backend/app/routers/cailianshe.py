@@ -11,7 +11,8 @@ from pydantic import BaseModel, Field
 
 from app.database import get_database
 from app.schemas.response import api_success
-from app.services.cailianshe_service import CailiansheService
+from app.services.cailianshe_service import SOURCE_CAILIANSHERSS, CailiansheService
+from app.services.news_pipeline import ingest_parsed
 from app.utils.logger import logger
 
 router = APIRouter()
@@ -33,7 +34,7 @@ class CailiansheTestRequest(BaseModel):
         description="分类：red=加红, remind=提醒, hk=港美股, announcement=公司, fund=基金, watch=看板",
     )
     limit: int = Field(default=10, ge=1, le=100, description="返回条数")
-    save_to_db: bool = Field(default=False, description="是否保存至 decision_logs")
+    save_to_db: bool = Field(default=False, description="是否保存至 news_raw")
 
 
 @router.post(
@@ -59,9 +60,8 @@ async def cailianshe_test(
 
         saved_count = 0
         if req.save_to_db and parsed:
-            saved_count = await service.save_to_decision_logs(
-                db, parsed, type_=f"telegraph:{req.category}"
-            )
+            stats = await ingest_parsed(db, parsed, SOURCE_CAILIANSHERSS)
+            saved_count = stats.get("inserted", 0) + stats.get("modified", 0)
 
         data = {"type": f"telegraph:{req.category}", "data": raw}
         if parsed:
@@ -1,19 +1,22 @@
 # =====================================================
 # 数据相关 API 路由
-# /api/data/fetch, /api/data/history, 基金/股票/指数数据
+# /api/data/fetch, /api/data/history, /api/data/screen, 基金/股票/指数数据
 # =====================================================
 
 from typing import Any, List, Optional
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
+from motor.motor_asyncio import AsyncIOMotorDatabase
 
+from app.database import get_database
 from app.schemas.response import api_success
-from app.schemas.data_schemas import DataFetchRequest
-from app.services.data_fetcher import DataFetcherService
+from app.schemas.data_schemas import DataFetchRequest, FundScreenQuery
+from app.services.data_fetcher import get_data_fetcher_service
+from app.services.fund_screener import METRIC_FIELDS, FundScreenerService, get_fund_screener_service
 from app.utils.logger import logger
 
 router = APIRouter()
-data_service = DataFetcherService()
+data_service = get_data_fetcher_service()
 
 
 # ---------- 新增 /fetch 与 /history ----------
@@ -72,6 +75,58 @@ async def data_history(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/screen")
+async def data_screen(
+    q: FundScreenQuery = Depends(),
+    db: AsyncIOMotorDatabase = Depends(get_database),
+    service: FundScreenerService = Depends(get_fund_screener_service),
+) -> dict:
+    """
+    基金筛选：基于夜间预计算的 fund_metrics（内存列式表）按收益/波动/回撤/Sharpe 区间过滤并排序
+    """
+    if q.sort_by not in METRIC_FIELDS and q.sort_by != "code":
+        raise HTTPException(status_code=400, detail=f"不支持的排序字段: {q.sort_by}")
+    try:
+        ranges = {
+            f: (getattr(q, f"min_{f}"), getattr(q, f"max_{f}"))
+            for f in METRIC_FIELDS
+            if getattr(q, f"min_{f}") is not None or getattr(q, f"max_{f}") is not None
+        }
+        data = await service.screen(
+            db,
+            ranges,
+            keyword=q.keyword,
+            fund_type=q.fund_type,
+            sort_by=q.sort_by,
+            descending=q.order.lower() != "asc",
+            offset=q.offset,
+            limit=q.limit,
+        )
+        return api_success(data=data)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("data_screen 异常: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/screen/refresh")
+async def data_screen_refresh(
+    sync: bool = Query(False, description="是否先同步基金列表净值（耗时较长，默认仅用已有净值重算）"),
+    db: AsyncIOMotorDatabase = Depends(get_database),
+    service: FundScreenerService = Depends(get_fund_screener_service),
+) -> dict:
+    """手动重算基金筛选指标（默认由夜间任务执行）"""
+    try:
+        data = await service.refresh(db, sync_histories=sync)
+        return api_success(data=data, message="基金指标已更新")
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("data_screen_refresh 异常: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 # ---------- 原有接口（统一响应格式） ----------
 
 
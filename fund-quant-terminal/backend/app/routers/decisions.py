@@ -12,10 +12,12 @@ from pydantic import BaseModel, Field
 
 from app.database import get_database
 from app.models.decision_log import DecisionLog, DecisionLogCreate
-from app.schemas.response import api_success
+from app.schemas.response import api_page, api_success
 from app.services.assets import update_assets
 from app.services.grok_decision import generate_grok_prompt
+from app.services.portfolio_aggregate import invalidate_portfolio_summary
 from app.utils.logger import logger
+from app.utils.pagination import count_cache, keyset_page
 
 router = APIRouter()
 COLLECTION = "decision_logs"
@@ -88,10 +90,12 @@ async def log_decision(
                     result = await coll.insert_one(doc, session=session)
                     doc["_id"] = result.inserted_id
                     await update_assets(db, capital=float(capital_after), session=session)
+            invalidate_portfolio_summary()
         else:
             coll = db[COLLECTION]
             result = await coll.insert_one(doc)
             doc["_id"] = result.inserted_id
+        count_cache.invalidate(COLLECTION)
 
         return api_success(data=_serialize_doc(doc))
     except HTTPException:
@@ -107,9 +111,10 @@ async def list_decisions(
     skip: int = 0,
     fund_code: Optional[str] = None,
     user_action: Optional[str] = None,
+    cursor: Optional[str] = None,
     db: AsyncIOMotorDatabase = Depends(get_database),
 ) -> dict:
-    """获取决策日志列表"""
+    """获取决策日志列表：按 (timestamp, _id) 倒序游标分页，翻页传上次返回的 next_cursor（skip 仅兼容旧调用）"""
     try:
         coll = db[COLLECTION]
         query = {}
@@ -117,10 +122,12 @@ async def list_decisions(
             query["fund_code"] = fund_code
         if user_action:
             query["user_action"] = user_action
-        cursor = coll.find(query).sort("timestamp", -1).skip(skip).limit(limit)
-        docs = await cursor.to_list(length=limit)
+        docs, next_cursor = await keyset_page(coll, query, ("timestamp", -1), limit, cursor=cursor, skip=skip)
+        total = await count_cache.count(coll, query)
         data = [_serialize_doc(d) for d in docs]
-        return api_success(data=data)
+        return api_page(data, next_cursor=next_cursor, total=total)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except HTTPException:
         raise
     except Exception as e:
@@ -134,11 +141,12 @@ async def list_decisions_legacy(
     skip: int = 0,
     symbol: Optional[str] = None,
     action: Optional[str] = None,
+    cursor: Optional[str] = None,
     db: AsyncIOMotorDatabase = Depends(get_database),
 ) -> dict:
     """兼容旧版：获取决策列表（symbol->fund_code, action->user_action）"""
     return await list_decisions(
-        limit=limit, skip=skip, fund_code=symbol, user_action=action, db=db
+        limit=limit, skip=skip, fund_code=symbol, user_action=action, cursor=cursor, db=db
     )
 
 
@@ -177,6 +185,7 @@ async def update_decision(
                     if not result:
                         raise HTTPException(status_code=404, detail="决策不存在")
                     await update_assets(db, capital=float(capital_after), session=session)
+            invalidate_portfolio_summary()
         else:
             coll = db[COLLECTION]
             result = await coll.find_one_and_update(
@@ -208,6 +217,7 @@ async def delete_decision(
         result = await coll.delete_one({"_id": ObjectId(decision_id)})
         if result.deleted_count == 0:
             raise HTTPException(status_code=404, detail="决策不存在")
+        count_cache.invalidate(COLLECTION)
         return api_success(data=None, message="已删除")
     except HTTPException:
         raise
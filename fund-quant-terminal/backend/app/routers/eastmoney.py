@@ -11,7 +11,8 @@ from pydantic import BaseModel, Field
 
 from app.database import get_database
 from app.schemas.response import api_success
-from app.services.eastmoney_service import EastMoneyService
+from app.services.eastmoney_service import SOURCE_EASTMONEY, EastMoneyService
+from app.services.news_pipeline import ingest_parsed
 from app.utils.logger import logger
 
 router = APIRouter()
@@ -29,13 +30,13 @@ class EastMoneyTestRequest(BaseModel):
     """东方财富测试请求"""
 
     limit: int = Field(default=10, ge=1, le=100, description="返回条数")
-    save_to_db: bool = Field(default=False, description="是否将解析结果保存至 decision_logs")
+    save_to_db: bool = Field(default=False, description="是否将解析结果保存至 news_raw")
 
 
 @router.post(
     "/test",
     summary="东方财富 7*24 全球直播测试",
-    description="从 RSSHub 拉取东方财富 7*24 直播，解析为统一格式，可选保存至 decision_logs。",
+    description="从 RSSHub 拉取东方财富 7*24 直播，解析为统一格式，可选保存至 news_raw。",
     responses={
         200: {"description": "成功，返回 type、data、parsed、saved_count"},
         500: {"description": "服务异常"},
@@ -54,7 +55,8 @@ async def eastmoney_test(
 
         saved_count = 0
         if req.save_to_db and parsed:
-            saved_count = await service.save_to_decision_logs(db, parsed, type_="live:7x24")
+            stats = await ingest_parsed(db, parsed, SOURCE_EASTMONEY)
+            saved_count = stats.get("inserted", 0) + stats.get("modified", 0)
 
         data = {"type": "live:7x24", "data": raw}
         if parsed:
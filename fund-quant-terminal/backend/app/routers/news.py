@@ -1,20 +1,39 @@
 # =====================================================
 # 新闻 API 路由
 # GET /api/news/fetch - 抓取 RSS 并返回新闻列表
-# GET /api/news/list - 分页列表，支持 keyword、page、limit、sentiment
+# GET /api/news/list - 游标分页列表，支持 keyword、cursor、limit、sort、holdings/symbols
+# POST /api/news/entities/rebuild - 重建实体词典并回填近期新闻的 symbols
+# GET /api/news/feeds/stats - 各 RSS feed 条件请求命中率
+# POST /api/news/pipeline/run - 统一采集管道抓取各来源
+# GET /api/news/pipeline/stats - 管道各阶段吞吐与队列深度
+# GET /api/news/live/stats - 快讯增量轮询各频道游标、速率与间隔
+# GET /api/news/stream - 新入库新闻实时推送（SSE），支持 source、fund_code、min_sentiment 过滤
+# GET /api/news/stream/stats - 实时推送订阅数、发布与丢弃计数、change stream 状态
 # =====================================================
 
-from datetime import datetime, timedelta
+import asyncio
 from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from bson import ObjectId
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from pydantic import BaseModel, Field
 
+from app.config import settings
 from app.database import get_database
 from app.schemas.response import api_success
+from app.services import entity_linker
 from app.services.grok_decision import generate_grok_prompt
-from app.services.news_fetch import NewsFetchService, _compute_sentiment
+from app.services.live_poller import get_live_poller
+from app.services.news_dedup import FINGERPRINT_PROJECTION
+from app.services.news_fetch import get_news_fetch_service
+from app.services.news_hub import StreamFilter, get_change_feed, get_news_hub
+from app.services.news_pipeline import build_adapters, get_news_pipeline
+from app.services.news_rollup import sentiment_trend
+from app.services.news_search import SEARCH_FIELD
+from app.services.rss_client import get_rss_client
+from app.services.sentiment import sentiment_score
 from app.utils.logger import logger
 
 
@@ -23,7 +42,7 @@ def _get_sentiment_score(doc: dict) -> float:
     if doc.get("sentiment") is not None:
         return float(doc["sentiment"])
     text = f"{doc.get('title') or ''} {doc.get('content_summary') or ''}"
-    return _compute_sentiment(text)
+    return sentiment_score(text)
 
 
 class GrokDecisionRequest(BaseModel):
@@ -32,12 +51,19 @@ class GrokDecisionRequest(BaseModel):
     news_links: Optional[list[str]] = Field(None, description="指定新闻 link 列表，优先于 fund_code 查询")
 
 
+class PipelineRunRequest(BaseModel):
+    sources: Optional[list[str]] = Field(None, description="来源列表（rss/wallstreetcn/eastmoney/cailianshe/sina），空则为 NEWS_PIPELINE_SOURCES")
+    fund_codes: list[str] = Field(default_factory=list, description="关注基金代码，用于展开 RSS 基金 feed 与正文打标")
+    days: int = Field(3, ge=1, le=30, description="仅保留最近 N 天的新闻")
+    limit: Optional[int] = Field(None, ge=1, le=500, description="每个快讯来源拉取条数，空则为 NEWS_PIPELINE_SOURCE_LIMIT")
+
+
 class BatchGrokRequest(BaseModel):
     news_links: list[str] = Field(..., min_length=1, description="批量新闻 link 列表，聚合生成综合 Grok 决策提示")
 
 
 router = APIRouter()
-news_service = NewsFetchService()
+news_service = get_news_fetch_service()
 
 
 async def _get_news_list(
@@ -46,13 +72,10 @@ async def _get_news_list(
     refresh: bool,
     db: AsyncIOMotorDatabase,
 ) -> list:
-    """共享逻辑：抓取或读取新闻列表"""
+    """共享逻辑：refresh 时先抓取入库，再统一从库中读取（304/内容未变的 feed 本次不产出条目，其已有新闻仍需返回）"""
     if refresh:
-        items = await news_service.fetch_and_save(db, fund_code=fund_code, days=days)
-        if not items:
-            items = await news_service.get_news(db, fund_code=fund_code, days=days)
-    else:
-        items = await news_service.get_news(db, fund_code=fund_code, days=days)
+        await news_service.fetch_and_save(db, fund_code=fund_code, days=days)
+    items = await news_service.get_news(db, fund_code=fund_code, days=days)
     items.sort(key=lambda x: x.get("pub_date") or x.get("created_at") or "", reverse=True)
     result = []
     for d in items:
@@ -61,6 +84,9 @@ async def _get_news_list(
             if k in d and d[k] and hasattr(d[k], "isoformat"):
                 d[k] = d[k].isoformat()
         d.pop("_id", None)
+        d.pop(SEARCH_FIELD, None)
+        for k in FINGERPRINT_PROJECTION:
+            d.pop(k, None)
         result.append(d)
     return result
 
@@ -87,21 +113,32 @@ async def news_list(
     fund_code: Optional[str] = Query(None, description="基金代码，可选"),
     days: int = Query(7, ge=1, le=30, description="返回最近 N 天的新闻"),
     keyword: Optional[str] = Query(None, description="关键词搜索（标题、摘要）"),
-    page: int = Query(1, ge=1, description="页码"),
+    page: int = Query(1, ge=1, description="页码（兼容参数，建议使用 cursor）"),
     limit: int = Query(20, ge=1, le=100, description="每页条数"),
     sort: Optional[str] = Query(None, description="排序，如 pub_date,-1 或 sentiment,1"),
+    cursor: Optional[str] = Query(None, description="上一页返回的 next_cursor"),
+    collapse: bool = Query(False, description="折叠近似重复新闻，只返回每簇的规范条目"),
+    holdings: bool = Query(False, description="只返回提及当前持仓的新闻"),
+    symbols: Optional[str] = Query(None, description="只返回提及这些标的的新闻，逗号分隔，如 fund:161725,stock:600519"),
     refresh: bool = Query(False, description="是否从 RSS 重新抓取后再查"),
     db: AsyncIOMotorDatabase = Depends(get_database),
 ) -> dict:
     """
-    分页新闻列表，从 news_raw 查询，按 pub_date 倒序。
+    分页新闻列表，从 news_raw 查询，按 pub_date 倒序；按 next_cursor 翻页，total 为缓存计数。
     支持 keyword 全文搜索；缺失时补充 sentiment_score。
+    holdings / symbols 按实体标签（symbols 多键索引）过滤，给出时忽略 fund_code。
     """
     try:
         if refresh:
             await news_service.fetch_and_save(db, fund_code=fund_code, days=days)
 
-        items, total = await news_service.get_news_paginated(
+        tags = None
+        if symbols:
+            tags = [s.strip() for s in symbols.split(",") if s.strip()]
+        if holdings:
+            tags = sorted(set(tags or []) | set(await entity_linker.holding_tags(db)))
+
+        items, total, next_cursor = await news_service.get_news_paginated(
             db,
             fund_code=fund_code,
             days=days,
@@ -109,6 +146,9 @@ async def news_list(
             page=page,
             limit=limit,
             sort=_parse_sort(sort),
+            cursor=cursor,
+            collapse=collapse,
+            symbols=tags,
         )
 
         for d in items:
@@ -128,6 +168,7 @@ async def news_list(
                 "total": total,
                 "page": page,
                 "limit": limit,
+                "next_cursor": next_cursor,
                 "sentiment_summary": {
                     "positive": positives,
                     "neutral": neutrals,
@@ -137,6 +178,8 @@ async def news_list(
             },
             message=f"共 {total} 条",
         )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.exception("news_list 异常: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
@@ -152,13 +195,138 @@ async def news_fetch(
     """抓取 RSS 并返回新闻列表"""
     try:
         result = await _get_news_list(fund_code, days, refresh, db)
-        return api_success(data=result, message=f"共抓取 {len(result)} 条新闻")
+        message = f"共抓取 {len(result)} 条新闻"
+        if refresh and news_service.last_write:
+            w = news_service.last_write
+            message += f"（新增 {w.get('inserted', 0)}，更新 {w.get('modified', 0)}，重复 {w.get('duplicates', 0)}）"
+        return api_success(data=result, message=message)
     except Exception as e:
         logger.exception("news_fetch 异常: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
-NEWS_COLLECTION = "news_raw"
+@router.get("/feeds/stats")
+async def news_feed_stats(
+    db: AsyncIOMotorDatabase = Depends(get_database),
+) -> dict:
+    """各 RSS feed 条件请求统计：请求数、304/内容未变次数、命中率、最近状态与耗时"""
+    try:
+        feeds = await get_rss_client().stats(db)
+        latest = news_service.last_metrics
+        for f in feeds:
+            m = latest.get(f["url"])
+            if m:
+                f["last_fetch_ms"] = m.get("fetch_ms")
+                f["last_parse_ms"] = m.get("parse_ms")
+        return api_success(data=feeds)
+    except Exception as e:
+        logger.exception("news_feed_stats 异常: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/pipeline/run")
+async def news_pipeline_run(
+    body: PipelineRunRequest,
+    db: AsyncIOMotorDatabase = Depends(get_database),
+) -> dict:
+    """经统一采集管道抓取各来源新闻写入 news_raw，返回各来源、各阶段与写入统计"""
+    try:
+        adapters = build_adapters(body.sources or None)
+        result = await get_news_pipeline().run(db, adapters=adapters, fund_codes=body.fund_codes, days=body.days, limit=body.limit)
+        w = result["write"]
+        return api_success(data=result, message=f"共 {w['received']} 条（新增 {w['inserted']}，更新 {w['modified']}）")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.exception("news_pipeline_run 异常: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/pipeline/stats")
+async def news_pipeline_stats() -> dict:
+    """采集管道统计：运行中为实时各阶段吞吐与队列深度，否则为最近一轮结果"""
+    try:
+        return api_success(data=get_news_pipeline().stats())
+    except Exception as e:
+        logger.exception("news_pipeline_stats 异常: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/live/stats")
+async def news_live_stats() -> dict:
+    """快讯增量轮询状态：各频道游标、观测速率（条/分钟）、当前轮询间隔与累计新条目"""
+    try:
+        data = get_live_poller().stats()
+        for ch in data["channels"]:
+            for k in ("last_poll_at", "last_new_at"):
+                if ch.get(k) and hasattr(ch[k], "isoformat"):
+                    ch[k] = ch[k].isoformat()
+        return api_success(data=data)
+    except Exception as e:
+        logger.exception("news_live_stats 异常: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/entities/rebuild")
+async def news_entities_rebuild(
+    days: int = Query(7, ge=1, le=90, description="回填最近 N 天新闻的 symbols"),
+    db: AsyncIOMotorDatabase = Depends(get_database),
+) -> dict:
+    """立即按 assets、fund_metrics 重建代码/名称词典，并重新标注近期新闻（新增持仓后调用）"""
+    try:
+        data = await entity_linker.rebuild(db, days=days)
+        return api_success(data=data, message=f"已更新 {data['updated']} 条")
+    except Exception as e:
+        logger.exception("news_entities_rebuild 异常: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/stream")
+async def news_stream(
+    request: Request,
+    source: Optional[str] = Query(None, description="仅推送该来源"),
+    fund_code: Optional[str] = Query(None, description="仅推送标记为该基金的新闻"),
+    min_sentiment: float = Query(0.0, ge=0, le=1, description="最小 |sentiment|"),
+    last_event_id: Optional[str] = Header(None, alias="Last-Event-ID"),
+) -> StreamingResponse:
+    """
+    SSE 实时推送：新闻写入 news_raw 后由 news_hub 扇出到各连接，连接本身不查询数据库。
+    事件 data 为 JSON（title、link、pub_date、source、content_summary、fund_code、sentiment、dup_of），
+    id 为新闻文档的 ObjectId；浏览器 EventSource 重连时带 Last-Event-ID，从最近缓冲中补发（可连到其他 worker）
+    """
+    hub = get_news_hub()
+    since = ObjectId(last_event_id) if last_event_id and ObjectId.is_valid(last_event_id) else None
+    sub = hub.subscribe(StreamFilter(source, fund_code, min_sentiment), last_event_id=since)
+
+    async def events():
+        try:
+            yield "retry: 3000\n\n"
+            while not await request.is_disconnected():
+                try:
+                    event_id, data = await asyncio.wait_for(sub.queue.get(), timeout=settings.NEWS_STREAM_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    # 心跳注释，防止代理断开空闲连接，同时触发断线检测
+                    yield ": ping\n\n"
+                    continue
+                yield f"id: {event_id}\nevent: news\ndata: {data}\n\n"
+        finally:
+            hub.unsubscribe(sub)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/stream/stats")
+async def news_stream_stats() -> dict:
+    """实时推送统计：当前订阅数、累计发布/投递条数、慢连接丢弃条数"""
+    try:
+        return api_success(data={**get_news_hub().stats(), "change_feed": get_change_feed().stats()})
+    except Exception as e:
+        logger.exception("news_stream_stats 异常: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/sentiment-trend")
@@ -167,34 +335,13 @@ async def news_sentiment_trend(
     days: int = Query(14, ge=1, le=60, description="最近 N 天"),
     db: AsyncIOMotorDatabase = Depends(get_database),
 ) -> dict:
-    """按日聚合情绪得分趋势，供 ECharts 折线图使用"""
-    cutoff = datetime.utcnow() - timedelta(days=days)
-    match_q: dict = {"pub_date": {"$gte": cutoff}}
-    if fund_code and fund_code.strip():
-        fc = fund_code.strip()
-        match_q["$or"] = [
-            {"fund_code": fc},
-            {"fund_code": {"$in": [None, ""]}},
-            {"fund_code": {"$exists": False}},
-        ]
-
-    pipeline = [
-        {"$match": match_q},
-        {"$addFields": {"sentiment_val": {"$ifNull": ["$sentiment", 0]}}},
-        {
-            "$group": {
-                "_id": {"$dateToString": {"format": "%Y-%m-%d", "date": "$pub_date"}},
-                "avg_sentiment": {"$avg": "$sentiment_val"},
-                "count": {"$sum": 1},
-            }
-        },
-        {"$sort": {"_id": 1}},
-    ]
-    cursor = db[NEWS_COLLECTION].aggregate(pipeline)
-    items = []
-    async for doc in cursor:
-        items.append({"date": doc["_id"], "avg_sentiment": round(float(doc.get("avg_sentiment", 0)), 2), "count": doc.get("count", 0)})
-    return api_success(data={"items": items, "fund_code": fund_code or "market"}, message="OK")
+    """按日情绪得分趋势（读 news_sentiment_daily 日汇总），供 ECharts 折线图使用"""
+    try:
+        items = await sentiment_trend(db, fund_code, days)
+        return api_success(data={"items": items, "fund_code": fund_code or "market"}, message="OK")
+    except Exception as e:
+        logger.exception("news_sentiment_trend 异常: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.post("/batch-grok")
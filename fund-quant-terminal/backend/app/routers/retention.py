@@ -0,0 +1,81 @@
+# =====================================================
+# 数据保留与冷归档 API 路由
+# GET /stats 热集合大小、归档规模与最近一次归档
+# POST /run 立即执行一轮归档
+# GET /archive 按时间范围查询已归档的 news_raw / decision_logs
+# =====================================================
+
+from datetime import datetime, timedelta, timezone
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.database import get_database
+from app.schemas.response import api_success
+from app.services.retention import query_archive, retention_stats, run_retention
+from app.utils.logger import logger
+
+router = APIRouter()
+
+
+def _serialize(doc: dict) -> dict:
+    d = dict(doc)
+    if "_id" in d:
+        d["id"] = str(d.pop("_id"))
+    for k, v in d.items():
+        if isinstance(v, datetime):
+            d[k] = v.isoformat()
+    return d
+
+
+def _to_naive_utc(dt: datetime) -> datetime:
+    """带时区的查询参数（如 ...Z）转为 naive UTC，与归档文档中的时间一致"""
+    return dt.astimezone(timezone.utc).replace(tzinfo=None) if dt.tzinfo else dt
+
+
+@router.get("/stats")
+async def retention_stats_api(db: AsyncIOMotorDatabase = Depends(get_database)) -> dict:
+    """各集合热数据条数/大小/索引大小、冷归档块数/条数/压缩前后字节，以及最近一次归档的吞吐"""
+    try:
+        return api_success(data=await retention_stats(db))
+    except Exception as e:
+        logger.exception("retention_stats 异常: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/run")
+async def retention_run(db: AsyncIOMotorDatabase = Depends(get_database)) -> dict:
+    """立即按保留策略归档（与每日定时任务相同）"""
+    try:
+        run = await run_retention(db)
+        total = sum(r.get("archived", 0) for r in run["collections"])
+        return api_success(data=_serialize(run), message=f"已归档 {total} 条")
+    except Exception as e:
+        logger.exception("retention_run 异常: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/archive")
+async def retention_archive(
+    collection: Literal["news_raw", "decision_logs"] = Query(..., description="归档来源集合"),
+    start: datetime = Query(..., description="起始时间（含），如 2025-01-01"),
+    end: Optional[datetime] = Query(None, description="结束时间（不含），默认起始时间后 7 天"),
+    fund_code: Optional[str] = Query(None, description="按基金代码过滤"),
+    source: Optional[str] = Query(None, description="按来源过滤"),
+    limit: int = Query(100, ge=1, le=1000, description="最多返回条数"),
+    db: AsyncIOMotorDatabase = Depends(get_database),
+) -> dict:
+    """按需查询冷归档（解压命中时间范围的归档块），按时间倒序返回"""
+    try:
+        start = _to_naive_utc(start)
+        end = _to_naive_utc(end) if end else start + timedelta(days=7)
+        if end <= start:
+            raise ValueError("end 必须晚于 start")
+        items = await query_archive(db, collection, start, end, {"fund_code": fund_code, "source": source}, limit)
+        return api_success(data=[_serialize(d) for d in items], message=f"共 {len(items)} 条")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.exception("retention_archive 异常: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
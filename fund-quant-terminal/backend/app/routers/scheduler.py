@@ -0,0 +1,49 @@
+# =====================================================
+# 定时任务调度 API 路由
+# GET /status 当前 leader、租约到期时间、各任务下次执行与最近一次结果
+# GET /runs 任务运行历史（开始/结束时间、耗时、状态、合并的错过次数）
+# =====================================================
+
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.database import get_database
+from app.schemas.response import api_success
+from app.services.scheduler import get_scheduler, list_runs
+from app.utils.logger import logger
+
+router = APIRouter()
+
+
+def _isoformat(d: dict) -> dict:
+    return {k: v.isoformat() if isinstance(v, datetime) else v for k, v in d.items()}
+
+
+@router.get("/status")
+async def scheduler_status(db: AsyncIOMotorDatabase = Depends(get_database)) -> dict:
+    """调度状态：本进程是否为 leader；未启用调度的进程仍可查看任务状态"""
+    try:
+        data = await get_scheduler().status(db)
+        data["jobs"] = [_isoformat(j) for j in data["jobs"]]
+        return api_success(data=_isoformat(data))
+    except Exception as e:
+        logger.exception("scheduler_status 异常: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/runs")
+async def scheduler_runs(
+    job_id: Optional[str] = Query(None, description="任务 id，如 news_fetch、fund_metrics、retention"),
+    limit: int = Query(50, ge=1, le=500, description="返回条数"),
+    db: AsyncIOMotorDatabase = Depends(get_database),
+) -> dict:
+    """任务运行历史，按开始时间倒序"""
+    try:
+        runs = await list_runs(db, job_id=job_id, limit=limit)
+        return api_success(data={"items": [_isoformat(r) for r in runs]})
+    except Exception as e:
+        logger.exception("scheduler_runs 异常: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
@@ -13,12 +13,12 @@ from pydantic import BaseModel, Field
 from app.database import get_database
 from app.schemas.response import api_success
 from app.services.eastmoney_service import EastMoneyService
-from app.services.sina_service import SinaService
+from app.services.news_pipeline import ingest_parsed
+from app.services.sina_service import SOURCE_SINA
 from app.utils.logger import logger
 
 router = APIRouter()
 _eastmoney_service: Optional[EastMoneyService] = None
-_sina_service: Optional[SinaService] = None
 
 
 def _get_eastmoney_service() -> EastMoneyService:
@@ -28,13 +28,6 @@ def _get_eastmoney_service() -> EastMoneyService:
     return _eastmoney_service
 
 
-def _get_sina_service() -> SinaService:
-    global _sina_service
-    if _sina_service is None:
-        _sina_service = SinaService()
-    return _sina_service
-
-
 class SinaTestRequest(BaseModel):
     category: str = Field(default="macro", description="international/market/other/focus/company/macro/lianghui/opinion")
     limit: int = Field(default=10, ge=1, le=100)
@@ -58,8 +51,8 @@ async def sina_test(req: SinaTestRequest, db: AsyncIOMotorDatabase = Depends(get
         }
         saved_count = 0
         if req.save_to_db and parsed:
-            sina_svc = _get_sina_service()
-            saved_count = await sina_svc.save_to_decision_logs(db, parsed, type_=f"rss:{category}")
+            stats = await ingest_parsed(db, parsed, SOURCE_SINA)
+            saved_count = stats.get("inserted", 0) + stats.get("modified", 0)
         data = {"type": f"rss:{category}", "data": raw, "parsed": parsed}
         if saved_count > 0:
             data["saved_count"] = saved_count
@@ -11,7 +11,8 @@ from pydantic import BaseModel, ConfigDict, Field, model_validator
 
 from app.database import get_database
 from app.schemas.response import api_success
-from app.services.wallstreetcn_service import WallStreetCNService
+from app.services.news_pipeline import ingest_parsed
+from app.services.wallstreetcn_service import SOURCE_WALLSTREETCN, WallStreetCNService
 from app.utils.logger import logger
 
 router = APIRouter()
@@ -49,7 +50,7 @@ class WallStreetCNTestRequest(BaseModel):
     limit: int = Field(default=10, ge=1, le=100, description="返回条数")
     channel: Optional[str] = Field(default="news", description="文章频道，type=articles 时使用")
     cursor: int = Field(default=0, ge=0, description="分页游标，type=lives 时使用")
-    save_to_db: bool = Field(default=False, description="是否将解析结果保存至 decision_logs（仅 lives/articles/keyword）")
+    save_to_db: bool = Field(default=False, description="是否将解析结果保存至 news_raw（仅 lives/articles/keyword）")
 
     @model_validator(mode="after")
     def validate_code_or_keyword(self):
@@ -83,7 +84,7 @@ async def wallstreetcn_test(
     db: AsyncIOMotorDatabase = Depends(get_database),
 ) -> dict:
     """
-    测试华尔街见闻接口。通过 service 拉取并解析，可选保存至 decision_logs。
+    测试华尔街见闻接口。通过 service 拉取并解析，可选保存至 news_raw。
     """
     try:
         service = _get_service()
@@ -104,7 +105,8 @@ async def wallstreetcn_test(
 
         saved_count = 0
         if req.save_to_db and parsed:
-            saved_count = await service.save_to_decision_logs(db, parsed, type_=t)
+            stats = await ingest_parsed(db, parsed, SOURCE_WALLSTREETCN)
+            saved_count = stats.get("inserted", 0) + stats.get("modified", 0)
 
         data = {"type": t, "data": raw}
         if parsed:
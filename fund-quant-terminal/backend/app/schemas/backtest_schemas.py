@@ -0,0 +1,38 @@
+# =====================================================
+# 回测相关请求/响应模型
+# =====================================================
+
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+
+class BacktestRequest(BaseModel):
+    """回测请求 - POST /api/backtest/run"""
+
+    symbols: List[str] = Field(..., min_length=1, description="标的代码列表")
+    asset_type: str = Field("fund", description="资产类型: fund/stock")
+    strategy: str = Field("dca", description="策略: dca|rebalance|sentiment_dca")
+    weights: Optional[List[float]] = Field(None, description="目标权重（与 symbols 顺序一致），缺省等权")
+    start_date: Optional[str] = Field(None, description="开始日期 YYYY-MM-DD")
+    end_date: Optional[str] = Field(None, description="结束日期 YYYY-MM-DD")
+    initial_cash: Optional[float] = Field(None, gt=0, description="初始资金；定投缺省为全部计划投入额")
+    amount: float = Field(1000.0, gt=0, description="每期定投金额（rebalance 未指定 initial_cash 时作为初始资金）")
+    interval: int = Field(20, ge=1, description="定投间隔（交易日）")
+    threshold: float = Field(0.05, gt=0, lt=1, description="再平衡偏离阈值")
+    fee_rate: float = Field(0.0015, ge=0, lt=0.1, description="交易费率")
+    min_sentiment: float = Field(0.0, ge=-1, le=1, description="情绪门控：当日情绪得分不低于该值才买入")
+    carry_over: bool = Field(True, description="情绪门控跳过的金额是否顺延到下一个买入日")
+    stop_loss: Optional[float] = Field(None, gt=0, lt=1, description="组合回撤止损比例")
+    save: bool = Field(True, description="是否保存到 backtest_runs")
+
+
+class BacktestSweepRequest(BacktestRequest):
+    """参数扫描请求 - POST /api/backtest/sweep；未出现在 grid 中的参数取基础值"""
+
+    grid: Dict[str, List[float]] = Field(
+        default_factory=dict,
+        description="扫描网格，如 {\"amount\": [500, 1000], \"stop_loss\": [0.1, 0.2]}",
+    )
+    per_symbol: bool = Field(False, description="逐只基金单独回测（否则按整体组合）")
+    rank_by: str = Field("sharpe", description="排序指标: sharpe|total_return|annual_return|max_drawdown|volatility")
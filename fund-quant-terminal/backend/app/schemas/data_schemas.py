@@ -39,3 +39,30 @@ class FundNavItem(BaseModel):
     nav: float
     cumulative_nav: Optional[float] = None
     daily_return: Optional[float] = None
+
+
+class FundScreenQuery(BaseModel):
+    """基金筛选条件 - GET /api/data/screen（min_/max_ 为指标区间，留空不限）"""
+
+    min_return_1m: Optional[float] = Field(None, description="近 1 月收益下限")
+    max_return_1m: Optional[float] = Field(None, description="近 1 月收益上限")
+    min_return_3m: Optional[float] = Field(None, description="近 3 月收益下限")
+    max_return_3m: Optional[float] = Field(None, description="近 3 月收益上限")
+    min_return_6m: Optional[float] = Field(None, description="近 6 月收益下限")
+    max_return_6m: Optional[float] = Field(None, description="近 6 月收益上限")
+    min_return_1y: Optional[float] = Field(None, description="近 1 年收益下限")
+    max_return_1y: Optional[float] = Field(None, description="近 1 年收益上限")
+    min_return_3y: Optional[float] = Field(None, description="近 3 年收益下限")
+    max_return_3y: Optional[float] = Field(None, description="近 3 年收益上限")
+    min_volatility: Optional[float] = Field(None, description="年化波动率下限")
+    max_volatility: Optional[float] = Field(None, description="年化波动率上限")
+    min_max_drawdown: Optional[float] = Field(None, description="近 1 年最大回撤下限")
+    max_max_drawdown: Optional[float] = Field(None, description="近 1 年最大回撤上限")
+    min_sharpe: Optional[float] = Field(None, description="Sharpe 下限")
+    max_sharpe: Optional[float] = Field(None, description="Sharpe 上限")
+    keyword: Optional[str] = Field(None, description="代码或名称包含")
+    fund_type: Optional[str] = Field(None, description="基金类型包含，如 混合型")
+    sort_by: str = Field("return_1y", description="排序字段：指标名或 code")
+    order: str = Field("desc", description="asc|desc")
+    offset: int = Field(0, ge=0)
+    limit: int = Field(50, ge=1, le=500)
@@ -23,6 +23,11 @@ def api_success(data: Any = None, message: str = "") -> dict:
     return {"code": 200, "data": data, "message": message}
 
 
+def api_page(data: Any, next_cursor: str | None = None, total: int | None = None, message: str = "") -> dict:
+    """构造游标分页响应：data 仍为列表，next_cursor / total 与 data 同级（无下一页时 next_cursor 为 None）"""
+    return {"code": 200, "data": data, "message": message, "next_cursor": next_cursor, "total": total}
+
+
 def api_error(code: int = 500, message: str = "服务器错误", detail: Any = None) -> dict:
     """构造错误响应（用于异常处理器；路由应使用 raise HTTPException）"""
     return {"code": code, "message": message, "detail": detail}
@@ -4,6 +4,10 @@
 
 from app.services.data_fetcher import DataFetcherService
 from app.services.llm_client import MultiLLMClient, get_llm_client
+from app.services.portfolio_aggregate import (
+    PortfolioAggregateService,
+    get_portfolio_aggregate_service,
+)
 from app.services.portfolio_context_builder import (
     PortfolioContextBuilder,
     get_portfolio_context_builder,
@@ -15,6 +19,8 @@ __all__ = [
     "DataFetcherService",
     "MultiLLMClient",
     "get_llm_client",
+    "PortfolioAggregateService",
+    "get_portfolio_aggregate_service",
     "PortfolioContextBuilder",
     "get_portfolio_context_builder",
     "WallStreetCNClient",
@@ -22,9 +22,11 @@ async def set_capital(
     *,
     session=None,
 ) -> None:
-    """设置当前现金（支持事务 session）"""
+    """设置当前现金（支持事务 session），并使资产汇总缓存失效"""
     from datetime import datetime
 
+    from app.services.portfolio_aggregate import invalidate_portfolio_summary
+
     kw = {"upsert": True}
     if session is not None:
         kw["session"] = session
@@ -33,3 +35,4 @@ async def set_capital(
         {"$set": {"capital": capital, "updated_at": datetime.utcnow()}},
         **kw,
     )
+    invalidate_portfolio_summary()
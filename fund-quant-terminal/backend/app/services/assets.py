@@ -1,17 +1,109 @@
 # =====================================================
 # 资产更新服务
 # 支持事务 session，供决策流程与 assets_update 原子化
+# 持仓按 (symbol, asset_type) 与库内比对，仅对差异执行一次 bulk_write
 # =====================================================
 
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from motor.motor_asyncio import AsyncIOMotorClientSession, AsyncIOMotorDatabase
+from pymongo import DeleteMany, InsertOne, UpdateOne
 
 from app.services.account_service import set_capital
+from app.services.portfolio_aggregate import invalidate_portfolio_summary
 
 ASSETS_COLLECTION = "assets"
 
+# 参与比对的持仓字段；其余字段（sector、remark 等）保留不动
+DIFF_FIELDS = ("name", "quantity", "cost_price", "current_price")
+
+
+def compute_from_transactions(txs: List[Dict[str, Any]]) -> tuple[float, float]:
+    """从历史交易重算持仓数量与成本价，返回 (quantity, cost_price)"""
+    qty = 0.0
+    cost = 0.0
+    for t in sorted(txs, key=lambda x: (x.get("date") or "", x.get("created_at") or datetime.min)):
+        typ = (t.get("type") or "").lower()
+        tq = float(t.get("quantity") or 0)
+        tp = float(t.get("price") or 0)
+        if typ == "buy":
+            if tq <= 0 or tp <= 0:
+                continue
+            new_qty = qty + tq
+            cost = (qty * cost + tq * tp) / new_qty if new_qty else tp
+            qty = new_qty
+        elif typ == "sell":
+            if tq <= 0:
+                continue
+            qty = max(0.0, qty - tq)
+            # 卖出不改变成本价
+    return (qty, cost)
+
+
+def _normalize_asset(a: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """规范化单条输入持仓，缺少 symbol/name 时返回 None（与旧版跳过规则一致）"""
+    doc = {
+        "symbol": str(a.get("symbol") or "").strip(),
+        "name": str(a.get("name") or "").strip(),
+        "quantity": float(a.get("quantity", 0) or 0),
+        "cost_price": a.get("cost_price"),
+        "current_price": a.get("current_price"),
+        "asset_type": a.get("asset_type") or "fund",
+    }
+    if not doc["symbol"] or not doc["name"]:
+        return None
+    return doc
+
+
+def _asset_key(doc: Dict[str, Any]) -> Tuple[str, str]:
+    return (str(doc.get("symbol") or "").strip(), doc.get("asset_type") or "fund")
+
+
+def _diff_assets(
+    stored: List[Dict[str, Any]],
+    incoming: List[Dict[str, Any]],
+    now: datetime,
+) -> Tuple[list, Dict[str, int]]:
+    """
+    比对库内持仓与目标持仓，生成 bulk_write 操作列表与统计。
+    已存在的持仓按 _id 原地 $set（保留 _id、created_at 及额外字段），
+    新持仓插入，目标中不存在的持仓（含同 key 重复文档）一次 DeleteMany。
+    """
+    targets: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    for a in incoming:
+        doc = _normalize_asset(a)
+        if doc is not None:
+            targets[_asset_key(doc)] = doc
+
+    existing: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    stale_ids = []
+    for d in stored:
+        key = _asset_key(d)
+        if key in targets and key not in existing:
+            existing[key] = d
+        else:
+            stale_ids.append(d["_id"])
+
+    ops: list = []
+    stats = {"inserted": 0, "changed": 0, "unchanged": 0, "deleted": len(stale_ids)}
+    for key, doc in targets.items():
+        cur = existing.get(key)
+        if cur is None:
+            ops.append(InsertOne({**doc, "created_at": now, "updated_at": now}))
+            stats["inserted"] += 1
+            continue
+        changes = {f: doc[f] for f in DIFF_FIELDS if cur.get(f) != doc[f]}
+        if not changes:
+            stats["unchanged"] += 1
+            continue
+        changes["updated_at"] = now
+        ops.append(UpdateOne({"_id": cur["_id"]}, {"$set": changes}))
+        stats["changed"] += 1
+    if stale_ids:
+        ops.append(DeleteMany({"_id": {"$in": stale_ids}}))
+    return ops, stats
+
 
 async def update_assets(
     db: AsyncIOMotorDatabase,
@@ -19,10 +111,14 @@ async def update_assets(
     capital: Optional[float] = None,
     assets: Optional[List[Dict[str, Any]]] = None,
     session: Optional[AsyncIOMotorClientSession] = None,
-) -> None:
+) -> Optional[Dict[str, int]]:
     """
     更新资本和/或持仓，支持事务。
     用于与 record_decision 同事务，或 assets_update 路由。
+    事务内调用时，调用方需在提交后再次 invalidate_portfolio_summary()，
+    避免提交前的并发读取把旧数据回填进缓存。
+
+    传入 assets 时返回持仓差异统计 {inserted, changed, unchanged, deleted}，否则返回 None。
     """
     kw = {}
     if session is not None:
@@ -31,20 +127,14 @@ async def update_assets(
     if capital is not None:
         await set_capital(db, capital, session=session)
 
-    if assets is not None:
-        coll = db[ASSETS_COLLECTION]
-        await coll.delete_many({}, **kw)
-        now = datetime.utcnow()
-        for a in assets:
-            doc = {
-                "symbol": a.get("symbol", ""),
-                "name": a.get("name", ""),
-                "quantity": float(a.get("quantity", 0)),
-                "cost_price": a.get("cost_price"),
-                "current_price": a.get("current_price"),
-                "asset_type": a.get("asset_type", "fund"),
-                "created_at": now,
-                "updated_at": now,
-            }
-            if doc["symbol"] and doc["name"]:
-                await coll.insert_one(doc, **kw)
+    if assets is None:
+        return None
+
+    coll = db[ASSETS_COLLECTION]
+    projection = {f: 1 for f in ("symbol", "asset_type", *DIFF_FIELDS)}
+    stored = await coll.find({}, projection, **kw).to_list(length=None)
+    ops, stats = _diff_assets(stored, assets, datetime.utcnow())
+    if ops:
+        await coll.bulk_write(ops, ordered=False, **kw)
+        invalidate_portfolio_summary()
+    return stats
@@ -0,0 +1,190 @@
+# =====================================================
+# 回测服务
+# 从 holding_histories 读取净值矩阵、从 news_sentiment_daily 读取每日情绪，
+# 调用向量化引擎运行策略并将结果保存到 backtest_runs
+# =====================================================
+
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.services import news_rollup
+from app.services.backtest_engine import STRATEGY_SENTIMENT_DCA, SUPPORTED_STRATEGIES, simulate
+from app.services.nav_matrix import PriceMatrix, holding_key, load_price_matrix, to_date64
+from app.utils.logger import logger
+
+RUNS_COLLECTION = "backtest_runs"
+
+
+def trim_to_common_start(pm: PriceMatrix) -> PriceMatrix:
+    """去掉部分标的尚无净值的起始行，回测从全部标的均有价格的首日开始"""
+    if pm.empty:
+        return pm
+    complete = ~np.isnan(pm.prices).any(axis=1)
+    if not complete.any():
+        return PriceMatrix(pm.keys, pm.dates[:0], pm.prices[:0])
+    i = int(complete.argmax())
+    return PriceMatrix(pm.keys, pm.dates[i:], pm.prices[i:])
+
+
+async def load_daily_sentiment(
+    db: AsyncIOMotorDatabase,
+    dates: np.ndarray,
+    fund_codes: Optional[List[str]] = None,
+) -> np.ndarray:
+    """
+    按自然日情绪均值（news_sentiment_daily 日汇总）映射到交易日 (T,)：
+    非交易日的新闻归入其后首个交易日，按条数加权；无新闻的交易日为 0（中性）。
+    fund_codes 指定时只统计这些基金及未关联基金的市场新闻。
+    读日汇总而非 news_raw，超出保留期已归档的新闻仍计入。
+    """
+    T = len(dates)
+    out = np.zeros(T)
+    if T == 0:
+        return out
+    start = datetime.fromisoformat(str(dates[0]))
+    end = datetime.fromisoformat(str(dates[-1])) + timedelta(days=1)
+    rows = await news_rollup.daily_totals(db, start, end, fund_codes)
+    if not rows:
+        return out
+    days = np.array([to_date64(day) for day, _, _ in rows], dtype="datetime64[D]")
+    idx = np.searchsorted(dates, days, side="left")
+    keep = idx < T
+    sums = np.zeros(T)
+    counts = np.zeros(T)
+    np.add.at(sums, idx[keep], np.array([total for _, total, _ in rows])[keep])
+    np.add.at(counts, idx[keep], np.array([n for _, _, n in rows], dtype=np.float64)[keep])
+    np.divide(sums, counts, out=out, where=counts > 0)
+    return out
+
+
+class BacktestService:
+    """回测服务：加载数据 -> 向量化模拟 -> 持久化"""
+
+    async def load_inputs(
+        self,
+        db: AsyncIOMotorDatabase,
+        symbols: List[str],
+        *,
+        asset_type: str = "fund",
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        with_sentiment: bool = False,
+    ) -> Dict[str, Any]:
+        """读取对齐净值矩阵（已裁剪到共同起点）及可选的每日情绪序列"""
+        keys = [holding_key(s, asset_type) for s in symbols if str(s or "").strip()]
+        if not keys:
+            raise ValueError("请至少指定一个标的")
+        pm = await load_price_matrix(db, keys, start=to_date64(start_date), end=to_date64(end_date))
+        missing = [k[0] for k in keys if k not in pm.keys]
+        if missing:
+            raise ValueError(f"以下标的无净值历史，请先同步: {', '.join(missing)}")
+        pm = trim_to_common_start(pm)
+        if len(pm.dates) < 2:
+            raise ValueError("所选区间内共同净值数据不足")
+        sentiment = None
+        if with_sentiment:
+            sentiment = await load_daily_sentiment(db, pm.dates, [k[0] for k in pm.keys])
+        return {"matrix": pm, "sentiment": sentiment}
+
+    async def run(self, db: AsyncIOMotorDatabase, params: Dict[str, Any], *, save: bool = True) -> Dict[str, Any]:
+        """
+        运行回测。params 与 BacktestRequest 字段一致；
+        weights 按 symbols 顺序给出，缺省等权。返回 metrics 与逐日资产曲线。
+        """
+        strategy = params.get("strategy") or "dca"
+        if strategy not in SUPPORTED_STRATEGIES:
+            raise ValueError(f"不支持的策略: {strategy}")
+        symbols = list(params.get("symbols") or [])
+        asset_type = params.get("asset_type") or "fund"
+        inputs = await self.load_inputs(
+            db,
+            symbols,
+            asset_type=asset_type,
+            start_date=params.get("start_date"),
+            end_date=params.get("end_date"),
+            with_sentiment=strategy == STRATEGY_SENTIMENT_DCA,
+        )
+        pm: PriceMatrix = inputs["matrix"]
+
+        weights = None
+        if params.get("weights"):
+            by_key = {holding_key(s, asset_type): float(w) for s, w in zip(symbols, params["weights"])}
+            weights = np.array([by_key.get(k, 0.0) for k in pm.keys])
+
+        t0 = time.perf_counter()
+        result = simulate(
+            pm.prices,
+            strategy=strategy,
+            weights=weights,
+            initial_cash=params.get("initial_cash"),
+            amount=float(params.get("amount") or 0),
+            interval=int(params.get("interval") or 1),
+            threshold=float(params.get("threshold") or 0),
+            fee_rate=float(params.get("fee_rate") or 0),
+            sentiment=inputs["sentiment"],
+            min_sentiment=float(params.get("min_sentiment") or 0),
+            carry_over=bool(params.get("carry_over", True)),
+            stop_loss=params.get("stop_loss"),
+        )
+        elapsed = time.perf_counter() - t0
+
+        metrics = result["metrics"]
+        stop_idx = metrics.pop("stop_loss_index")
+        metrics["stop_loss_date"] = str(pm.dates[stop_idx]) if stop_idx is not None else None
+        final_units = result["units"][-1]
+        doc = {
+            "params": {k: v for k, v in params.items() if k != "save"},
+            "metrics": metrics,
+            "start_date": str(pm.dates[0]),
+            "end_date": str(pm.dates[-1]),
+            "days": len(pm.dates),
+            "positions": [
+                {"symbol": k[0], "asset_type": k[1], "units": round(float(u), 4),
+                 "value": round(float(u * p), 2)}
+                for k, u, p in zip(pm.keys, final_units, pm.prices[-1])
+            ],
+            "curve": [
+                {"date": str(d), "equity": round(float(e), 2), "cash": round(float(c), 2)}
+                for d, e, c in zip(pm.dates, result["equity"], result["cash"])
+            ],
+            "elapsed_ms": round(elapsed * 1000, 2),
+            "created_at": datetime.utcnow(),
+        }
+        logger.info(
+            "backtest %s: %d 天 x %d 标的, 模拟耗时 %.1fms, total_return=%s",
+            strategy, len(pm.dates), len(pm.keys), elapsed * 1000, metrics.get("total_return"),
+        )
+        if save:
+            res = await db[RUNS_COLLECTION].insert_one(doc)
+            doc["id"] = str(res.inserted_id)
+        doc.pop("_id", None)
+        return doc
+
+    async def list_runs(self, db: AsyncIOMotorDatabase, limit: int = 20) -> List[Dict[str, Any]]:
+        """最近的回测记录（不含逐日曲线）"""
+        docs = await db[RUNS_COLLECTION].find({}, {"curve": 0}).sort("created_at", -1).limit(limit).to_list(length=limit)
+        for d in docs:
+            d["id"] = str(d.pop("_id"))
+        return docs
+
+    async def get_run(self, db: AsyncIOMotorDatabase, run_id: str) -> Optional[Dict[str, Any]]:
+        doc = await db[RUNS_COLLECTION].find_one({"_id": ObjectId(run_id)})
+        if doc:
+            doc["id"] = str(doc.pop("_id"))
+        return doc
+
+
+_service: Optional[BacktestService] = None
+
+
+def get_backtest_service() -> BacktestService:
+    """返回进程内 BacktestService 单例（可用于 FastAPI Depends）"""
+    global _service
+    if _service is None:
+        _service = BacktestService()
+    return _service
@@ -0,0 +1,250 @@
+# =====================================================
+# 向量化回测引擎（纯 NumPy，不访问数据库）
+# 输入对齐后的价格矩阵 (T, N)，以持仓份额/现金数组整体计算，
+# 避免逐日 Python 循环；供回测 API 与参数扫描进程池复用
+# =====================================================
+
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from app.services.risk_metrics import max_drawdown
+
+TRADING_DAYS = 252
+
+STRATEGY_DCA = "dca"
+STRATEGY_REBALANCE = "rebalance"
+STRATEGY_SENTIMENT_DCA = "sentiment_dca"
+SUPPORTED_STRATEGIES = (STRATEGY_DCA, STRATEGY_REBALANCE, STRATEGY_SENTIMENT_DCA)
+
+# 阈值再平衡时每次向前扫描的初始行数（找不到触发点时翻倍）
+_SCAN_BLOCK = 64
+
+
+def _normalize_weights(weights: Optional[np.ndarray], n: int) -> np.ndarray:
+    if weights is None or len(weights) != n:
+        return np.full(n, 1.0 / n)
+    w = np.clip(np.asarray(weights, dtype=np.float64), 0.0, None)
+    s = w.sum()
+    return w / s if s > 0 else np.full(n, 1.0 / n)
+
+
+def _dca_spend(
+    T: int,
+    amount: float,
+    interval: int,
+    budget: float,
+    gate: Optional[np.ndarray] = None,
+    carry_over: bool = True,
+) -> np.ndarray:
+    """
+    每日投入金额 (T,)。
+    计划投入日为 0, interval, 2*interval...；gate 为 False 的日子不买入，
+    carry_over=True 时被跳过的金额累积到下一个允许买入日；累计投入不超过 budget。
+    """
+    planned = np.zeros(T)
+    planned[:: max(int(interval), 1)] = amount
+    if gate is None:
+        cum = np.cumsum(planned)
+    elif carry_over:
+        # 允许买入日补足截至当日的计划累计额：对 gate 日的计划累计额做前值填充
+        plan_cum = np.cumsum(planned)
+        idx = np.where(gate, np.arange(T), -1)
+        np.maximum.accumulate(idx, out=idx)
+        cum = np.where(idx >= 0, plan_cum[np.maximum(idx, 0)], 0.0)
+    else:
+        cum = np.cumsum(np.where(gate, planned, 0.0))
+    cum = np.minimum(cum, budget)
+    return np.diff(cum, prepend=0.0)
+
+
+def _simulate_dca(
+    prices: np.ndarray,
+    weights: np.ndarray,
+    spend: np.ndarray,
+    initial_cash: float,
+    fee_rate: float,
+) -> Dict[str, np.ndarray]:
+    """按每日投入金额与目标权重买入；份额 = 累计(投入 × 权重 × (1-费率) / 价格)"""
+    units = np.cumsum(spend[:, None] * weights[None, :] * (1.0 - fee_rate) / prices, axis=0)
+    cash = initial_cash - np.cumsum(spend)
+    return {
+        "units": units,
+        "cash": cash,
+        "spend": spend,
+        "fees": spend * fee_rate,
+        "trades": (spend > 0).astype(np.int64) * int((weights > 0).sum()),
+    }
+
+
+def _simulate_rebalance(
+    prices: np.ndarray,
+    weights: np.ndarray,
+    initial_cash: float,
+    fee_rate: float,
+    threshold: float,
+) -> Dict[str, np.ndarray]:
+    """
+    首日按目标权重满仓买入，此后任一标的权重偏离超过 threshold 时再平衡回目标权重。
+    两次再平衡之间份额不变，漂移权重对整段一次性计算；Python 循环次数等于再平衡次数。
+    """
+    T, N = prices.shape
+    units = np.zeros((T, N))
+    fees = np.zeros(T)
+    trades = np.zeros(T, dtype=np.int64)
+    active = weights > 0
+
+    value = initial_cash * (1.0 - fee_rate)
+    fees[0] = initial_cash * fee_rate
+    trades[0] = int(active.sum())
+    cur = value * weights / prices[0]
+    i = 0
+    while i < T:
+        nxt = T
+        lo = i + 1
+        block = _SCAN_BLOCK
+        while lo < T:
+            hi = min(T, lo + block)
+            seg = prices[lo:hi] * cur
+            drift = seg / seg.sum(axis=1, keepdims=True)
+            hit = np.abs(drift - weights).max(axis=1) > threshold
+            if hit.any():
+                nxt = lo + int(hit.argmax())
+                break
+            lo = hi
+            block *= 2
+        units[i:nxt] = cur
+        if nxt >= T:
+            break
+        held = cur * prices[nxt]
+        total = held.sum()
+        turnover = np.abs(total * weights - held)
+        fee = turnover.sum() * fee_rate
+        fees[nxt] = fee
+        trades[nxt] = int((turnover > 1e-9).sum())
+        cur = (total - fee) * weights / prices[nxt]
+        i = nxt
+    spend = np.zeros(T)
+    spend[0] = initial_cash
+    return {
+        "units": units,
+        "cash": np.zeros(T),
+        "spend": spend,
+        "fees": fees,
+        "trades": trades,
+    }
+
+
+def _apply_stop_loss(
+    equity: np.ndarray,
+    result: Dict[str, np.ndarray],
+    prices: np.ndarray,
+    stop_loss: float,
+    fee_rate: float,
+) -> Optional[int]:
+    """组合净值自高点回撤超过 stop_loss 时次日起清仓持有现金；返回触发日下标"""
+    peak = np.maximum.accumulate(equity)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        dd = np.where(peak > 0, 1.0 - equity / peak, 0.0)
+    hit = dd > stop_loss
+    if not hit.any():
+        return None
+    k = int(hit.argmax())
+    if k + 1 >= len(equity):
+        return k
+    sell_value = float((result["units"][k] * prices[k]).sum())
+    fee = sell_value * fee_rate
+    result["units"][k + 1:] = 0.0
+    result["spend"][k + 1:] = 0.0
+    result["cash"][k + 1:] = result["cash"][k] + sell_value - fee
+    result["fees"][k + 1:] = 0.0
+    result["fees"][k + 1] = fee
+    result["trades"][k + 1:] = 0
+    result["trades"][k + 1] = int((result["units"][k] > 0).sum())
+    return k
+
+
+def _equity_metrics(equity: np.ndarray, basis: float) -> Dict[str, Any]:
+    T = len(equity)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r = np.where(equity[:-1] > 0, equity[1:] / equity[:-1] - 1.0, 0.0)
+    total_return = equity[-1] / basis - 1.0 if basis > 0 else 0.0
+    years = max(T - 1, 1) / TRADING_DAYS
+    ann_return = (1.0 + total_return) ** (1.0 / years) - 1.0 if total_return > -1 else -1.0
+    vol = float(r.std(ddof=1) * np.sqrt(TRADING_DAYS)) if r.size > 1 else 0.0
+    mean_ann = float(r.mean()) * TRADING_DAYS if r.size else 0.0
+    return {
+        "final_value": round(float(equity[-1]), 2),
+        "total_return": round(float(total_return), 6),
+        "annual_return": round(float(ann_return), 6),
+        "volatility": round(vol, 6),
+        "sharpe": round(mean_ann / vol, 6) if vol > 0 else None,
+        "max_drawdown": round(max_drawdown(r), 6),
+    }
+
+
+def simulate(
+    prices: np.ndarray,
+    *,
+    strategy: str = STRATEGY_DCA,
+    weights: Optional[np.ndarray] = None,
+    initial_cash: Optional[float] = None,
+    amount: float = 1000.0,
+    interval: int = 20,
+    threshold: float = 0.05,
+    fee_rate: float = 0.0015,
+    sentiment: Optional[np.ndarray] = None,
+    min_sentiment: float = 0.0,
+    carry_over: bool = True,
+    stop_loss: Optional[float] = None,
+) -> Dict[str, Any]:
+    """
+    运行单次回测。prices 为 (T, N) 正价格矩阵（调用方已去除缺失行）。
+
+    - dca：每 interval 个交易日按权重投入 amount；initial_cash 缺省为全部计划投入额
+    - sentiment_dca：同 dca，但仅在当日情绪得分 >= min_sentiment 时买入
+    - rebalance：initial_cash 一次性按权重买入，偏离超过 threshold 时再平衡
+    fee_rate 作用于每笔买入/卖出金额；stop_loss 为组合自高点回撤止损比例。
+    返回 metrics（汇总指标）与 equity/cash/units 等逐日数组。
+    """
+    T, N = prices.shape
+    if T == 0 or N == 0:
+        raise ValueError("价格矩阵为空")
+    w = _normalize_weights(weights, N)
+    if strategy == STRATEGY_REBALANCE:
+        cash0 = float(initial_cash if initial_cash is not None else amount)
+        result = _simulate_rebalance(prices, w, cash0, fee_rate, threshold)
+    elif strategy in (STRATEGY_DCA, STRATEGY_SENTIMENT_DCA):
+        planned_total = amount * len(range(0, T, max(int(interval), 1)))
+        cash0 = float(initial_cash if initial_cash is not None else planned_total)
+        gate = None
+        if strategy == STRATEGY_SENTIMENT_DCA:
+            s = np.zeros(T) if sentiment is None else np.nan_to_num(np.asarray(sentiment, dtype=np.float64))
+            gate = s >= min_sentiment
+        spend = _dca_spend(T, amount, interval, cash0, gate, carry_over)
+        result = _simulate_dca(prices, w, spend, cash0, fee_rate)
+    else:
+        raise ValueError(f"不支持的策略: {strategy}")
+
+    equity = (result["units"] * prices).sum(axis=1) + result["cash"]
+    stop_idx = None
+    if stop_loss:
+        stop_idx = _apply_stop_loss(equity, result, prices, stop_loss, fee_rate)
+        if stop_idx is not None:
+            equity = (result["units"] * prices).sum(axis=1) + result["cash"]
+
+    metrics = _equity_metrics(equity, cash0)
+    metrics.update({
+        "initial_cash": round(cash0, 2),
+        "invested": round(float(result["spend"].sum()), 2),
+        "fees": round(float(result["fees"].sum()), 2),
+        "trades": int(result["trades"].sum()),
+        "stop_loss_index": stop_idx,
+    })
+    return {
+        "metrics": metrics,
+        "equity": equity,
+        "cash": result["cash"],
+        "units": result["units"],
+    }
+
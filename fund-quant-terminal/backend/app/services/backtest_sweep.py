@@ -0,0 +1,297 @@
+# =====================================================
+# 回测参数扫描服务
+# 净值矩阵/情绪序列放入 multiprocessing.shared_memory，进程池 worker 直接映射
+# 为 NumPy 视图（不经 pickle 复制）；参数组合分块分发，完成一块即写入 Mongo，
+# 结束后按指标排序生成汇总
+# =====================================================
+
+import asyncio
+import itertools
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from multiprocessing import get_context
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.config import settings
+from app.services.backtest import load_daily_sentiment
+from app.services.backtest_engine import STRATEGY_SENTIMENT_DCA, SUPPORTED_STRATEGIES, simulate
+from app.services.nav_matrix import holding_key, load_price_matrix, to_date64
+from app.utils.logger import logger
+
+SWEEPS_COLLECTION = "backtest_sweeps"
+RESULTS_COLLECTION = "backtest_sweep_results"
+
+# 可扫描的参数
+SWEEP_PARAMS = ("amount", "interval", "threshold", "fee_rate", "min_sentiment", "stop_loss", "initial_cash")
+RANK_METRICS = ("sharpe", "total_return", "annual_return", "max_drawdown", "volatility")
+MAX_COMBINATIONS = 20000
+# 每个 worker 约分到的任务块数，兼顾负载均衡与调度开销
+CHUNKS_PER_WORKER = 4
+
+# ---------- worker 进程 ----------
+
+_worker_shm: Optional[SharedMemory] = None
+_worker_prices: Optional[np.ndarray] = None
+_worker_sentiment: Optional[np.ndarray] = None
+
+
+def _init_worker(shm_name: str, shape: Tuple[int, int], has_sentiment: bool) -> None:
+    """worker 初始化：按名称映射共享内存，价格矩阵与情绪序列均为零拷贝视图"""
+    global _worker_shm, _worker_prices, _worker_sentiment
+    _worker_shm = SharedMemory(name=shm_name)
+    T, N = shape
+    _worker_prices = np.ndarray((T, N), dtype=np.float64, buffer=_worker_shm.buf)
+    if has_sentiment:
+        _worker_sentiment = np.ndarray((T,), dtype=np.float64, buffer=_worker_shm.buf, offset=T * N * 8)
+
+
+def _run_chunk(tasks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """在 worker 中运行一块参数组合；只返回汇总指标，不回传逐日数组"""
+    out = []
+    for task in tasks:
+        cols = task["cols"]
+        prices = _worker_prices[:, cols]
+        complete = ~np.isnan(prices).any(axis=1)
+        start = int(complete.argmax()) if complete.any() else len(complete)
+        if len(complete) - start < 2:
+            out.append({**task, "metrics": None, "error": "共同净值数据不足"})
+            continue
+        sentiment = _worker_sentiment[start:] if _worker_sentiment is not None else None
+        try:
+            res = simulate(prices[start:], sentiment=sentiment, **task["params"])
+            metrics = res["metrics"]
+            metrics.pop("stop_loss_index", None)
+            out.append({**task, "metrics": metrics, "start_index": start})
+        except ValueError as e:
+            out.append({**task, "metrics": None, "error": str(e)})
+    return out
+
+
+# ---------- 调度 ----------
+
+
+def build_tasks(
+    n_symbols: int,
+    base: Dict[str, Any],
+    grid: Dict[str, List[Any]],
+    per_symbol: bool,
+) -> List[Dict[str, Any]]:
+    """参数网格 × 标的组合（per_symbol 时逐只基金，否则整体组合）展开为任务列表"""
+    unknown = [k for k in grid if k not in SWEEP_PARAMS]
+    if unknown:
+        raise ValueError(f"不支持扫描的参数: {', '.join(unknown)}")
+    names = [k for k in grid if grid[k]]
+    values = [list(grid[k]) for k in names]
+    col_sets = [[j] for j in range(n_symbols)] if per_symbol else [list(range(n_symbols))]
+    total = math.prod(len(v) for v in values) * len(col_sets)
+    if total > MAX_COMBINATIONS:
+        raise ValueError(f"组合数 {total} 超过上限 {MAX_COMBINATIONS}")
+    tasks = []
+    for cols in col_sets:
+        for combo in itertools.product(*values):
+            params = {**base, **dict(zip(names, combo))}
+            if per_symbol:
+                params.pop("weights", None)
+            tasks.append({"index": len(tasks), "cols": cols, "params": params})
+    return tasks
+
+
+def _worker_count() -> int:
+    return settings.BACKTEST_SWEEP_WORKERS or os.cpu_count() or 1
+
+
+class BacktestSweepService:
+    """参数扫描服务：提交后后台运行，进度与结果写入 backtest_sweeps / backtest_sweep_results"""
+
+    def __init__(self) -> None:
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    async def start(self, db: AsyncIOMotorDatabase, params: Dict[str, Any]) -> Dict[str, Any]:
+        strategy = params.get("strategy") or "dca"
+        if strategy not in SUPPORTED_STRATEGIES:
+            raise ValueError(f"不支持的策略: {strategy}")
+        rank_by = params.get("rank_by") or "sharpe"
+        if rank_by not in RANK_METRICS:
+            raise ValueError(f"rank_by 须为 {', '.join(RANK_METRICS)} 之一")
+        symbols = [s for s in params.get("symbols") or [] if str(s or "").strip()]
+        asset_type = params.get("asset_type") or "fund"
+        keys = [holding_key(s, asset_type) for s in symbols]
+        if not keys:
+            raise ValueError("请至少指定一个标的")
+
+        pm = await load_price_matrix(db, keys, start=to_date64(params.get("start_date")), end=to_date64(params.get("end_date")))
+        missing = [k[0] for k in keys if k not in pm.keys]
+        if missing:
+            raise ValueError(f"以下标的无净值历史，请先同步: {', '.join(missing)}")
+        sentiment = None
+        if strategy == STRATEGY_SENTIMENT_DCA:
+            sentiment = await load_daily_sentiment(db, pm.dates, [k[0] for k in pm.keys])
+
+        weights = None
+        if params.get("weights"):
+            by_key = {holding_key(s, asset_type): float(w) for s, w in zip(symbols, params["weights"])}
+            weights = [by_key.get(k, 0.0) for k in pm.keys]
+        base = {
+            "strategy": strategy,
+            "weights": weights,
+            "initial_cash": params.get("initial_cash"),
+            "amount": float(params.get("amount") or 0),
+            "interval": int(params.get("interval") or 1),
+            "threshold": float(params.get("threshold") or 0),
+            "fee_rate": float(params.get("fee_rate") or 0),
+            "min_sentiment": float(params.get("min_sentiment") or 0),
+            "carry_over": bool(params.get("carry_over", True)),
+            "stop_loss": params.get("stop_loss"),
+        }
+        per_symbol = bool(params.get("per_symbol"))
+        tasks = build_tasks(len(pm.keys), base, params.get("grid") or {}, per_symbol)
+
+        now = datetime.utcnow()
+        doc = {
+            "status": "running",
+            "params": {k: v for k, v in params.items() if k != "save"},
+            "rank_by": rank_by,
+            "symbols": [k[0] for k in pm.keys],
+            "total": len(tasks),
+            "done": 0,
+            "failed": 0,
+            "workers": _worker_count(),
+            "created_at": now,
+            "updated_at": now,
+        }
+        res = await db[SWEEPS_COLLECTION].insert_one(doc)
+        sweep_id = str(res.inserted_id)
+        task = asyncio.create_task(self._run(db, res.inserted_id, pm.keys, pm.prices, sentiment, tasks, rank_by))
+        self._tasks[sweep_id] = task
+        task.add_done_callback(lambda _t: self._tasks.pop(sweep_id, None))
+        return {"id": sweep_id, "total": len(tasks), "workers": doc["workers"]}
+
+    async def _run(
+        self,
+        db: AsyncIOMotorDatabase,
+        oid: ObjectId,
+        keys: List[Tuple[str, str]],
+        prices: np.ndarray,
+        sentiment: Optional[np.ndarray],
+        tasks: List[Dict[str, Any]],
+        rank_by: str,
+    ) -> None:
+        T, N = prices.shape
+        started = time.perf_counter()
+        size = prices.nbytes + (sentiment.nbytes if sentiment is not None else 0)
+        shm = SharedMemory(create=True, size=max(size, 1))
+        try:
+            np.ndarray((T, N), dtype=np.float64, buffer=shm.buf)[:] = prices
+            if sentiment is not None:
+                np.ndarray((T,), dtype=np.float64, buffer=shm.buf, offset=prices.nbytes)[:] = sentiment
+
+            workers = _worker_count()
+            chunk = max(1, math.ceil(len(tasks) / (workers * CHUNKS_PER_WORKER)))
+            chunks = [tasks[i:i + chunk] for i in range(0, len(tasks), chunk)]
+            loop = asyncio.get_running_loop()
+            # spawn：避免在含事件循环与驱动线程的进程中 fork
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(shm.name, (T, N), sentiment is not None),
+            ) as pool:
+                futures = [loop.run_in_executor(pool, _run_chunk, c) for c in chunks]
+                for fut in asyncio.as_completed(futures):
+                    rows = await fut
+                    await self._store(db, oid, keys, rows)
+            elapsed = time.perf_counter() - started
+            top = await self.ranked(db, str(oid), rank_by=rank_by, limit=20)
+            await db[SWEEPS_COLLECTION].update_one(
+                {"_id": oid},
+                {"$set": {
+                    "status": "done",
+                    "elapsed_sec": round(elapsed, 3),
+                    "combos_per_sec": round(len(tasks) / elapsed, 1) if elapsed > 0 else None,
+                    "top": top,
+                    "updated_at": datetime.utcnow(),
+                }},
+            )
+            logger.info("backtest_sweep %s 完成: %d 组合, %d workers, %.2fs", oid, len(tasks), workers, elapsed)
+        except Exception as e:
+            logger.exception("backtest_sweep %s 失败: %s", oid, e)
+            await db[SWEEPS_COLLECTION].update_one(
+                {"_id": oid},
+                {"$set": {"status": "failed", "error": str(e), "updated_at": datetime.utcnow()}},
+            )
+        finally:
+            shm.close()
+            shm.unlink()
+
+    async def _store(
+        self,
+        db: AsyncIOMotorDatabase,
+        oid: ObjectId,
+        keys: List[Tuple[str, str]],
+        rows: List[Dict[str, Any]],
+    ) -> None:
+        """一块结果写入 backtest_sweep_results 并更新进度"""
+        docs = []
+        failed = 0
+        for r in rows:
+            if r.get("metrics") is None:
+                failed += 1
+            params = {k: v for k, v in r["params"].items() if k != "weights"}
+            docs.append({
+                "sweep_id": oid,
+                "index": r["index"],
+                "symbols": [keys[j][0] for j in r["cols"]],
+                "params": params,
+                "metrics": r.get("metrics"),
+                "error": r.get("error"),
+            })
+        if docs:
+            await db[RESULTS_COLLECTION].insert_many(docs, ordered=False)
+        await db[SWEEPS_COLLECTION].update_one(
+            {"_id": oid},
+            {"$inc": {"done": len(rows), "failed": failed}, "$set": {"updated_at": datetime.utcnow()}},
+        )
+
+    async def ranked(
+        self,
+        db: AsyncIOMotorDatabase,
+        sweep_id: str,
+        *,
+        rank_by: str = "sharpe",
+        limit: int = 20,
+    ) -> List[Dict[str, Any]]:
+        """按指标排序的结果；max_drawdown / volatility 升序，其余降序"""
+        direction = 1 if rank_by in ("max_drawdown", "volatility") else -1
+        field = f"metrics.{rank_by}"
+        docs = await db[RESULTS_COLLECTION].find(
+            {"sweep_id": ObjectId(sweep_id), field: {"$ne": None}},
+            {"_id": 0, "sweep_id": 0},
+        ).sort(field, direction).limit(limit).to_list(length=limit)
+        for i, d in enumerate(docs, 1):
+            d["rank"] = i
+        return docs
+
+    async def get(self, db: AsyncIOMotorDatabase, sweep_id: str) -> Optional[Dict[str, Any]]:
+        doc = await db[SWEEPS_COLLECTION].find_one({"_id": ObjectId(sweep_id)})
+        if doc:
+            doc["id"] = str(doc.pop("_id"))
+        return doc
+
+
+_service: Optional[BacktestSweepService] = None
+
+
+def get_backtest_sweep_service() -> BacktestSweepService:
+    """返回进程内 BacktestSweepService 单例（可用于 FastAPI Depends）"""
+    global _service
+    if _service is None:
+        _service = BacktestSweepService()
+    return _service
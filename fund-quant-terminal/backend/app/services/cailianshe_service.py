@@ -6,13 +6,13 @@
 
 import hashlib
 from datetime import datetime
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 import feedparser
-import httpx
-from motor.motor_asyncio import AsyncIOMotorDatabase
 
-from app.config import llm_settings, settings
+from app.config import settings
+from app.services.sentiment import annotate_sentiment
+from app.utils.http_pool import get_http_client
 from app.utils.logger import logger
 
 # 财联社 category 映射（与 config 中 typeOptions 的 value 对应，RSSHub 支持：watch,announcement,explain,red,jpush,remind,fund,hk）
@@ -24,13 +24,9 @@ CATEGORY_MAP = {
     "fund": "基金",
     "watch": "看板",
 }
-DECISION_LOGS_COLLECTION = "decision_logs"
 SOURCE_CAILIANSHERSS = "cailianshe"
 CLS_ROOT = "https://www.cls.cn"
 
-# 情绪分析关键词（与 eastmoney_service 一致）
-POSITIVE_KEYWORDS = ["利好", "上涨", "买入", "大涨", "看涨", "反弹", "增长", "突破", "增持", "推荐"]
-NEGATIVE_KEYWORDS = ["利空", "下跌", "卖出", "大跌", "看跌", "回落", "跌破", "亏损", "减持", "预警"]
 
 
 def _cls_sign(params: Dict[str, str]) -> str:
@@ -41,7 +37,7 @@ def _cls_sign(params: Dict[str, str]) -> str:
 
 
 def _parse_cls_item(item: Dict[str, Any]) -> Dict[str, Any]:
-    """解析财联社 API 单条为统一格式"""
+    """解析财联社 API 单条为统一格式（sentiment 由调用方批量打分）"""
     title = str(item.get("title") or item.get("content") or "").strip()
     content = str(item.get("content") or "").strip()[:500]
     url = str(item.get("shareurl") or "").strip()
@@ -54,32 +50,16 @@ def _parse_cls_item(item: Dict[str, Any]) -> Dict[str, Any]:
             published_time = dt.strftime("%Y-%m-%dT%H:%M:%S+08:00")
         except (TypeError, ValueError, OSError):
             pass
-    text_for_sentiment = f"{title} {content}"
-    sentiment = _compute_sentiment(text_for_sentiment)
     return {
         "title": title or "(无标题)",
         "published_time": published_time,
         "summary": content,
         "url": url or None,
-        "sentiment": sentiment,
     }
 
 
-def _compute_sentiment(text: str) -> float:
-    """基于正负向关键词计算情绪得分，范围 -1 ~ 1"""
-    if not text or not isinstance(text, str):
-        return 0.0
-    t = text.strip()
-    pos = sum(1 for k in POSITIVE_KEYWORDS if k in t)
-    neg = sum(1 for k in NEGATIVE_KEYWORDS if k in t)
-    total = pos + neg
-    if total == 0:
-        return 0.0
-    return round((pos - neg) / max(total, 1), 2)
-
-
 def _parse_rss_entry(entry: Any) -> Dict[str, Any]:
-    """解析 feedparser 单条为统一格式：title, published_time, summary, url, sentiment"""
+    """解析 feedparser 单条为统一格式：title, published_time, summary, url（sentiment 由调用方批量打分）"""
     title = str(entry.get("title") or "").strip()
     summary = ""
     if hasattr(entry, "summary"):
@@ -106,28 +86,23 @@ def _parse_rss_entry(entry: Any) -> Dict[str, Any]:
         except (TypeError, ValueError):
             pass
 
-    text_for_sentiment = f"{title} {summary}"
-    sentiment = _compute_sentiment(text_for_sentiment)
-
     return {
         "title": display_title,
         "published_time": published_time.isoformat() if published_time else None,
         "summary": summary,
         "url": url or None,
-        "sentiment": sentiment,
     }
 
 
 class CailiansheService:
     """财联社电报快讯服务：支持 cls 原生 API（国内可用）和 RSSHub"""
 
-    async def _fetch_cls(
+    async def _get_roll_data(
         self,
-        *,
         category: str = "",
-        limit: int = 10,
-    ) -> tuple[Dict[str, Any], List[Dict[str, Any]]]:
-        """从财联社 cls.cn 原生 API 拉取电报（国内可用）"""
+        extra: Optional[Dict[str, str]] = None,
+    ) -> List[Dict[str, Any]]:
+        """请求 cls.cn 原生电报接口，返回 roll_data 原始条目（新到旧）"""
         params: Dict[str, str] = {
             "appName": "CailianpressWeb",
             "os": "web",
@@ -136,6 +111,7 @@ class CailiansheService:
         }
         if category:
             params["category"] = category
+        params.update(extra or {})
         params["sign"] = _cls_sign(params)
 
         api_path = "/v1/roll/get_roll_list" if category else "/nodeapi/updateTelegraphList"
@@ -144,12 +120,40 @@ class CailiansheService:
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
             "Referer": "https://www.cls.cn/telegraph",
         }
-        async with httpx.AsyncClient(timeout=30.0, headers=headers) as client:
-            resp = await client.get(url, params=params)
-            resp.raise_for_status()
-            data = resp.json()
+        resp = await get_http_client().get(url, params=params, headers=headers, timeout=30.0)
+        resp.raise_for_status()
+        data = resp.json()
         inner = data.get("data") or {}
-        roll_data = inner.get("roll_data") or []
+        return inner.get("roll_data") or []
+
+    async def fetch_telegraph_since(
+        self,
+        since_time: int,
+        *,
+        category: str = "",
+        limit: int = 50,
+    ) -> List[Dict[str, Any]]:
+        """
+        增量拉取电报：以 lastTime 请求 since_time（ctime，秒）起的条目，并在本地按 ctime >= since_time 再过滤一次
+        （同一秒可能有多条，由调用方按 id 排除已见条目）。
+        since_time 为 0 时只取最新一页（首次轮询建立游标）。返回按 ctime 升序的原始条目
+        """
+        extra = {"rn": str(limit)}
+        if since_time:
+            extra["lastTime"] = str(since_time)
+        items = await self._get_roll_data(category, extra)
+        fresh = [it for it in items if int(it.get("ctime") or 0) >= since_time]
+        fresh.sort(key=lambda it: (int(it.get("ctime") or 0), int(it.get("id") or 0)))
+        return fresh
+
+    async def _fetch_cls(
+        self,
+        *,
+        category: str = "",
+        limit: int = 10,
+    ) -> tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        """从财联社 cls.cn 原生 API 拉取电报（国内可用）"""
+        roll_data = await self._get_roll_data(category)
         parsed: List[Dict[str, Any]] = []
         for i, item in enumerate(roll_data):
             if i >= limit:
@@ -173,24 +177,30 @@ class CailiansheService:
         *,
         category: str = "",
         limit: int = 10,
+        score: bool = True,
     ) -> tuple[Dict[str, Any], List[Dict[str, Any]]]:
         """
         拉取财联社电报，解析为统一格式。
         默认使用 cls 原生 API（国内可用），可配置 CAILIANSHERSS_SOURCE=rsshub 使用 RSSHub。
+        score=False 时不打情绪分（由采集管道统一打分）。
         返回 (raw_feed_dict, parsed_items)。
         """
         source = (settings.CAILIANSHERSS_SOURCE or "cls").strip().lower()
         if source == "rsshub":
             try:
-                return await self._fetch_rsshub(category=category, limit=limit)
+                raw, parsed = await self._fetch_rsshub(category=category, limit=limit)
             except Exception as e:
                 logger.warning("cailianshe_service RSSHub 拉取失败: %s，尝试 cls 原生 API", e)
-                return await self._fetch_cls(category=category, limit=limit)
-        try:
-            return await self._fetch_cls(category=category, limit=limit)
-        except Exception as e:
-            logger.warning("cailianshe_service cls 原生 API 拉取失败: %s，尝试 RSSHub", e)
-            return await self._fetch_rsshub(category=category, limit=limit)
+                raw, parsed = await self._fetch_cls(category=category, limit=limit)
+        else:
+            try:
+                raw, parsed = await self._fetch_cls(category=category, limit=limit)
+            except Exception as e:
+                logger.warning("cailianshe_service cls 原生 API 拉取失败: %s，尝试 RSSHub", e)
+                raw, parsed = await self._fetch_rsshub(category=category, limit=limit)
+        if score:
+            annotate_sentiment(parsed)
+        return raw, parsed
 
     def _get_rss_url(self, category: str) -> str:
         """获取 RSS 地址。category 为空时拉取全部"""
@@ -210,15 +220,11 @@ class CailiansheService:
         headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
         }
-        proxies = None
-        if llm_settings.HTTP_PROXY or llm_settings.HTTPS_PROXY:
-            proxies = (llm_settings.HTTPS_PROXY or llm_settings.HTTP_PROXY) or None
 
         try:
-            async with httpx.AsyncClient(timeout=30.0, headers=headers, proxy=proxies) as client:
-                resp = await client.get(rss_url)
-                resp.raise_for_status()
-                content = resp.text
+            resp = await get_http_client(proxy=True).get(rss_url, headers=headers, timeout=30.0)
+            resp.raise_for_status()
+            content = resp.text
         except Exception as e:
             logger.warning("cailianshe_service 拉取 RSS 失败: %s", e)
             raise
@@ -247,35 +253,3 @@ class CailiansheService:
             "entries_count": len(entries),
         }
         return raw, parsed
-
-    async def save_to_decision_logs(
-        self,
-        db: AsyncIOMotorDatabase,
-        items: List[Dict[str, Any]],
-        type_: str = "telegraph",
-    ) -> int:
-        """将解析后的条目保存至 decision_logs，source=cailianshe"""
-        if not items:
-            return 0
-        try:
-            coll = db[DECISION_LOGS_COLLECTION]
-            now = datetime.utcnow()
-            count = 0
-            for it in items:
-                doc = {
-                    "source": SOURCE_CAILIANSHERSS,
-                    "type": type_,
-                    "title": it.get("title"),
-                    "published_time": it.get("published_time"),
-                    "summary": it.get("summary"),
-                    "url": it.get("url"),
-                    "sentiment": it.get("sentiment", 0),
-                    "created_at": now,
-                }
-                await coll.insert_one(doc)
-                count += 1
-            logger.info("cailianshe_service 已保存 %d 条至 decision_logs", count)
-            return count
-        except Exception as e:
-            logger.exception("cailianshe_service save_to_decision_logs 异常: %s", e)
-            raise
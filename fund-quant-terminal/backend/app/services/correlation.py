@@ -0,0 +1,208 @@
+# =====================================================
+# 持仓相关性与聚类服务
+# 基于 holding_histories 对齐收益矩阵计算两两相关系数（成对有效样本），
+# 以相关距离做平均连接层次聚类，识别高相关的持仓集中度
+# =====================================================
+
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.services.nav_matrix import SeriesKey, histories_last_dates, holding_key, load_price_matrix
+from app.services.portfolio_aggregate import get_portfolio_aggregate_service
+from app.utils.logger import logger
+
+DEFAULT_WINDOW = 250
+DEFAULT_THRESHOLD = 0.7
+# 成对有效样本少于该值时相关系数记为 None
+MIN_OBSERVATIONS = 20
+CACHE_SIZE = 16
+
+
+def pairwise_corr(R: np.ndarray, min_obs: int = MIN_OBSERVATIONS) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    收益矩阵 R (T, N)（NaN 为缺失）的两两 Pearson 相关系数，只使用两列同时有值的行。
+    全部由矩阵乘法得到：n = MᵀM，Σx = XᵀM，Σx² = (X²)ᵀM，Σxy = XᵀX。
+    返回 (corr, n)，样本不足或方差为 0 处为 NaN。
+    """
+    M = (~np.isnan(R)).astype(np.float64)
+    X = np.nan_to_num(R, nan=0.0)
+    n = M.T @ M
+    sx = X.T @ M
+    sxx = (X * X).T @ M
+    sxy = X.T @ X
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cov = sxy - sx * sx.T / n
+        var_i = sxx - sx * sx / n
+        var_j = var_i.T
+        corr = cov / np.sqrt(var_i * var_j)
+    corr[(n < min_obs) | ~np.isfinite(corr)] = np.nan
+    np.fill_diagonal(corr, 1.0)
+    return np.clip(corr, -1.0, 1.0), n
+
+
+def average_linkage(dist: np.ndarray) -> List[Tuple[int, int, float, int]]:
+    """
+    平均连接凝聚聚类（UPGMA）。dist 为 (N, N) 对称距离矩阵。
+    返回 N-1 步合并 [(a, b, 距离, 新簇大小)]，簇编号规则同 scipy linkage：
+    原始样本为 0..N-1，第 k 次合并生成的簇编号为 N+k。
+    """
+    N = dist.shape[0]
+    D = dist.astype(np.float64).copy()
+    np.fill_diagonal(D, np.inf)
+    ids = list(range(N))
+    sizes = [1] * N
+    active = np.ones(N, dtype=bool)
+    merges: List[Tuple[int, int, float, int]] = []
+    for k in range(N - 1):
+        sub = np.where(active[:, None] & active[None, :], D, np.inf)
+        flat = int(np.argmin(sub))
+        i, j = divmod(flat, N)
+        if i > j:
+            i, j = j, i
+        d = float(sub[i, j])
+        size = sizes[i] + sizes[j]
+        merges.append((ids[i], ids[j], d, size))
+        # 新簇放在 i 位置，距离按簇大小加权平均
+        D[i, :] = (D[i, :] * sizes[i] + D[j, :] * sizes[j]) / size
+        D[:, i] = D[i, :]
+        D[i, i] = np.inf
+        active[j] = False
+        sizes[i] = size
+        ids[i] = N + k
+    return merges
+
+
+def cut_clusters(merges: List[Tuple[int, int, float, int]], n: int, max_dist: float) -> List[List[int]]:
+    """按距离阈值切分合并树，返回各簇的原始样本下标（单元素簇也返回）"""
+    members: Dict[int, List[int]] = {i: [i] for i in range(n)}
+    for k, (a, b, d, _) in enumerate(merges):
+        if d > max_dist:
+            break
+        members[n + k] = members.pop(a) + members.pop(b)
+    return sorted(members.values(), key=lambda m: (-len(m), m))
+
+
+class CorrelationService:
+    """持仓相关性服务；结果按 (持仓集合, window, 各序列最新净值日, threshold) 缓存，仅新净值点或新持仓出现时重算"""
+
+    def __init__(self) -> None:
+        self._cache: Dict[Tuple[Any, ...], Dict[str, Any]] = {}
+        self._lock = asyncio.Lock()
+
+    async def _holdings(self, db: AsyncIOMotorDatabase) -> Tuple[Dict[SeriesKey, float], Dict[SeriesKey, str]]:
+        summary = await get_portfolio_aggregate_service().get_summary(db)
+        values: Dict[SeriesKey, float] = {}
+        names: Dict[SeriesKey, str] = {}
+        for h in summary.get("holdings", []):
+            key = holding_key(h.get("symbol"), h.get("asset_type"))
+            if not key[0]:
+                continue
+            price = h.get("current_price") or h.get("cost_price") or 0
+            values[key] = values.get(key, 0.0) + float(h.get("quantity") or 0) * float(price)
+            names[key] = h.get("name") or key[0]
+        return values, names
+
+    def _compute(
+        self,
+        pm_keys: List[SeriesKey],
+        R: np.ndarray,
+        dates: np.ndarray,
+        names: Dict[SeriesKey, str],
+        threshold: float,
+    ) -> Dict[str, Any]:
+        corr, n = pairwise_corr(R)
+        N = len(pm_keys)
+        # 相关距离 sqrt(0.5 * (1 - ρ))；样本不足的对视为不相关（ρ=0）
+        dist = np.sqrt(0.5 * (1.0 - np.nan_to_num(corr, nan=0.0)))
+        merges = average_linkage(dist) if N > 1 else []
+        max_dist = float(np.sqrt(0.5 * (1.0 - threshold)))
+
+        clusters = []
+        for members in cut_clusters(merges, N, max_dist):
+            sub = corr[np.ix_(members, members)]
+            off = sub[~np.eye(len(members), dtype=bool)]
+            off = off[np.isfinite(off)]
+            clusters.append({
+                "symbols": [pm_keys[i][0] for i in members],
+                "asset_types": [pm_keys[i][1] for i in members],
+                "names": [names.get(pm_keys[i], pm_keys[i][0]) for i in members],
+                "size": len(members),
+                "avg_correlation": round(float(off.mean()), 4) if off.size else None,
+            })
+
+        def _cell(v: float) -> Optional[float]:
+            return None if np.isnan(v) else round(float(v), 4)
+
+        return {
+            "symbols": [k[0] for k in pm_keys],
+            "asset_types": [k[1] for k in pm_keys],
+            "names": [names.get(k, k[0]) for k in pm_keys],
+            "matrix": [[_cell(v) for v in row] for row in corr],
+            "observations": int(R.shape[0]),
+            "start_date": str(dates[0]) if len(dates) else None,
+            "end_date": str(dates[-1]) if len(dates) else None,
+            "threshold": threshold,
+            "clusters": clusters,
+            "linkage": [
+                {"left": int(a), "right": int(b), "distance": round(d, 4), "size": int(s)}
+                for a, b, d, s in merges
+            ],
+        }
+
+    @staticmethod
+    def _with_weights(result: Dict[str, Any], values: Dict[SeriesKey, float]) -> Dict[str, Any]:
+        """簇权重按当前持仓市值计算（市值变化不影响相关矩阵缓存）；按 (代码, 类型) 取值，同代码的基金与股票互不混淆"""
+        def _value(symbols: List[str], asset_types: List[str]) -> float:
+            return sum(values.get(holding_key(s, at), 0.0) for s, at in zip(symbols, asset_types))
+
+        total = _value(result["symbols"], result["asset_types"])
+        clusters = [
+            {**c, "weight": round(_value(c["symbols"], c["asset_types"]) / total, 4) if total else None}
+            for c in result["clusters"]
+        ]
+        return {**result, "clusters": clusters}
+
+    async def compute(
+        self,
+        db: AsyncIOMotorDatabase,
+        *,
+        window: int = DEFAULT_WINDOW,
+        threshold: float = DEFAULT_THRESHOLD,
+    ) -> Dict[str, Any]:
+        """持仓两两相关矩阵与层次聚类（threshold 为簇内合并的最低平均相关系数）"""
+        values, names = await self._holdings(db)
+        keys = sorted(values)
+        last_dates = await histories_last_dates(db, keys)
+        cache_key = (tuple(keys), window, tuple(last_dates.get(k, ()) for k in keys), threshold)
+        hit = self._cache.get(cache_key)
+        if hit is not None:
+            return {**self._with_weights(hit, values), "cached": True}
+
+        async with self._lock:
+            hit = self._cache.get(cache_key)
+            if hit is not None:
+                return {**self._with_weights(hit, values), "cached": True}
+            pm = (await load_price_matrix(db, keys)).window(window + 1)
+            R = pm.returns()
+            result = await asyncio.to_thread(self._compute, pm.keys, R, pm.dates[1:], names, threshold)
+            result["window"] = window
+            result["missing_history"] = [k[0] for k in keys if k not in pm.keys]
+            if len(self._cache) >= CACHE_SIZE:
+                self._cache.pop(next(iter(self._cache)))
+            self._cache[cache_key] = result
+            logger.info("correlation 重算: holdings=%d window=%d last_date=%s", len(pm.keys), window, max((d for v in last_dates.values() for d in v), default=None))
+            return {**self._with_weights(result, values), "cached": False}
+
+
+_service: Optional[CorrelationService] = None
+
+
+def get_correlation_service() -> CorrelationService:
+    """返回进程内 CorrelationService 单例（可用于 FastAPI Depends）"""
+    global _service
+    if _service is None:
+        _service = CorrelationService()
+    return _service
@@ -259,10 +259,11 @@ class DataFetcherService:
             logger.debug("get_stock_sector 异常: %s", e)
             return None
 
-    async def get_fund_nav(self, fund_code: str) -> List[Dict[str, Any]]:
+    async def get_fund_nav(self, fund_code: str, with_latest: bool = True) -> List[Dict[str, Any]]:
         """
         获取基金净值走势
         按 primary_data_source 先尝试主数据源，失败时切换另一数据源
+        with_latest=False 时不再下载全市场当日净值表补最新一天（批量同步时使用）
         """
         code = fund_code.strip().split(".")[0].zfill(6)
         ts_code = code + ".OF"
@@ -284,6 +285,8 @@ class DataFetcherService:
                 max_date = df["date"].max() if "date" in df.columns else None
                 if max_date is not None and hasattr(max_date, "date") and callable(getattr(max_date, "date")):
                     max_date = max_date.date()
+            if not with_latest:
+                return records
             try:
                 daily_df = ak.fund_open_fund_daily_em()
                 if daily_df is not None and not daily_df.empty and "基金代码" in daily_df.columns:
@@ -595,3 +598,14 @@ class DataFetcherService:
             except Exception as e:
                 logger.warning("get_index_daily akshare 失败: %s", e)
         return []
+
+
+_service: Optional[DataFetcherService] = None
+
+
+def get_data_fetcher_service() -> DataFetcherService:
+    """进程内共享的数据获取服务（Tushare Token、主数据源配置作用于同一实例）"""
+    global _service
+    if _service is None:
+        _service = DataFetcherService()
+    return _service
@@ -0,0 +1,193 @@
+# =====================================================
+# 新闻实体链接（基金/股票代码与名称 -> 标的标签）
+# 以 assets（持仓基金、股票）与 fund_metrics（已计算筛选指标的基金）的代码与名称构建一个 Aho-Corasick 自动机，
+# 写入 news_raw 前单次扫描标题与摘要，把提及的标的写入 symbols 多键字段，标签形如 "fund:161725"、"stock:600519"。
+# 持仓相关新闻按 {symbols: {$in: 持仓标签}} 走 (symbols, pub_date) 索引一次查询，不再依赖来源 feed 的 fund_code。
+# 词典按 ENTITY_LINKER_REFRESH_MINUTES 定期重建；新增持仓后可调用 rebuild 立即生效并回填近期新闻
+# =====================================================
+
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import ahocorasick
+from pymongo import UpdateOne
+
+from app.config import settings
+from app.services.nav_matrix import holding_key
+from app.utils.logger import logger
+
+NEWS_COLLECTION = "news_raw"
+SYMBOLS_FIELD = "symbols"
+# 6 位数字代码：前后不能紧邻数字（避免长数字串中的误命中）
+CODE_LENGTH = 6
+# 名称过短时误命中多（如“平安”“国泰”），不参与匹配
+MIN_NAME_CHARS = 3
+
+
+def symbol_tag(symbol: Any, asset_type: Any) -> str:
+    """(代码, 类型) -> 标签，代码规则与 holding_key 一致（基金补齐 6 位）"""
+    code, at = holding_key(symbol, asset_type)
+    return f"{at}:{code}"
+
+
+class EntityLinker:
+    """代码/名称自动机：同一代码或名称可对应多个标签（如 000001 既是基金也是股票）"""
+
+    def __init__(self, entries: Iterable[Tuple[str, str]] = ()) -> None:
+        keywords: Dict[str, Set[str]] = {}
+        for word, tag in entries:
+            word = (word or "").strip().lower()
+            if not word or not tag:
+                continue
+            if not (word.isdigit() and len(word) == CODE_LENGTH) and len(word) < MIN_NAME_CHARS:
+                continue
+            keywords.setdefault(word, set()).add(tag)
+        self.size = len(keywords)
+        self.tags = len({t for tags in keywords.values() for t in tags})
+        self.built_at = datetime.utcnow()
+        self._automaton: Optional[ahocorasick.Automaton] = None
+        if keywords:
+            automaton = ahocorasick.Automaton()
+            for word, tags in keywords.items():
+                automaton.add_word(word, (word, tuple(sorted(tags))))
+            automaton.make_automaton()
+            self._automaton = automaton
+
+    def link(self, text: Optional[str]) -> List[str]:
+        """返回文本提及的标签（排序去重）；名称按最长匹配，如“招商银行”不会再命中其中的短名称"""
+        if not text or self._automaton is None:
+            return []
+        text = text.lower()
+        found: Set[str] = set()
+        for end, (word, tags) in self._automaton.iter_long(text):
+            if word.isdigit():
+                start = end - len(word) + 1
+                if (start > 0 and text[start - 1].isdigit()) or (end + 1 < len(text) and text[end + 1].isdigit()):
+                    continue
+            found.update(tags)
+        return sorted(found)
+
+    def tag_docs(self, docs: List[Dict[str, Any]]) -> int:
+        """为待写入文档写入 symbols（原地修改），来源 feed 的 fund_code 一并计入；返回有标签的条数"""
+        tagged = 0
+        for d in docs:
+            tags = set(self.link(f"{d.get('title') or ''}\n{d.get('content_summary') or ''}"))
+            if d.get("fund_code"):
+                tags.add(symbol_tag(d["fund_code"], "fund"))
+            d[SYMBOLS_FIELD] = sorted(tags)
+            if tags:
+                tagged += 1
+        return tagged
+
+    def stats(self) -> Dict[str, Any]:
+        return {"keywords": self.size, "tags": self.tags, "built_at": self.built_at.isoformat()}
+
+
+async def load_entries(db) -> List[Tuple[str, str]]:
+    """参考表中的 (代码或名称, 标签)：持仓基金与股票，以及 fund_metrics 中已计算指标的基金"""
+    entries: List[Tuple[str, str]] = []
+    async for a in db["assets"].find({}, {"symbol": 1, "name": 1, "asset_type": 1}):
+        code, at = holding_key(a.get("symbol"), a.get("asset_type"))
+        if not code:
+            continue
+        tag = f"{at}:{code}"
+        entries.append((code, tag))
+        if a.get("name"):
+            entries.append((a["name"], tag))
+    async for f in db["fund_metrics"].find({}, {"_id": 0, "code": 1, "name": 1}):
+        code, _ = holding_key(f.get("code"), "fund")
+        if not code:
+            continue
+        tag = f"fund:{code}"
+        entries.append((code, tag))
+        if f.get("name"):
+            entries.append((f["name"], tag))
+    return entries
+
+
+async def holding_tags(db) -> List[str]:
+    """当前持仓的标签列表"""
+    tags = set()
+    async for a in db["assets"].find({}, {"symbol": 1, "asset_type": 1}):
+        if str(a.get("symbol") or "").strip():
+            tags.add(symbol_tag(a.get("symbol"), a.get("asset_type")))
+    return sorted(tags)
+
+
+class EntityLinkerCache:
+    """进程内共享的自动机：过期后下次写入时重建，重建失败沿用旧自动机"""
+
+    def __init__(self) -> None:
+        self._linker: Optional[EntityLinker] = None
+        self._expires = 0.0
+        self._lock = asyncio.Lock()
+
+    async def get(self, db, force: bool = False) -> EntityLinker:
+        if not force and self._linker is not None and time.monotonic() < self._expires:
+            return self._linker
+        async with self._lock:
+            if not force and self._linker is not None and time.monotonic() < self._expires:
+                return self._linker
+            try:
+                entries = await load_entries(db)
+                self._linker = await asyncio.to_thread(EntityLinker, entries)
+                logger.info("entity_linker 词典已构建: %d 个关键词, %d 个标的", self._linker.size, self._linker.tags)
+            except Exception as e:
+                logger.warning("entity_linker 词典构建失败: %s", e)
+                if self._linker is None:
+                    self._linker = EntityLinker()
+            self._expires = time.monotonic() + settings.ENTITY_LINKER_REFRESH_MINUTES * 60
+            return self._linker
+
+    def stats(self) -> Dict[str, Any]:
+        return self._linker.stats() if self._linker is not None else {"keywords": 0, "tags": 0, "built_at": None}
+
+
+_cache: Optional[EntityLinkerCache] = None
+
+
+def get_entity_linker() -> EntityLinkerCache:
+    global _cache
+    if _cache is None:
+        _cache = EntityLinkerCache()
+    return _cache
+
+
+async def tag_docs(db, docs: List[Dict[str, Any]]) -> None:
+    """写入路径调用：词典不可用时只写入来源 fund_code 对应的标签"""
+    if not docs:
+        return
+    try:
+        linker = await get_entity_linker().get(db)
+    except Exception as e:
+        logger.warning("entity_linker 不可用: %s", e)
+        linker = EntityLinker()
+    linker.tag_docs(docs)
+
+
+async def rebuild(db, days: int = 7, batch_size: int = 500) -> Dict[str, Any]:
+    """立即重建词典，并对最近 days 天的 news_raw 重新打标签；返回词典规模与回填条数"""
+    linker = await get_entity_linker().get(db, force=True)
+    cutoff = datetime.utcnow() - timedelta(days=max(1, days))
+    scanned = changed = 0
+    ops: List[UpdateOne] = []
+    coll = db[NEWS_COLLECTION]
+    async for d in coll.find(
+        {"pub_date": {"$gte": cutoff}},
+        {"_id": 1, "title": 1, "content_summary": 1, "fund_code": 1, SYMBOLS_FIELD: 1},
+    ):
+        scanned += 1
+        old = d.get(SYMBOLS_FIELD)
+        linker.tag_docs([d])
+        if d[SYMBOLS_FIELD] != old:
+            ops.append(UpdateOne({"_id": d["_id"]}, {"$set": {SYMBOLS_FIELD: d[SYMBOLS_FIELD]}}))
+        if len(ops) >= batch_size:
+            await coll.bulk_write(ops, ordered=False)
+            changed += len(ops)
+            ops = []
+    if ops:
+        await coll.bulk_write(ops, ordered=False)
+        changed += len(ops)
+    return {**linker.stats(), "scanned": scanned, "updated": changed}
@@ -0,0 +1,222 @@
+# =====================================================
+# 组合资产曲线重建服务
+# 将 holding_transactions 回放到对齐的净值矩阵上，一次向量化计算得到
+# 每日持仓市值、现金、总资产与日收益，并增量持久化到 portfolio_snapshots
+# =====================================================
+
+import asyncio
+import hashlib
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import UpdateOne
+
+from app.services.account_service import get_capital
+from app.services.nav_matrix import PriceMatrix, SeriesKey, holding_key, load_price_matrix, to_date64
+from app.utils.logger import logger
+
+ASSETS_COLLECTION = "assets"
+TRANSACTION_COLLECTION = "holding_transactions"
+SNAPSHOT_COLLECTION = "portfolio_snapshots"
+CONFIG_COLLECTION = "config"
+META_DOC_ID = "equity_curve_meta"
+
+
+def _fill_leading(prices: np.ndarray) -> np.ndarray:
+    """首个观测之前的 NaN 用首个观测值回填（已前值填充的矩阵只剩前导缺失）"""
+    if prices.size == 0:
+        return prices
+    valid = ~np.isnan(prices)
+    first_idx = valid.argmax(axis=0)
+    first_val = prices[first_idx, np.arange(prices.shape[1])]
+    return np.where(valid, prices, first_val)
+
+
+def compute_equity_curve(
+    pm: PriceMatrix,
+    txs: List[Dict[str, Any]],
+    static_qty: Dict[SeriesKey, float],
+    capital: float,
+) -> Dict[str, np.ndarray]:
+    """
+    向量化重建资产曲线（纯函数，不访问数据库）。
+
+    - 交易按日期落到不早于交易日的首个净值日（searchsorted），窗口起点之前的交易累计到首行；
+    - 持仓 = 交易份额增量沿时间累加 + 无交易记录持仓的固定份额；
+    - 现金按当前现金倒推：cash_t = capital - 全部交易现金流 + 截至 t 的累计现金流
+      （买入为 -amount，卖出为 +amount），晚于最后净值日的交易只影响倒推基数；
+    - 无净值历史的标的不参与市值与现金倒推。
+    返回 dates、market_value、cash、total_value（均为长度 T 的数组）。
+    """
+    T, N = pm.prices.shape
+    col = {k: i for i, k in enumerate(pm.keys)}
+
+    rows, cols, dq, flow_rows, flows = [], [], [], [], []
+    total_flow = 0.0
+    for t in txs:
+        key = holding_key(t.get("symbol"), t.get("asset_type"))
+        j = col.get(key)
+        d = to_date64(t.get("date"))
+        if j is None or d is None:
+            continue
+        qty = float(t.get("quantity") or 0)
+        amount = t.get("amount")
+        amount = float(amount) if amount is not None else qty * float(t.get("price") or 0)
+        sign = 1.0 if (t.get("type") or "").lower() == "buy" else -1.0
+        total_flow += -sign * amount
+        i = int(np.searchsorted(pm.dates, d, side="left"))
+        if i >= T:
+            continue
+        rows.append(i)
+        cols.append(j)
+        dq.append(sign * qty)
+        flow_rows.append(i)
+        flows.append(-sign * amount)
+
+    deltas = np.zeros((T, N))
+    np.add.at(deltas, (np.array(rows, dtype=np.intp), np.array(cols, dtype=np.intp)), np.array(dq))
+    base = np.zeros(N)
+    for key, q in static_qty.items():
+        j = col.get(key)
+        if j is not None:
+            base[j] += q
+    positions = np.maximum(np.cumsum(deltas, axis=0) + base, 0.0)
+
+    market_value = np.nansum(positions * _fill_leading(pm.prices), axis=1)
+    flow_by_day = np.zeros(T)
+    np.add.at(flow_by_day, np.array(flow_rows, dtype=np.intp), np.array(flows))
+    cash = capital - total_flow + np.cumsum(flow_by_day)
+    return {
+        "dates": pm.dates,
+        "market_value": market_value,
+        "cash": cash,
+        "total_value": market_value + cash,
+    }
+
+
+def _daily_returns(total: np.ndarray, prev_total: Optional[float]) -> np.ndarray:
+    """日收益：首日使用上次快照的总资产作为基数，无基数或基数非正时为 NaN"""
+    prev = np.concatenate([[prev_total if prev_total else np.nan], total[:-1]])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r = np.where(prev > 0, total / prev - 1.0, np.nan)
+    return r
+
+
+class EquityCurveService:
+    """
+    资产曲线服务。
+
+    portfolio_snapshots 每日一条 {date, market_value, cash, total_value, daily_return}。
+    交易、无交易持仓或现金变化会改变输入签名，此时全量重建；否则只计算上次快照之后的新净值日。
+    """
+
+    def __init__(self) -> None:
+        self._lock = asyncio.Lock()
+
+    async def _load_inputs(
+        self, db: AsyncIOMotorDatabase
+    ) -> Tuple[List[Dict[str, Any]], Dict[SeriesKey, float], float, str]:
+        txs = await db[TRANSACTION_COLLECTION].find(
+            {}, {"symbol": 1, "asset_type": 1, "date": 1, "type": 1, "quantity": 1, "price": 1, "amount": 1, "created_at": 1}
+        ).to_list(length=None)
+        tx_keys = {holding_key(t.get("symbol"), t.get("asset_type")) for t in txs}
+        static_qty: Dict[SeriesKey, float] = {}
+        async for a in db[ASSETS_COLLECTION].find({}, {"symbol": 1, "asset_type": 1, "quantity": 1}):
+            key = holding_key(a.get("symbol"), a.get("asset_type"))
+            qty = float(a.get("quantity") or 0)
+            if key not in tx_keys and qty > 0:
+                static_qty[key] = static_qty.get(key, 0.0) + qty
+        capital = await get_capital(db)
+
+        h = hashlib.md5()
+        for t in sorted(txs, key=lambda x: str(x.get("_id"))):
+            h.update(f"{t.get('_id')}|{t.get('date')}|{t.get('type')}|{t.get('quantity')}|{t.get('amount')};".encode())
+        for key in sorted(static_qty):
+            h.update(f"{key}|{static_qty[key]};".encode())
+        h.update(f"capital|{capital}".encode())
+        return txs, static_qty, capital, h.hexdigest()
+
+    async def refresh(self, db: AsyncIOMotorDatabase, *, full: bool = False) -> Dict[str, Any]:
+        """重建/增量更新快照，返回 {mode, computed_days, last_date}"""
+        async with self._lock:
+            txs, static_qty, capital, signature = await self._load_inputs(db)
+            keys = {holding_key(t.get("symbol"), t.get("asset_type")) for t in txs} | set(static_qty)
+            meta = await db[CONFIG_COLLECTION].find_one({"_id": META_DOC_ID}) or {}
+            last = None
+            if not full and meta.get("signature") == signature:
+                last = await db[SNAPSHOT_COLLECTION].find_one({}, sort=[("date", -1)])
+
+            start = None
+            prev_total = None
+            if last:
+                start = to_date64(last["date"]) + np.timedelta64(1, "D")
+                prev_total = last.get("total_value")
+            pm = await load_price_matrix(db, keys, start=start)
+            if start is not None and pm.empty and keys:
+                # 无新净值日
+                return {"mode": "incremental", "computed_days": 0, "last_date": last["date"]}
+
+            curve = compute_equity_curve(pm, txs, static_qty, capital)
+            returns = _daily_returns(curve["total_value"], prev_total)
+            now = datetime.utcnow()
+            ops = []
+            for i, d in enumerate(curve["dates"]):
+                r = returns[i]
+                ops.append(UpdateOne(
+                    {"date": str(d)},
+                    {"$set": {
+                        "date": str(d),
+                        "market_value": round(float(curve["market_value"][i]), 2),
+                        "cash": round(float(curve["cash"][i]), 2),
+                        "total_value": round(float(curve["total_value"][i]), 2),
+                        "daily_return": None if np.isnan(r) else round(float(r), 6),
+                        "updated_at": now,
+                    }},
+                    upsert=True,
+                ))
+            mode = "incremental" if last else "full"
+            if not last:
+                await db[SNAPSHOT_COLLECTION].delete_many({})
+            if ops:
+                await db[SNAPSHOT_COLLECTION].bulk_write(ops, ordered=False)
+            last_date = pm.last_date or (last or {}).get("date")
+            await db[CONFIG_COLLECTION].update_one(
+                {"_id": META_DOC_ID},
+                {"$set": {"signature": signature, "last_date": last_date, "updated_at": now}},
+                upsert=True,
+            )
+            logger.info("equity_curve %s 更新 %d 天, last_date=%s", mode, len(ops), last_date)
+            return {"mode": mode, "computed_days": len(ops), "last_date": last_date}
+
+    async def get_curve(
+        self,
+        db: AsyncIOMotorDatabase,
+        *,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        refresh: bool = True,
+    ) -> Dict[str, Any]:
+        """按日期区间读取快照；refresh=True 时先做增量更新"""
+        info = await self.refresh(db) if refresh else None
+        query: Dict[str, Any] = {}
+        if start or end:
+            query["date"] = {}
+            if start:
+                query["date"]["$gte"] = start
+            if end:
+                query["date"]["$lte"] = end
+        docs = await db[SNAPSHOT_COLLECTION].find(query, {"_id": 0, "updated_at": 0}).sort("date", 1).to_list(length=None)
+        return {"items": docs, "refresh": info}
+
+
+_service: Optional[EquityCurveService] = None
+
+
+def get_equity_curve_service() -> EquityCurveService:
+    """返回进程内 EquityCurveService 单例（可用于 FastAPI Depends）"""
+    global _service
+    if _service is None:
+        _service = EquityCurveService()
+    return _service
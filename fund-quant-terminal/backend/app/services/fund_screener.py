@@ -0,0 +1,341 @@
+# =====================================================
+# 基金筛选服务
+# 夜间任务先为基金列表（数据源全量基金 + 持仓）分批同步净值序列到 holding_histories，
+# 每晚按 FUND_HISTORY_SYNC_LIMIT 轮转更新最久未同步的基金，再基于本地净值库计算已同步基金的指标
+# （近 1/3/6 月、1/3 年收益、波动率、最大回撤、Sharpe）写入 fund_metrics；
+# 查询时使用内存列式表（每列一个 NumPy 数组）做向量化过滤与排序
+# =====================================================
+
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import UpdateOne
+
+from app.config import settings
+from app.services.data_fetcher import get_data_fetcher_service
+from app.services.nav_matrix import HISTORY_COLLECTION, history_points, holding_key, series_to_arrays
+from app.services.risk_metrics import TRADING_DAYS, max_drawdown
+from app.utils.logger import logger
+
+METRICS_COLLECTION = "fund_metrics"
+CONFIG_COLLECTION = "config"
+META_DOC_ID = "fund_metrics_meta"
+# 净值同步失败记录：{_id: 基金代码, failed_at}
+SYNC_FAILURES_COLLECTION = "fund_history_sync_failures"
+
+# 区间收益：字段 -> 自然日回看天数
+RETURN_PERIODS: Tuple[Tuple[str, int], ...] = (
+    ("return_1m", 30),
+    ("return_3m", 91),
+    ("return_6m", 182),
+    ("return_1y", 365),
+    ("return_3y", 1095),
+)
+# 波动率 / 回撤 / Sharpe 的计算窗口（自然日）
+RISK_WINDOW_DAYS = 365
+METRIC_FIELDS: Tuple[str, ...] = tuple(f for f, _ in RETURN_PERIODS) + ("volatility", "max_drawdown", "sharpe")
+BATCH_SIZE = 500
+
+
+def fund_metrics(dates: np.ndarray, values: np.ndarray, risk_free: float) -> Dict[str, Optional[float]]:
+    """
+    单只基金指标。dates 为升序 datetime64[D]，values 为对应净值。
+    区间收益以回看日当天或之前最近的净值为基数，历史不足时为 None。
+    """
+    out: Dict[str, Optional[float]] = {f: None for f in METRIC_FIELDS}
+    if len(values) < 2:
+        return out
+    last = dates[-1]
+    for field, days in RETURN_PERIODS:
+        i = int(np.searchsorted(dates, last - np.timedelta64(days, "D"), side="right")) - 1
+        if i >= 0 and values[i] > 0:
+            out[field] = round(float(values[-1] / values[i] - 1.0), 6)
+
+    j = max(int(np.searchsorted(dates, last - np.timedelta64(RISK_WINDOW_DAYS, "D"), side="right")) - 1, 0)
+    window = values[j:]
+    if len(window) >= 3:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            r = window[1:] / window[:-1] - 1.0
+        r = r[np.isfinite(r)]
+        if r.size >= 2:
+            vol = float(r.std(ddof=1) * np.sqrt(TRADING_DAYS))
+            out["volatility"] = round(vol, 6)
+            out["max_drawdown"] = round(max_drawdown(r), 6)
+            if vol > 0:
+                out["sharpe"] = round((float(r.mean()) * TRADING_DAYS - risk_free) / vol, 6)
+    return out
+
+
+def _compute_batch(docs: List[Dict[str, Any]], risk_free: float) -> List[Dict[str, Any]]:
+    """一批 holding_histories 文档 -> 指标行（CPU 密集，在线程中执行）"""
+    rows = []
+    for doc in docs:
+        code, _ = holding_key(doc.get("symbol"), "fund")
+        dates, values = series_to_arrays(doc.get("data") or [])
+        if len(dates) == 0 or not code:
+            continue
+        order = np.argsort(dates, kind="stable")
+        dates, values = dates[order], values[order]
+        row = fund_metrics(dates, values, risk_free)
+        row.update({
+            "code": code,
+            "last_date": str(dates[-1]),
+            "nav": float(values[-1]),
+            "points": int(len(values)),
+        })
+        rows.append(row)
+    return rows
+
+
+def _merge_histories(docs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """同一基金的多份净值文档（补齐与未补齐代码各写入一份）合并为一份：按日期去重，同日以数据点多的一份为准"""
+    by_date: Dict[Any, Dict[str, Any]] = {}
+    for doc in sorted(docs, key=lambda d: len(d.get("data") or [])):
+        for p in doc.get("data") or []:
+            by_date[p.get("date")] = p
+    code, _ = holding_key(docs[0].get("symbol"), "fund")
+    return {"symbol": code, "data": list(by_date.values())}
+
+
+class _MetricsTable:
+    """fund_metrics 的内存列式副本：字符串列为 NumPy str 数组，指标列为 float64（缺失为 NaN）"""
+
+    def __init__(self, docs: List[Dict[str, Any]], stamp: Any) -> None:
+        self.stamp = stamp
+        self.size = len(docs)
+        self.code = np.array([d.get("code") or "" for d in docs], dtype=str)
+        self.name = np.array([d.get("name") or "" for d in docs], dtype=str)
+        self.fund_type = np.array([d.get("fund_type") or "" for d in docs], dtype=str)
+        self.last_date = np.array([d.get("last_date") or "" for d in docs], dtype=str)
+        self.nav = np.array([d.get("nav") if d.get("nav") is not None else np.nan for d in docs], dtype=np.float64)
+        self.columns: Dict[str, np.ndarray] = {
+            f: np.array([d.get(f) if d.get(f) is not None else np.nan for d in docs], dtype=np.float64)
+            for f in METRIC_FIELDS
+        }
+
+    def _row(self, i: int) -> Dict[str, Any]:
+        row: Dict[str, Any] = {
+            "code": str(self.code[i]),
+            "name": str(self.name[i]),
+            "fund_type": str(self.fund_type[i]),
+            "last_date": str(self.last_date[i]),
+            "nav": None if np.isnan(self.nav[i]) else float(self.nav[i]),
+        }
+        for f, col in self.columns.items():
+            v = col[i]
+            row[f] = None if np.isnan(v) else float(v)
+        return row
+
+    def screen(
+        self,
+        ranges: Dict[str, Tuple[Optional[float], Optional[float]]],
+        *,
+        keyword: Optional[str] = None,
+        fund_type: Optional[str] = None,
+        sort_by: str = "return_1y",
+        descending: bool = True,
+        offset: int = 0,
+        limit: int = 50,
+    ) -> Dict[str, Any]:
+        """按区间过滤（指标缺失的基金不满足任何区间条件）后排序分页"""
+        mask = np.ones(self.size, dtype=bool)
+        for field, (lo, hi) in ranges.items():
+            col = self.columns[field]
+            if lo is not None:
+                mask &= col >= lo
+            if hi is not None:
+                mask &= col <= hi
+        if keyword:
+            kw = keyword.strip()
+            mask &= (np.char.find(self.code, kw) >= 0) | (np.char.find(self.name, kw) >= 0)
+        if fund_type:
+            mask &= np.char.find(self.fund_type, fund_type.strip()) >= 0
+
+        idx = np.nonzero(mask)[0]
+        if sort_by in self.columns:
+            key = self.columns[sort_by][idx]
+            key = np.where(np.isnan(key), -np.inf if descending else np.inf, key)
+            order = np.argsort(-key if descending else key, kind="stable")
+        else:
+            key = self.code[idx]
+            order = np.argsort(key, kind="stable")
+            if descending:
+                order = order[::-1]
+        page = idx[order[offset:offset + limit]]
+        return {"total": int(idx.size), "items": [self._row(int(i)) for i in page]}
+
+
+class FundScreenerService:
+    """基金筛选服务：refresh 为夜间批量计算，screen 读内存列式表（按 meta.computed_at 判断是否需重载）"""
+
+    def __init__(self) -> None:
+        self._table: Optional[_MetricsTable] = None
+        self._lock = asyncio.Lock()
+
+    async def _fund_names(self, db: AsyncIOMotorDatabase) -> Dict[str, Dict[str, str]]:
+        """基金名称/类型（键即筛选范围）：数据源基金列表优先，其次持仓名称；数据源不可用时只有持仓"""
+        names: Dict[str, Dict[str, str]] = {}
+        async for a in db["assets"].find({"asset_type": "fund"}, {"symbol": 1, "name": 1}):
+            code, _ = holding_key(a.get("symbol"), "fund")
+            if code and a.get("name"):
+                names[code] = {"name": a["name"]}
+        try:
+            for f in await get_data_fetcher_service().get_fund_list(limit=50000):
+                code, _ = holding_key(f.get("code") or f.get("ts_code"), "fund")
+                if code:
+                    names[code] = {"name": f.get("name") or names.get(code, {}).get("name", ""), "fund_type": f.get("type") or f.get("fund_type") or ""}
+        except Exception as e:
+            logger.warning("fund_screener 获取基金列表失败，仅使用持仓名称: %s", e)
+        return names
+
+    async def sync_histories(self, db: AsyncIOMotorDatabase, codes: Iterable[str]) -> Dict[str, int]:
+        """
+        为 codes 拉取净值序列写入 holding_histories：跳过 FUND_HISTORY_MAX_AGE_HOURS 内已更新的基金，
+        其余按最近同步时间升序取前 FUND_HISTORY_SYNC_LIMIT 只，每 BATCH_SIZE 只一批并发拉取、批量写入。
+        拉取失败的基金记入 fund_history_sync_failures，下次排在后面，避免长期失败的基金占满每晚名额
+        """
+        now = datetime.utcnow()
+        last_sync: Dict[str, datetime] = {}
+        async for doc in db[HISTORY_COLLECTION].find({"asset_type": "fund"}, {"symbol": 1, "updated_at": 1}):
+            code, _ = holding_key(doc.get("symbol"), "fund")
+            last_sync[code] = max(last_sync.get(code, datetime.min), doc.get("updated_at") or datetime.min)
+        async for doc in db[SYNC_FAILURES_COLLECTION].find({}):
+            last_sync[doc["_id"]] = max(last_sync.get(doc["_id"], datetime.min), doc.get("failed_at") or datetime.min)
+        fresh_after = now - timedelta(hours=settings.FUND_HISTORY_MAX_AGE_HOURS)
+        stale = sorted(
+            {c for c in codes if c and last_sync.get(c, datetime.min) < fresh_after},
+            key=lambda c: (last_sync.get(c, datetime.min), c),
+        )
+        if settings.FUND_HISTORY_SYNC_LIMIT > 0:
+            stale = stale[:settings.FUND_HISTORY_SYNC_LIMIT]
+
+        service = get_data_fetcher_service()
+        sem = asyncio.Semaphore(max(1, settings.FUND_HISTORY_SYNC_CONCURRENCY))
+
+        async def _fetch(code: str) -> Tuple[str, List[Dict[str, Any]]]:
+            async with sem:
+                try:
+                    return code, history_points(await service.get_fund_nav(code, with_latest=False))
+                except Exception as e:
+                    logger.debug("fund_screener 同步净值失败 %s: %s", code, e)
+                    return code, []
+
+        synced = failed = 0
+        for i in range(0, len(stale), BATCH_SIZE):
+            results = await asyncio.gather(*(_fetch(c) for c in stale[i:i + BATCH_SIZE]))
+            stamp = datetime.utcnow()
+            ops = [
+                UpdateOne({"symbol": code, "asset_type": "fund"}, {"$set": {"data": points, "updated_at": stamp}}, upsert=True)
+                for code, points in results if points
+            ]
+            misses = [
+                UpdateOne({"_id": code}, {"$set": {"failed_at": stamp}}, upsert=True)
+                for code, points in results if not points
+            ]
+            synced += len(ops)
+            failed += len(misses)
+            if ops:
+                await db[HISTORY_COLLECTION].bulk_write(ops, ordered=False)
+            if misses:
+                await db[SYNC_FAILURES_COLLECTION].bulk_write(misses, ordered=False)
+            logger.info("fund_screener 净值同步进度: %d/%d（失败 %d）", min(i + BATCH_SIZE, len(stale)), len(stale), failed)
+        return {"history_stale": len(stale), "history_synced": synced, "history_failed": failed}
+
+    async def refresh(self, db: AsyncIOMotorDatabase, sync_histories: bool = True) -> Dict[str, Any]:
+        """
+        计算 fund_metrics：sync_histories 时先为基金列表同步净值（见 sync_histories），
+        再分批读取净值序列，线程中计算，批量 upsert，删除已不在净值库中的基金
+        """
+        started = time.perf_counter()
+        names = await self._fund_names(db)
+        sync_stats: Dict[str, int] = {}
+        if sync_histories:
+            sync_stats = await self.sync_histories(db, names.keys())
+        now = datetime.utcnow()
+        total = 0
+        batch: List[Dict[str, Any]] = []
+
+        async def _flush(docs: List[Dict[str, Any]]) -> int:
+            rows = await asyncio.to_thread(_compute_batch, docs, settings.RISK_FREE_RATE)
+            ops = []
+            for r in rows:
+                info = names.get(r["code"], {})
+                r.update({"name": info.get("name", ""), "fund_type": info.get("fund_type", ""), "computed_at": now})
+                ops.append(UpdateOne({"code": r["code"]}, {"$set": r}, upsert=True))
+            if ops:
+                await db[METRICS_COLLECTION].bulk_write(ops, ordered=False)
+            return len(ops)
+
+        # 先只读代码，找出补齐后重复的基金：这些文档暂存到最后合并计算，避免按 code upsert 时互相覆盖
+        seen: Dict[str, int] = {}
+        async for doc in db[HISTORY_COLLECTION].find({"asset_type": "fund"}, {"symbol": 1}):
+            code, _ = holding_key(doc.get("symbol"), "fund")
+            seen[code] = seen.get(code, 0) + 1
+        duplicated: Dict[str, List[Dict[str, Any]]] = {c: [] for c, n in seen.items() if n > 1}
+
+        cursor = db[HISTORY_COLLECTION].find({"asset_type": "fund"}, {"symbol": 1, "data": 1})
+        async for doc in cursor:
+            code, _ = holding_key(doc.get("symbol"), "fund")
+            if code in duplicated:
+                duplicated[code].append(doc)
+                continue
+            batch.append(doc)
+            if len(batch) >= BATCH_SIZE:
+                total += await _flush(batch)
+                batch = []
+        batch.extend(_merge_histories(docs) for docs in duplicated.values() if docs)
+        total += await _flush(batch)
+
+        removed = (await db[METRICS_COLLECTION].delete_many({"computed_at": {"$lt": now}})).deleted_count
+        elapsed = round(time.perf_counter() - started, 3)
+        await db[CONFIG_COLLECTION].update_one(
+            {"_id": META_DOC_ID},
+            {"$set": {"computed_at": now, "funds": total, "elapsed_sec": elapsed}},
+            upsert=True,
+        )
+        self._table = None
+        logger.info("fund_screener 指标计算完成: %d 只基金, 移除 %d, %.2fs", total, removed, elapsed)
+        return {"funds": total, "removed": removed, "elapsed_sec": elapsed, "computed_at": now.isoformat() + "Z", **sync_stats}
+
+    async def _get_table(self, db: AsyncIOMotorDatabase) -> _MetricsTable:
+        meta = await db[CONFIG_COLLECTION].find_one({"_id": META_DOC_ID}) or {}
+        stamp = meta.get("computed_at")
+        table = self._table
+        if table is not None and table.stamp == stamp:
+            return table
+        async with self._lock:
+            if self._table is not None and self._table.stamp == stamp:
+                return self._table
+            docs = await db[METRICS_COLLECTION].find({}, {"_id": 0}).to_list(length=None)
+            self._table = await asyncio.to_thread(_MetricsTable, docs, stamp)
+            logger.info("fund_screener 加载内存表: %d 行", self._table.size)
+            return self._table
+
+    async def screen(
+        self,
+        db: AsyncIOMotorDatabase,
+        ranges: Dict[str, Tuple[Optional[float], Optional[float]]],
+        **kwargs: Any,
+    ) -> Dict[str, Any]:
+        """筛选基金，返回 total、items 及指标计算时间 computed_at"""
+        table = await self._get_table(db)
+        t0 = time.perf_counter()
+        result = table.screen(ranges, **kwargs)
+        result["elapsed_ms"] = round((time.perf_counter() - t0) * 1000, 3)
+        result["computed_at"] = table.stamp.isoformat() + "Z" if table.stamp else None
+        return result
+
+
+_service: Optional[FundScreenerService] = None
+
+
+def get_fund_screener_service() -> FundScreenerService:
+    """返回进程内 FundScreenerService 单例（可用于 FastAPI Depends）"""
+    global _service
+    if _service is None:
+        _service = FundScreenerService()
+    return _service
@@ -9,32 +9,14 @@ from typing import Any, Dict, List, Optional, Tuple
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
 from app.services.data_fetcher import DataFetcherService
+from app.services.news_dedup import COLLAPSE_FILTER, DUP_OF_FIELD, FINGERPRINT_PROJECTION
+from app.services.sentiment import get_scorer
 from app.utils.logger import logger
 from app.utils.prompt_utils import build_full_context_messages
 
 NEWS_COLLECTION = "news_raw"
 HOURS_WINDOW = 72
 
-# 简单情绪关键词（可扩展）
-POSITIVE_KEYWORDS = [
-    "利好", "大涨", "上涨", "看涨", "乐观", "bullish", "rally", "增长", "突破",
-    "创新高", "反弹", "回暖", "向好", "超预期", "盈利", "增持", "推荐",
-]
-NEGATIVE_KEYWORDS = [
-    "利空", "大跌", "下跌", "看跌", "悲观", "bearish", "回落", "跌破",
-    "亏损", "减持", "预警", "风险", "下滑", "承压", "谨慎", "抛售",
-]
-
-
-def _count_sentiment(text: str) -> Tuple[int, int]:
-    """统计文本中正负向关键词出现次数"""
-    if not text or not isinstance(text, str):
-        return 0, 0
-    t = text.lower().strip()
-    pos = sum(1 for k in POSITIVE_KEYWORDS if k.lower() in t)
-    neg = sum(1 for k in NEGATIVE_KEYWORDS if k.lower() in t)
-    return pos, neg
-
 
 async def generate_grok_prompt(
     fund_code: str,
@@ -42,10 +24,12 @@ async def generate_grok_prompt(
     limit: int = 10,
     include_news_list: bool = True,
     custom_news_links: Optional[List[str]] = None,
+    collapse: bool = True,
 ) -> Tuple[str, List[Dict[str, Any]]]:
     """
     生成 Grok 决策提示词
     - custom_news_links: 若提供，则按 link 查询指定新闻；否则按 fund_code + 72h 查询
+    - collapse: 折叠近似重复新闻（同一事件多来源转发只取一条，节省 token）
     - 简单情绪分析：统计正/负向关键词
     Returns: (prompt, news_summary_list)
     """
@@ -66,7 +50,18 @@ async def generate_grok_prompt(
     # 2. 获取新闻：指定 link 列表 或 按 fund+时间 查询
     if custom_news_links and len(custom_news_links) > 0:
         links = [l.strip() for l in custom_news_links if l and l.strip()]
-        docs = await db[NEWS_COLLECTION].find({"link": {"$in": links}}).sort("pub_date", -1).limit(limit).to_list(length=limit)
+        docs = await db[NEWS_COLLECTION].find({"link": {"$in": links}}, FINGERPRINT_PROJECTION).sort("pub_date", -1).limit(limit).to_list(length=limit)
+        if collapse:
+            # 指定新闻中属于同一近似重复簇的只保留一条
+            seen_clusters = set()
+            kept = []
+            for d in docs:
+                cluster = d.get(DUP_OF_FIELD) or d.get("link")
+                if cluster in seen_clusters:
+                    continue
+                seen_clusters.add(cluster)
+                kept.append(d)
+            docs = kept
     else:
         cutoff = datetime.utcnow() - timedelta(hours=HOURS_WINDOW)
         q: Dict[str, Any] = {"pub_date": {"$gte": cutoff}}
@@ -81,14 +76,20 @@ async def generate_grok_prompt(
                 {"fund_code": {"$in": [None, ""]}},
                 {"fund_code": {"$exists": False}},
             ]
-        cursor = db[NEWS_COLLECTION].find(q).sort("pub_date", -1).limit(limit)
+        if collapse:
+            q.update(COLLAPSE_FILTER)
+        cursor = db[NEWS_COLLECTION].find(q, FINGERPRINT_PROJECTION).sort("pub_date", -1).limit(limit)
         docs = await cursor.to_list(length=limit)
 
     # 3. 构建新闻列表 + 简单情绪统计 + news_summary
     total_pos, total_neg = 0, 0
     lines: List[str] = []
     news_summary: List[Dict[str, Any]] = []
-    for i, d in enumerate(docs, 1):
+    # 所有新闻一次批量统计正负向词
+    counts = get_scorer().counts_batch([
+        f"{(d.get('title') or '').strip()} {(d.get('content_summary') or '').strip()[:200]}" for d in docs
+    ])
+    for i, (d, (pos, neg)) in enumerate(zip(docs, counts), 1):
         title = (d.get("title") or "").strip() or "(无标题)"
         summary = (d.get("content_summary") or "").strip()[:200]
         link = (d.get("link") or "").strip()
@@ -96,8 +97,6 @@ async def generate_grok_prompt(
         pub_str = pub.isoformat()[:19] if pub and hasattr(pub, "isoformat") else str(pub or "")
         source = d.get("source") or ""
 
-        text_for_sentiment = f"{title} {summary}"
-        pos, neg = _count_sentiment(text_for_sentiment)
         total_pos += pos
         total_neg += neg
 
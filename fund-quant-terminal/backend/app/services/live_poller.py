@@ -0,0 +1,259 @@
+# =====================================================
+# 快讯增量轮询（华尔街见闻 lives / 财联社电报）
+# 每个频道记住最后一条的游标（华尔街见闻为 id，财联社为 ctime + 同秒 id），只拉取更新的条目，
+# 新条目经 news_pipeline.ingest_docs 直接打分、建检索词并写入 news_raw。
+# 轮询间隔按频道观测到的更新速率（EWMA）自适应：目标每次轮询约 NEWS_LIVE_TARGET_PER_POLL 条，
+# 交易时段（北京时间工作日 9:00-15:30）在 [MIN, MAX] 内，其余时段整体放大 NEWS_LIVE_OFFHOURS_FACTOR 倍。
+# 游标与速率持久化在 news_live_cursors，重启后继续增量
+# =====================================================
+
+import abc
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.services.cailianshe_service import SOURCE_CAILIANSHERSS, CailiansheService, _parse_cls_item
+from app.services.news_pipeline import ingest_docs, normalize_parsed
+from app.services.wallstreetcn_service import SOURCE_WALLSTREETCN, WallStreetCNService, _parse_item
+from app.utils.logger import logger
+
+CURSOR_COLLECTION = "news_live_cursors"
+# 速率 EWMA 平滑系数：越大越敏感
+RATE_ALPHA = 0.3
+BEIJING_OFFSET = timedelta(hours=8)
+
+
+def is_trading_hours(now: Optional[datetime] = None) -> bool:
+    """北京时间工作日 9:00-15:30（含集合竞价前后），不区分节假日"""
+    bj = (now or datetime.utcnow()) + BEIJING_OFFSET
+    if bj.weekday() >= 5:
+        return False
+    minutes = bj.hour * 60 + bj.minute
+    return 9 * 60 <= minutes < 15 * 60 + 30
+
+
+def adaptive_interval(rate: float, trading: bool) -> float:
+    """按更新速率（条/秒）计算下次轮询间隔（秒）"""
+    lo, hi = settings.NEWS_LIVE_MIN_INTERVAL, settings.NEWS_LIVE_MAX_INTERVAL
+    if not trading:
+        lo, hi = lo * settings.NEWS_LIVE_OFFHOURS_FACTOR, hi * settings.NEWS_LIVE_OFFHOURS_FACTOR
+    if rate <= 0:
+        return hi
+    return min(hi, max(lo, settings.NEWS_LIVE_TARGET_PER_POLL / rate))
+
+
+class LiveChannel(abc.ABC):
+    """单个快讯频道：游标、速率与轮询统计；子类实现 fetch_new"""
+
+    source = ""
+
+    def __init__(self, channel: str) -> None:
+        self.channel = channel
+        self.key = f"{self.source}:{channel or 'all'}"
+        self.cursor: Dict[str, Any] = {}
+        self.rate = 0.0
+        self.interval = settings.NEWS_LIVE_MIN_INTERVAL
+        self.polls = 0
+        self.new_items = 0
+        self.errors = 0
+        self.last_poll_at: Optional[datetime] = None
+        self.last_new_at: Optional[datetime] = None
+        self.last_error: Optional[str] = None
+        self._last_poll_ts: Optional[float] = None
+
+    @abc.abstractmethod
+    async def fetch_new(self) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """拉取游标之后的条目，返回 (统一解析结果, 新游标)"""
+
+    def load(self, doc: Optional[Dict[str, Any]]) -> None:
+        if not doc:
+            return
+        self.cursor = doc.get("cursor") or {}
+        self.rate = float(doc.get("rate") or 0.0)
+        self.polls = int(doc.get("polls") or 0)
+        self.new_items = int(doc.get("new_items") or 0)
+        self.last_new_at = doc.get("last_new_at")
+
+    def state(self) -> Dict[str, Any]:
+        return {
+            "channel": self.key,
+            "cursor": self.cursor,
+            "rate_per_min": round(self.rate * 60, 2),
+            "interval_s": round(self.interval, 1),
+            "polls": self.polls,
+            "new_items": self.new_items,
+            "errors": self.errors,
+            "last_poll_at": self.last_poll_at,
+            "last_new_at": self.last_new_at,
+            "last_error": self.last_error,
+        }
+
+    async def poll(self, db) -> int:
+        """轮询一次：拉取新条目写入 news_raw，更新速率、间隔与游标，返回新条目数"""
+        now_ts = time.monotonic()
+        self.polls += 1
+        self.last_poll_at = datetime.utcnow()
+        try:
+            parsed, cursor = await self.fetch_new()
+        except Exception as e:
+            self.errors += 1
+            self.last_error = str(e)[:200]
+            # 失败时退避，避免对上游持续高频重试
+            self.interval = min(self.interval * 2, adaptive_interval(0.0, is_trading_hours()))
+            logger.warning("live_poller %s 拉取失败: %s", self.key, e)
+            return 0
+        self.last_error = None
+
+        docs = [d for d in (normalize_parsed(it, self.source) for it in parsed) if d and d.get("link")]
+        if docs:
+            stats = await ingest_docs(db, docs)
+            logger.info(
+                "live_poller %s 新增 %d 条（写入 inserted=%d near_duplicates=%d）",
+                self.key, len(docs), stats.get("inserted", 0), stats.get("near_duplicates", 0),
+            )
+            self.new_items += len(docs)
+            self.last_new_at = self.last_poll_at
+        self.cursor = cursor
+
+        # 本进程首次轮询没有上次时间，不计入速率
+        if self._last_poll_ts is not None:
+            elapsed = max(now_ts - self._last_poll_ts, 1e-3)
+            self.rate = RATE_ALPHA * (len(docs) / elapsed) + (1 - RATE_ALPHA) * self.rate
+        self._last_poll_ts = now_ts
+        self.interval = adaptive_interval(self.rate, is_trading_hours())
+
+        await db[CURSOR_COLLECTION].update_one(
+            {"_id": self.key},
+            {"$set": {
+                "cursor": self.cursor,
+                "rate": self.rate,
+                "polls": self.polls,
+                "new_items": self.new_items,
+                "last_new_at": self.last_new_at,
+                "updated_at": self.last_poll_at,
+            }},
+            upsert=True,
+        )
+        return len(docs)
+
+
+class WallStreetCNLive(LiveChannel):
+    """华尔街见闻快讯：游标为最大 id"""
+
+    source = SOURCE_WALLSTREETCN
+
+    def __init__(self, channel: str = "global-channel") -> None:
+        super().__init__(channel or "global-channel")
+        self._service = WallStreetCNService()
+
+    async def fetch_new(self) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        last_id = int(self.cursor.get("id") or 0)
+        items = await self._service.fetch_lives_since(last_id, channel=self.channel)
+        if not items:
+            return [], self.cursor
+        return [_parse_item(it) for it in items], {"id": int(items[-1].get("id") or 0)}
+
+
+class CailiansheLive(LiveChannel):
+    """财联社电报：游标为最大 ctime 及该秒内已见 id"""
+
+    source = SOURCE_CAILIANSHERSS
+
+    def __init__(self, category: str = "") -> None:
+        super().__init__(category)
+        self._service = CailiansheService()
+
+    async def fetch_new(self) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        last_time = int(self.cursor.get("ctime") or 0)
+        seen = set(self.cursor.get("ids") or [])
+        items = await self._service.fetch_telegraph_since(last_time, category=self.channel)
+        items = [it for it in items if not (int(it.get("ctime") or 0) == last_time and it.get("id") in seen)]
+        if not items:
+            return [], self.cursor
+        top = int(items[-1].get("ctime") or 0)
+        ids = [it.get("id") for it in items if int(it.get("ctime") or 0) == top]
+        if top == last_time:
+            ids = list(seen) + ids
+        return [_parse_cls_item(it) for it in items], {"ctime": top, "ids": ids}
+
+
+LIVE_CHANNELS = {
+    SOURCE_WALLSTREETCN: WallStreetCNLive,
+    SOURCE_CAILIANSHERSS: CailiansheLive,
+}
+
+
+def build_channels(spec: Optional[str] = None) -> List[LiveChannel]:
+    """NEWS_LIVE_CHANNELS 格式：来源[:频道]，逗号分隔，如 wallstreetcn:global-channel,cailianshe"""
+    channels = []
+    for part in (settings.NEWS_LIVE_CHANNELS if spec is None else spec).split(","):
+        source, _, channel = part.strip().partition(":")
+        if not source:
+            continue
+        cls = LIVE_CHANNELS.get(source)
+        if cls is None:
+            logger.warning("live_poller 未知来源 %s，已忽略", source)
+            continue
+        channels.append(cls(channel.strip()))
+    return channels
+
+
+class LivePoller:
+    """每个频道一个轮询协程，按各自的自适应间隔休眠"""
+
+    def __init__(self, channels: Optional[List[LiveChannel]] = None) -> None:
+        self.channels = channels if channels is not None else build_channels()
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def running(self) -> bool:
+        return any(not t.done() for t in self._tasks)
+
+    async def start(self, db) -> None:
+        if self.running:
+            return
+        for ch in self.channels:
+            try:
+                ch.load(await db[CURSOR_COLLECTION].find_one({"_id": ch.key}))
+            except Exception as e:
+                logger.warning("live_poller %s 游标读取失败: %s", ch.key, e)
+        self._tasks = [asyncio.create_task(self._loop(db, ch), name=f"live_poller:{ch.key}") for ch in self.channels]
+        logger.info("live_poller 已启动: %s", ", ".join(ch.key for ch in self.channels) or "无频道")
+
+    async def stop(self) -> None:
+        for t in self._tasks:
+            t.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _loop(self, db, ch: LiveChannel) -> None:
+        while True:
+            try:
+                await ch.poll(db)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                ch.errors += 1
+                ch.last_error = str(e)[:200]
+                logger.exception("live_poller %s 轮询异常: %s", ch.key, e)
+            await asyncio.sleep(ch.interval)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "trading_hours": is_trading_hours(),
+            "channels": [ch.state() for ch in self.channels],
+        }
+
+
+_poller: Optional[LivePoller] = None
+
+
+def get_live_poller() -> LivePoller:
+    """进程内共享的快讯轮询器"""
+    global _poller
+    if _poller is None:
+        _poller = LivePoller()
+    return _poller
@@ -0,0 +1,231 @@
+# =====================================================
+# 净值矩阵工具
+# 将 holding_histories 中各标的的 [{date, value}] 序列对齐到统一日期索引，
+# 生成 NumPy 价格/收益矩阵，供资产曲线、风险、相关性、回测等向量化计算复用
+# =====================================================
+
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+HISTORY_COLLECTION = "holding_histories"
+
+# (symbol, asset_type)
+SeriesKey = Tuple[str, str]
+
+
+class PriceMatrix:
+    """
+    对齐后的价格矩阵。
+
+    keys:   列对应的 (symbol, asset_type)，按键排序
+    dates:  datetime64[D] 升序日期索引，长度 T（各标的日期并集）
+    prices: float64 (T, N)；首个观测之前为 NaN，之后缺失日期按前值填充
+    """
+
+    __slots__ = ("keys", "dates", "prices")
+
+    def __init__(self, keys: List[SeriesKey], dates: np.ndarray, prices: np.ndarray) -> None:
+        self.keys = keys
+        self.dates = dates
+        self.prices = prices
+
+    @property
+    def empty(self) -> bool:
+        return self.prices.size == 0
+
+    @property
+    def last_date(self) -> Optional[str]:
+        return str(self.dates[-1]) if len(self.dates) else None
+
+    def column(self, key: SeriesKey) -> int:
+        return self.keys.index(key)
+
+    def returns(self) -> np.ndarray:
+        """简单日收益矩阵 (T-1, N)，价格缺失处为 NaN"""
+        if self.prices.shape[0] < 2:
+            return np.empty((0, self.prices.shape[1]))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return self.prices[1:] / self.prices[:-1] - 1.0
+
+    def window(self, days: Optional[int]) -> "PriceMatrix":
+        """截取最近 days 个交易日（None 或不足时返回自身）"""
+        if not days or days >= len(self.dates):
+            return self
+        return PriceMatrix(self.keys, self.dates[-days:], self.prices[-days:])
+
+
+def to_date64(v: Any) -> Optional[np.datetime64]:
+    """解析 YYYY-MM-DD / YYYYMMDD / datetime 为 datetime64[D]，无法解析返回 None"""
+    if v is None:
+        return None
+    if hasattr(v, "year"):
+        return np.datetime64(f"{v.year:04d}-{v.month:02d}-{v.day:02d}", "D")
+    s = str(v).strip()
+    if len(s) >= 8 and s[:8].isdigit():
+        s = f"{s[:4]}-{s[4:6]}-{s[6:8]}"
+    try:
+        return np.datetime64(s[:10].replace("/", "-"), "D")
+    except ValueError:
+        return None
+
+
+def ffill(a: np.ndarray) -> np.ndarray:
+    """沿时间轴（axis=0）向量化前值填充 NaN，首个观测之前保持 NaN"""
+    if a.size == 0:
+        return a
+    mask = ~np.isnan(a)
+    idx = np.where(mask, np.arange(a.shape[0])[:, None], 0)
+    np.maximum.accumulate(idx, axis=0, out=idx)
+    out = a[idx, np.arange(a.shape[1])]
+    out[~np.maximum.accumulate(mask, axis=0)] = np.nan
+    return out
+
+
+def history_points(rows: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """数据源净值/日线记录 -> holding_histories 的 data 点 [{date, value}]"""
+    points = []
+    for r in rows or []:
+        date_val = r.get("date") or r.get("净值日期") or r.get("日期")
+        value_val = r.get("nav") or r.get("单位净值") or r.get("收盘") or r.get("close")
+        if date_val and value_val is not None:
+            points.append({"date": str(date_val), "value": float(value_val)})
+    return points
+
+
+def series_to_arrays(data: Iterable[Dict[str, Any]]) -> Tuple[np.ndarray, np.ndarray]:
+    dates: List[np.datetime64] = []
+    values: List[float] = []
+    for r in data or []:
+        d = to_date64(r.get("date"))
+        v = r.get("value")
+        if d is None or v is None:
+            continue
+        try:
+            fv = float(v)
+        except (TypeError, ValueError):
+            continue
+        if fv != fv:
+            continue
+        dates.append(d)
+        values.append(fv)
+    return np.array(dates, dtype="datetime64[D]"), np.array(values, dtype=np.float64)
+
+
+def build_price_matrix(
+    series: Dict[SeriesKey, Iterable[Dict[str, Any]]],
+    *,
+    start: Optional[np.datetime64] = None,
+    end: Optional[np.datetime64] = None,
+) -> PriceMatrix:
+    """将多条 [{date, value}] 序列对齐为 PriceMatrix（日期取并集，前值填充）"""
+    keys: List[SeriesKey] = []
+    parsed: List[Tuple[np.ndarray, np.ndarray]] = []
+    for key in sorted(series):
+        d, v = series_to_arrays(series[key])
+        if len(d) == 0:
+            continue
+        keys.append(key)
+        parsed.append((d, v))
+    if not parsed:
+        return PriceMatrix([], np.array([], dtype="datetime64[D]"), np.empty((0, 0)))
+
+    dates = np.unique(np.concatenate([d for d, _ in parsed]))
+    if start is not None:
+        dates = dates[dates >= start]
+    if end is not None:
+        dates = dates[dates <= end]
+    prices = np.full((len(dates), len(keys)), np.nan)
+    for j, (d, v) in enumerate(parsed):
+        pos = np.searchsorted(dates, d)
+        inside = pos < len(dates)
+        ok = np.zeros(len(d), dtype=bool)
+        ok[inside] = dates[pos[inside]] == d[inside]
+        prices[pos[ok], j] = v[ok]
+    if start is not None and len(dates):
+        # 窗口起点之前的最后一个观测作为起始价，避免窗口首日缺值
+        for j, (d, v) in enumerate(parsed):
+            if np.isnan(prices[0, j]):
+                before = np.nonzero(d < dates[0])[0]
+                if len(before):
+                    prices[0, j] = v[before[-1]]
+    return PriceMatrix(keys, dates, ffill(prices))
+
+
+async def load_histories(
+    db: AsyncIOMotorDatabase,
+    keys: Optional[Iterable[SeriesKey]] = None,
+    *,
+    tail: Optional[int] = None,
+) -> Dict[SeriesKey, List[Dict[str, Any]]]:
+    """
+    从 holding_histories 读取序列；keys 为空时读取全部。
+    tail 指定时只取每条序列最后 tail 个点（$slice 投影，增量计算用）。
+    基金代码统一按 holding_key 补齐 6 位（新增持仓时可能以未补齐代码写入），
+    同一键存在多份时取数据点更多的一份。
+    """
+    query: Dict[str, Any] = {}
+    wanted: Optional[set] = None
+    if keys is not None:
+        wanted = {holding_key(s, at) for s, at in keys}
+        if not wanted:
+            return {}
+        symbols = {s for s, _ in wanted} | {s.lstrip("0") or s for s, _ in wanted}
+        query["symbol"] = {"$in": sorted(symbols)}
+    out: Dict[SeriesKey, List[Dict[str, Any]]] = {}
+    projection: Dict[str, Any] = {"symbol": 1, "asset_type": 1, "data": {"$slice": -tail} if tail else 1}
+    async for doc in db[HISTORY_COLLECTION].find(query, projection):
+        key = holding_key(doc.get("symbol"), doc.get("asset_type"))
+        if wanted is not None and key not in wanted:
+            continue
+        data = doc.get("data") or []
+        if len(data) > len(out.get(key, [])):
+            out[key] = data
+    return out
+
+
+async def load_price_matrix(
+    db: AsyncIOMotorDatabase,
+    keys: Optional[Iterable[SeriesKey]] = None,
+    *,
+    start: Optional[np.datetime64] = None,
+    end: Optional[np.datetime64] = None,
+    tail: Optional[int] = None,
+) -> PriceMatrix:
+    """读取并对齐 holding_histories，返回 PriceMatrix"""
+    return build_price_matrix(await load_histories(db, keys, tail=tail), start=start, end=end)
+
+
+async def histories_stamp(db: AsyncIOMotorDatabase) -> Optional[datetime]:
+    """holding_histories 最近一次写入时间，用于判断是否有新净值点（走 updated_at 索引，只读一个字段）"""
+    rows = await db[HISTORY_COLLECTION].find({}, {"_id": 0, "updated_at": 1}).sort("updated_at", -1).limit(1).to_list(length=1)
+    return rows[0].get("updated_at") if rows else None
+
+
+async def histories_last_dates(db: AsyncIOMotorDatabase, keys: Iterable[SeriesKey]) -> Dict[SeriesKey, Tuple[str, ...]]:
+    """
+    指定序列各自的最新净值日期（服务端 $max，不读取数据点），用于判断是否出现新净值点。
+    同一键存在多份文档时返回各份的最新日期，任一序列追上进度都会体现在结果中。
+    """
+    wanted = {holding_key(s, at) for s, at in keys}
+    if not wanted:
+        return {}
+    symbols = {s for s, _ in wanted} | {s.lstrip("0") or s for s, _ in wanted}
+    out: Dict[SeriesKey, List[str]] = {}
+    async for row in db[HISTORY_COLLECTION].aggregate([
+        {"$match": {"symbol": {"$in": sorted(symbols)}}},
+        {"$project": {"symbol": 1, "asset_type": 1, "last": {"$max": "$data.date"}}},
+    ]):
+        key = holding_key(row.get("symbol"), row.get("asset_type"))
+        if key in wanted:
+            out.setdefault(key, []).append(str(row.get("last") or ""))
+    return {k: tuple(sorted(v)) for k, v in out.items()}
+
+
+def holding_key(symbol: Any, asset_type: Any) -> SeriesKey:
+    """持仓/交易记录到 holding_histories 键：基金代码补齐 6 位（与 sync 写入一致）"""
+    at = (asset_type or "fund").lower()
+    sym = str(symbol or "").strip().split(".")[0]
+    return (sym.zfill(6) if at == "fund" and sym else sym, at)
@@ -0,0 +1,183 @@
+# =====================================================
+# 新闻近似去重（SimHash + 分段 LSH）
+# 同一条快讯经财联社、华尔街见闻、东方财富转发时 link 各不相同，唯一索引无法识别。
+# 写入时为每条新闻计算 64 位 SimHash，并切成 NEWS_DEDUP_MAX_DISTANCE+1 段写入 simhash_bands（多键索引）：
+# 汉明距离不超过阈值的两个指纹至少有一段完全相同（抽屉原理），按段等值查询即可在滚动窗口内找到候选。
+# 近似重复条目以 dup_of 指向簇内最早的规范条目，规范条目的 dup_count 记录重复数；
+# 列表与提示词按 dup_of 为空过滤即可折叠重复
+# =====================================================
+
+import hashlib
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import UpdateOne
+
+from app.config import settings
+from app.services.news_search import tokenize
+from app.utils.logger import logger
+
+NEWS_COLLECTION = "news_raw"
+SIMHASH_FIELD = "simhash"
+BANDS_FIELD = "simhash_bands"
+DUP_OF_FIELD = "dup_of"
+DUP_COUNT_FIELD = "dup_count"
+# 列表/提示词查询中不返回的指纹字段
+FINGERPRINT_PROJECTION = {SIMHASH_FIELD: 0, BANDS_FIELD: 0}
+# 折叠重复：仅保留规范条目（dup_of 为空或不存在）
+COLLAPSE_FILTER: Dict[str, Any] = {DUP_OF_FIELD: None}
+
+HASH_BITS = 64
+# 指纹只取标题：各来源转发时标题基本一致，摘要（电头、长短）差异大，混入后同一事件的距离明显拉大。
+# 标题特征不足时（部分快讯无标题）才用摘要前 SUMMARY_CHARS 字补足
+SUMMARY_CHARS = 80
+# 特征过少时指纹不稳定（短标题之间极易误判），不参与去重
+MIN_FEATURES = 6
+
+_MASK = (1 << HASH_BITS) - 1
+
+
+def _feature_hash(token: str) -> int:
+    return int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def simhash(title: Optional[str], summary: Optional[str] = None) -> Optional[int]:
+    """标题（不足时补摘要）检索词的 64 位 SimHash（无符号）；特征不足 MIN_FEATURES 时返回 None"""
+    features = tokenize(title)
+    if len(features) < MIN_FEATURES:
+        features = tokenize(f"{title or ''} {(summary or '')[:SUMMARY_CHARS]}")
+    if len(features) < MIN_FEATURES:
+        return None
+    acc = [0] * HASH_BITS
+    for token in features:
+        h = _feature_hash(token)
+        for i in range(HASH_BITS):
+            acc[i] += 1 if (h >> i) & 1 else -1
+    value = 0
+    for i, v in enumerate(acc):
+        if v > 0:
+            value |= 1 << i
+    return value
+
+
+def hamming(a: int, b: int) -> int:
+    return bin((a ^ b) & _MASK).count("1")
+
+
+def bands(value: int, max_distance: Optional[int] = None) -> List[str]:
+    """指纹切为 max_distance+1 段，形如 "段号:十六进制"；段数决定可保证召回的最大汉明距离"""
+    n = max(1, (settings.NEWS_DEDUP_MAX_DISTANCE if max_distance is None else max_distance) + 1)
+    width = HASH_BITS // n
+    out = []
+    for i in range(n):
+        lo = i * width
+        hi = HASH_BITS if i == n - 1 else lo + width
+        out.append(f"{i}:{(value >> lo) & ((1 << (hi - lo)) - 1):x}")
+    return out
+
+
+def to_int64(value: int) -> int:
+    """无符号 64 位 -> MongoDB 有符号 int64"""
+    return value - (1 << HASH_BITS) if value >= 1 << (HASH_BITS - 1) else value
+
+
+def from_int64(value: int) -> int:
+    return value & _MASK
+
+
+def fingerprint(doc: Dict[str, Any]) -> None:
+    """为待写入文档补充 simhash 与 simhash_bands（原地修改；特征不足时不写）"""
+    value = simhash(doc.get("title"), doc.get("content_summary"))
+    if value is None:
+        return
+    doc[SIMHASH_FIELD] = to_int64(value)
+    doc[BANDS_FIELD] = bands(value)
+
+
+def _doc_time(doc: Dict[str, Any]) -> datetime:
+    return doc.get("pub_date") or doc.get("created_at") or datetime.utcnow()
+
+
+class _BandIndex:
+    """内存 LSH 索引：段 -> 规范条目 [(指纹, 时间, link)]，按段等值查找候选后校验汉明距离与时间窗"""
+
+    def __init__(self, max_distance: int, window: timedelta) -> None:
+        self._max_distance = max_distance
+        self._window = window
+        self._buckets: Dict[str, List[Tuple[int, datetime, str]]] = defaultdict(list)
+
+    def add(self, value: int, when: datetime, link: str) -> None:
+        entry = (value, when, link)
+        for b in bands(value, self._max_distance):
+            self._buckets[b].append(entry)
+
+    def find(self, value: int, when: datetime) -> Optional[Tuple[int, datetime, str]]:
+        """返回最早的匹配规范条目"""
+        best = None
+        for b in bands(value, self._max_distance):
+            for entry in self._buckets.get(b, ()):
+                other, t, _ = entry
+                if abs(when - t) > self._window or hamming(value, other) > self._max_distance:
+                    continue
+                if best is None or t < best[1]:
+                    best = entry
+        return best
+
+
+async def assign_clusters(db, docs: List[Dict[str, Any]]) -> int:
+    """
+    为新条目（尚未写入 news_raw）计算指纹并归簇：与滚动窗口内已有规范条目或本批更早发布的条目近似重复时，
+    dup_of 设为该规范条目的 link，否则 dup_of 为 None（自身为规范条目）。返回判为重复的条数。
+    """
+    max_distance = settings.NEWS_DEDUP_MAX_DISTANCE
+    window = timedelta(hours=settings.NEWS_DEDUP_WINDOW_HOURS)
+    candidates: List[Dict[str, Any]] = []
+    for d in docs:
+        fingerprint(d)
+        d[DUP_OF_FIELD] = None
+        if SIMHASH_FIELD in d:
+            candidates.append(d)
+    if not candidates:
+        return 0
+
+    index = _BandIndex(max_distance, window)
+    times = [_doc_time(d) for d in candidates]
+    all_bands = sorted({b for d in candidates for b in d[BANDS_FIELD]})
+    links = [d["link"] for d in candidates]
+    query = {
+        BANDS_FIELD: {"$in": all_bands},
+        DUP_OF_FIELD: None,
+        "link": {"$nin": links},
+        "pub_date": {"$gte": min(times) - window, "$lte": max(times) + window},
+    }
+    async for o in db[NEWS_COLLECTION].find(query, {"_id": 0, "link": 1, SIMHASH_FIELD: 1, "pub_date": 1}):
+        if o.get(SIMHASH_FIELD) is not None and o.get("pub_date") is not None:
+            index.add(from_int64(o[SIMHASH_FIELD]), o["pub_date"], o["link"])
+
+    # 本批按发布时间先后归簇，同批内的规范条目为最早发布的一条
+    duplicates = 0
+    for d, when in sorted(zip(candidates, times), key=lambda x: x[1]):
+        value = from_int64(d[SIMHASH_FIELD])
+        match = index.find(value, when)
+        if match is None:
+            index.add(value, when, d["link"])
+            continue
+        d[DUP_OF_FIELD] = match[2]
+        duplicates += 1
+    return duplicates
+
+
+async def apply_dup_counts(db, inserted: List[Dict[str, Any]]) -> None:
+    """写入后按实际插入的重复条目为其规范条目累加 dup_count"""
+    counts: Dict[str, int] = defaultdict(int)
+    for d in inserted:
+        if d.get(DUP_OF_FIELD):
+            counts[d[DUP_OF_FIELD]] += 1
+    ops = [UpdateOne({"link": link}, {"$inc": {DUP_COUNT_FIELD: n}}) for link, n in counts.items()]
+    if not ops:
+        return
+    try:
+        await db[NEWS_COLLECTION].bulk_write(ops, ordered=False)
+    except Exception as e:
+        logger.warning("news_raw dup_count 更新失败: %s", e)
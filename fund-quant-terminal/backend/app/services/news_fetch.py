@@ -1,16 +1,27 @@
 # =====================================================
 # 新闻抓取服务
-# 使用 feedparser 获取东方财富、新浪财经等 RSS，写入 news_raw
+# 通过共享连接池条件请求东方财富、新浪财经等 RSS，feedparser 解析后写入 news_raw
+# （每次抓取按 link 去重后一次无序 bulk_write）
 # =====================================================
 
 import asyncio
-import re
+import time
 from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 import feedparser
+import httpx
+from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
 
 from app.config import settings
+from app.services import entity_linker, news_dedup, news_rollup
+from app.services.news_hub import publish_news
+from app.services.news_search import SEARCH_FIELD, build_search_terms, keyword_filter
+from app.services.rss_client import get_rss_client
+from app.services.sentiment import score_batch
+from app.utils.pagination import count_cache, keyset_page
 from app.utils.logger import logger
 
 NEWS_COLLECTION = "news_raw"
@@ -19,26 +30,6 @@ NEWS_COLLECTION = "news_raw"
 SOURCE_EASTMONEY = "eastmoney"
 SOURCE_SINA = "sina"
 
-# 情绪分析关键词
-POSITIVE_KEYWORDS = ["利好", "上涨", "买入", "大涨", "看涨", "反弹", "增长", "突破", "增持", "推荐"]
-NEGATIVE_KEYWORDS = ["利空", "下跌", "卖出", "大跌", "看跌", "回落", "跌破", "亏损", "减持", "预警"]
-
-
-def _compute_sentiment(text: str) -> float:
-    """
-    基于正负向关键词计算情绪得分，范围 -1 ~ 1。
-    保存到 news_raw 的 sentiment 字段。
-    """
-    if not text or not isinstance(text, str):
-        return 0.0
-    t = text.strip()
-    pos = sum(1 for k in POSITIVE_KEYWORDS if k in t)
-    neg = sum(1 for k in NEGATIVE_KEYWORDS if k in t)
-    total = pos + neg
-    if total == 0:
-        return 0.0
-    return round((pos - neg) / max(total, 1), 2)
-
 
 def _parse_pub_date(entry: Dict[str, Any]) -> Optional[datetime]:
     """解析 RSS 条目的发布时间"""
@@ -98,16 +89,177 @@ def _infer_source(url: str, feed_title: str) -> str:
     return "rss"
 
 
-async def _fetch_feed_sync(url: str) -> Dict[str, Any]:
-    """同步 fetch RSS（在线程池中执行，避免阻塞）"""
-    def _fetch():
+_feed_semaphore: Optional[asyncio.Semaphore] = None
+
+
+def _get_feed_semaphore() -> asyncio.Semaphore:
+    """进程内共享的 feed 并发上限（手动抓取与定时任务共同受限）"""
+    global _feed_semaphore
+    if _feed_semaphore is None:
+        _feed_semaphore = asyncio.Semaphore(max(1, settings.NEWS_FETCH_CONCURRENCY))
+    return _feed_semaphore
+
+
+async def _fetch_feed(db, url: str) -> Tuple[Dict[str, Any], Dict[str, Any], Optional[Dict[str, Any]]]:
+    """
+    并发受限地条件请求并解析单个 feed，返回 (feed, metrics, validators)。
+    304 或内容未变时不解析，feed 为空字典；超时或失败同样返回空字典，不影响其他 feed。
+    validators 为内容变化且解析成功时待保存的条件请求标识（见 RssFeedClient.commit）。
+    metrics: url, status(changed|not_modified|unchanged|timeout|error), fetch_ms, parse_ms, bytes, entries
+    """
+    timeout = float(settings.NEWS_FEED_TIMEOUT)
+    metrics: Dict[str, Any] = {"url": url, "status": "changed", "fetch_ms": None, "parse_ms": None, "bytes": 0, "entries": 0}
+    async with _get_feed_semaphore():
+        t0 = time.perf_counter()
         try:
-            return feedparser.parse(url)
+            status, raw, validators = await asyncio.wait_for(get_rss_client().fetch(db, url), timeout=timeout + 1)
+        except (asyncio.TimeoutError, httpx.TimeoutException):
+            metrics.update(status="timeout", fetch_ms=round((time.perf_counter() - t0) * 1000, 1))
+            return {}, metrics, None
         except Exception as e:
-            logger.warning("feedparser parse 失败 %s: %s", url, e)
-            return {}
-
-    return await asyncio.to_thread(_fetch)
+            metrics.update(status="error", error=str(e)[:200], fetch_ms=round((time.perf_counter() - t0) * 1000, 1))
+            return {}, metrics, None
+        metrics["fetch_ms"] = round((time.perf_counter() - t0) * 1000, 1)
+        metrics["status"] = status
+    if raw is None:
+        return {}, metrics, None
+    metrics["bytes"] = len(raw)
+
+    t1 = time.perf_counter()
+    try:
+        feed = await asyncio.to_thread(feedparser.parse, raw)
+    except Exception as e:
+        logger.warning("feedparser parse 失败 %s: %s", url, e)
+        feed, validators = {}, None
+        metrics.update(status="error", error=str(e)[:200])
+    metrics["parse_ms"] = round((time.perf_counter() - t1) * 1000, 1)
+    metrics["entries"] = len(feed.get("entries", [])) if feed else 0
+    return feed, metrics, validators
+
+
+# 唯一索引冲突（并发抓取写入同一 link）
+DUPLICATE_KEY_ERROR = 11000
+
+
+def dedupe_by_link(docs: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], int]:
+    """按 link 去重（保留首次出现），返回 (去重后列表, 重复条数)"""
+    seen: set = set()
+    unique: List[Dict[str, Any]] = []
+    for d in docs:
+        link = d.get("link")
+        if link in seen:
+            continue
+        seen.add(link)
+        unique.append(d)
+    return unique, len(docs) - len(unique)
+
+
+async def bulk_upsert_news(db, docs: List[Dict[str, Any]]) -> Dict[str, int]:
+    """
+    news_raw 批量 upsert：按 link 去重后一次无序 bulk_write。
+    created_at 与空 fund_code 仅在插入时写入；唯一索引冲突计为重复，其余写错误记日志。
+    写入前按实体词典标注 symbols（见 entity_linker）；新 link 按 SimHash 归簇（见 news_dedup），
+    near_duplicates 为其中判为近似重复的条数。
+    写入成功的条目按前后差异增量更新 news_sentiment_daily，新插入的条目发布到实时推送（见 news_hub）。
+    返回 received、inserted、modified、unchanged、duplicates、near_duplicates、errors。
+    """
+    unique, duplicates = dedupe_by_link(docs)
+    stats = {
+        "received": len(docs), "inserted": 0, "modified": 0, "unchanged": 0,
+        "duplicates": duplicates, "near_duplicates": 0, "errors": 0,
+    }
+    if not unique:
+        return stats
+
+    # 已存在条目的旧值，用于计算情绪日汇总的增量
+    existing = {
+        o["link"]: o
+        async for o in db[NEWS_COLLECTION].find(
+            {"link": {"$in": [d["link"] for d in unique]}},
+            {"_id": 0, "link": 1, "pub_date": 1, "fund_code": 1, "sentiment": 1},
+        )
+    }
+
+    await entity_linker.tag_docs(db, unique)
+    # 通用 feed 重新抓到已带基金标记的条目时保留原有 fund_code，symbols 同样要保留对应标签
+    for d in unique:
+        old_fc = (existing.get(d["link"]) or {}).get("fund_code")
+        if old_fc and not d.get("fund_code"):
+            tag = entity_linker.symbol_tag(old_fc, "fund")
+            if tag not in d[entity_linker.SYMBOLS_FIELD]:
+                d[entity_linker.SYMBOLS_FIELD] = sorted(d[entity_linker.SYMBOLS_FIELD] + [tag])
+
+    # 已存在的 link 只补写指纹、保留原有归簇；新 link 在滚动窗口内查找近似重复
+    for d in unique:
+        if d["link"] in existing:
+            news_dedup.fingerprint(d)
+    try:
+        stats["near_duplicates"] = await news_dedup.assign_clusters(db, [d for d in unique if d["link"] not in existing])
+    except Exception as e:
+        logger.warning("news_raw 近似去重失败: %s", e)
+
+    ops = []
+    # 预分配 _id：按 upserted 的 _id 判断哪些条目由本批插入（不依赖结果中的操作下标）
+    new_ids = [ObjectId() for _ in unique]
+    for d, new_id in zip(unique, new_ids):
+        fields = {k: v for k, v in d.items() if k != "created_at"}
+        on_insert: Dict[str, Any] = {"_id": new_id, "created_at": d.get("created_at") or datetime.utcnow()}
+        # 通用 feed 的条目不覆盖已有的基金标记
+        if fields.get("fund_code") is None:
+            on_insert["fund_code"] = fields.pop("fund_code", None)
+        ops.append(UpdateOne({"link": d["link"]}, {"$set": fields, "$setOnInsert": on_insert}, upsert=True))
+    try:
+        result = await db[NEWS_COLLECTION].bulk_write(ops, ordered=False)
+        details = result.bulk_api_result
+    except BulkWriteError as e:
+        details = e.details
+        for err in details.get("writeErrors", []):
+            if err.get("code") == DUPLICATE_KEY_ERROR:
+                stats["duplicates"] += 1
+            else:
+                stats["errors"] += 1
+                logger.debug("news_raw 写入失败 %s: %s", str(err.get("op", {}))[:80], err.get("errmsg"))
+    stats["inserted"] = int(details.get("nUpserted", 0))
+    stats["modified"] = int(details.get("nModified", 0))
+    stats["unchanged"] = max(int(details.get("nMatched", 0)) - stats["modified"], 0)
+    if stats["inserted"]:
+        count_cache.invalidate(NEWS_COLLECTION)
+
+    failed = {err.get("index") for err in details.get("writeErrors", [])}
+    upserted = {u.get("_id") for u in details.get("upserted", [])}
+    changes = []
+    inserted_docs = []
+    for i, (d, new_id) in enumerate(zip(unique, new_ids)):
+        inserted = new_id in upserted
+        old = None if inserted else existing.get(d["link"])
+        if i in failed or (not inserted and old is None):
+            continue  # 写入失败，或写入前不存在但由并发写入插入（由对方计入）
+        if inserted:
+            # 带上 _id：实时推送以文档 ObjectId 作为事件 id
+            inserted_docs.append({**d, "_id": new_id})
+        new = {"pub_date": d.get("pub_date"), "sentiment": d.get("sentiment"), "fund_code": d.get("fund_code") or (old or {}).get("fund_code")}
+        changes.append((old, new))
+    try:
+        await news_rollup.apply_changes(db, changes)
+    except Exception as e:
+        logger.warning("news_sentiment_daily 增量更新失败: %s", e)
+    await news_dedup.apply_dup_counts(db, inserted_docs)
+    publish_news(inserted_docs)
+    return stats
+
+
+def tag_fund_codes(docs: List[Dict[str, Any]], fund_codes: List[str]) -> None:
+    """通用 feed 条目：标题或摘要中出现关注基金代码时标记为该基金（取首个匹配）"""
+    if not fund_codes:
+        return
+    for d in docs:
+        if d.get("fund_code"):
+            continue
+        text = f"{d.get('title') or ''} {d.get('content_summary') or ''}"
+        for fc in fund_codes:
+            if fc in text:
+                d["fund_code"] = fc
+                break
 
 
 class NewsFetchService:
@@ -117,6 +269,10 @@ class NewsFetchService:
         self._feed_urls = [
             u.strip() for u in (settings.NEWS_FEED_URLS or "").split(",") if u.strip()
         ]
+        # 每个 feed 最近一次抓取的耗时指标
+        self.last_metrics: Dict[str, Dict[str, Any]] = {}
+        # 最近一次批量写入统计（见 bulk_upsert_news）
+        self.last_write: Dict[str, int] = {}
 
     def _get_feed_urls(self, fund_code: Optional[str] = None) -> List[str]:
         """获取要抓取的 feed URL 列表，支持 {fund_code} 占位符"""
@@ -139,74 +295,176 @@ class NewsFetchService:
         fund_code: 可选，筛选或标记的基金代码
         days: 仅保留最近 N 天的新闻（按 pub_date 过滤）
         """
+        news, _ = await self.ingest(db, fund_code=fund_code, days=days)
+        return news
+
+    async def ingest(
+        self,
+        db,
+        fund_code: Optional[str] = None,
+        days: int = 3,
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+        """并发抓取各 feed，汇总后按 link 去重一次 bulk_write，返回 (新闻列表, 写入统计)"""
         urls = self._get_feed_urls(fund_code)
         if not urls:
             logger.warning("未配置 NEWS_FEED_URLS，跳过抓取")
-            return []
+            return [], {}
 
         cutoff = datetime.utcnow() - timedelta(days=max(1, days))
-        all_news: List[Dict[str, Any]] = []
+        pending: Dict[str, Dict[str, Any]] = {}
+        results = await asyncio.gather(*(self._fetch_feed_docs(db, url, fund_code, cutoff, pending=pending) for url in urls))
+        docs: List[Dict[str, Any]] = []
+        for items in results:
+            docs.extend(items)
+
+        stats = await self._write_and_commit(db, docs, pending)
+        self.last_write = stats
+        logger.info(
+            "news_raw bulk_write fund_code=%s received=%d inserted=%d modified=%d duplicates=%d errors=%d",
+            fund_code or "-", stats["received"], stats["inserted"], stats["modified"], stats["duplicates"], stats["errors"],
+        )
+        news, _ = dedupe_by_link(docs)
+        return news, stats
+
+    @staticmethod
+    async def _write_and_commit(db, docs: List[Dict[str, Any]], pending: Dict[str, Dict[str, Any]]) -> Dict[str, int]:
+        """批量写入；全部写入成功才保存各 feed 的 validators，否则下次重新下载这些 feed"""
+        try:
+            stats = await bulk_upsert_news(db, docs)
+        except Exception as e:
+            logger.warning("news_raw 批量写入失败: %s", e)
+            return {"received": len(docs), "inserted": 0, "modified": 0, "unchanged": 0, "duplicates": 0, "errors": len(docs)}
+        if not stats.get("errors"):
+            await get_rss_client().commit(db, pending)
+        return stats
 
-        for url in urls:
-            try:
-                feed = await _fetch_feed_sync(url)
-                if not feed or "entries" not in feed:
+    def plan_cycle(self, fund_codes: List[str]) -> Dict[str, Optional[str]]:
+        """
+        一轮采集的去重 URL 计划：url -> 所属基金代码（通用 feed 为 None）。
+        含 {fund_code} 的模板按基金展开并排在前面，使同一 link 去重时保留基金标记。
+        """
+        plan: Dict[str, Optional[str]] = {}
+        for u in self._feed_urls:
+            if "{fund_code}" in u:
+                for fc in fund_codes:
+                    plan.setdefault(u.replace("{fund_code}", fc.strip()), fc.strip())
+        for u in self._feed_urls:
+            if "{fund_code}" not in u:
+                plan.setdefault(u, None)
+        return plan
+
+    async def ingest_cycle(
+        self,
+        db,
+        fund_codes: List[str],
+        days: int = 3,
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+        """
+        定时采集：每个不同 URL 本轮只抓取一次，再按来源 feed 或正文中出现的基金代码打标，
+        整轮一次 bulk_write。请求量与 feed 数成正比，而非基金数 × feed 数。
+        """
+        fund_codes = [fc.strip() for fc in fund_codes if fc and fc.strip()]
+        plan = self.plan_cycle(fund_codes)
+        if not plan:
+            logger.warning("未配置 NEWS_FEED_URLS，跳过抓取")
+            return [], {}
+
+        cutoff = datetime.utcnow() - timedelta(days=max(1, days))
+        pending: Dict[str, Dict[str, Any]] = {}
+        results = await asyncio.gather(*(self._fetch_feed_docs(db, url, fc, cutoff, pending=pending) for url, fc in plan.items()))
+        docs: List[Dict[str, Any]] = []
+        for items in results:
+            docs.extend(items)
+        tag_fund_codes(docs, fund_codes)
+
+        stats = await self._write_and_commit(db, docs, pending)
+        stats["feeds"] = len(plan)
+        self.last_write = stats
+        news, _ = dedupe_by_link(docs)
+        return news, stats
+
+    async def _fetch_feed_docs(
+        self,
+        db,
+        url: str,
+        fund_code: Optional[str],
+        cutoff: datetime,
+        enrich: bool = True,
+        pending: Optional[Dict[str, Dict[str, Any]]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        抓取并解析单个 feed，返回待写入 news_raw 的文档；记录抓取/解析耗时。
+        enrich=False 时不写检索词、不打情绪分（由采集管道的后续阶段处理）。
+        pending 收集本 feed 待保存的 validators，调用方在条目写入成功后提交（见 RssFeedClient.commit）。
+        """
+        news: List[Dict[str, Any]] = []
+        try:
+            feed, metrics, validators = await _fetch_feed(db, url)
+            self.last_metrics[url] = metrics
+            logger.info(
+                "rss_feed url=%s status=%s fetch_ms=%s parse_ms=%s bytes=%d entries=%d",
+                url, metrics["status"], metrics["fetch_ms"], metrics["parse_ms"], metrics["bytes"], metrics["entries"],
+            )
+            if not feed or "entries" not in feed:
+                return news
+
+            feed_title = feed.get("feed", {}).get("title", "") or url
+            source = _infer_source(url, feed_title)
+            now = datetime.utcnow()
+
+            for entry in feed.get("entries", []):
+                pub_dt = _parse_pub_date(entry)
+                if pub_dt and pub_dt.replace(tzinfo=None) < cutoff:
+                    continue
+
+                title = _extract_title(entry)
+                link = _extract_link(entry)
+                if not title and not link:
                     continue
 
-                feed_title = feed.get("feed", {}).get("title", "") or url
-                source = _infer_source(url, feed_title)
-
-                for entry in feed.get("entries", []):
-                    pub_dt = _parse_pub_date(entry)
-                    if pub_dt and pub_dt.replace(tzinfo=None) < cutoff:
-                        continue
-
-                    title = _extract_title(entry)
-                    link = _extract_link(entry)
-                    if not title and not link:
-                        continue
-
-                    content_summary = _extract_summary(entry)
-                    text_for_sentiment = f"{title} {content_summary}"
-                    doc = {
-                        "title": title,
-                        "link": link,
-                        "pub_date": pub_dt,
-                        "source": source,
-                        "content_summary": content_summary,
-                        "fund_code": (fund_code or "").strip() or None,
-                        "created_at": datetime.utcnow(),
-                        "sentiment": _compute_sentiment(text_for_sentiment),
-                    }
-
-                    all_news.append(doc)
-
-                    try:
-                        await db[NEWS_COLLECTION].update_one(
-                            {"link": link},
-                            {"$set": doc},
-                            upsert=True,
-                        )
-                    except Exception as e:
-                        logger.debug("news_raw insert 跳过 %s: %s", link[:80], e)
-
-            except Exception as e:
-                logger.warning("抓取 RSS 失败 %s: %s", url, e)
-
-        return all_news
+                content_summary = _extract_summary(entry)
+                news.append({
+                    "title": title,
+                    "link": link,
+                    "pub_date": pub_dt,
+                    "source": source,
+                    "content_summary": content_summary,
+                    "fund_code": (fund_code or "").strip() or None,
+                    "created_at": now,
+                })
+            if not enrich:
+                if validators and pending is not None:
+                    pending[url] = validators
+                return news
+
+            for d in news:
+                d[SEARCH_FIELD] = build_search_terms(d["title"], d["content_summary"])
+            # 整个 feed 一次批量打分，写入 news_raw 的 sentiment 字段
+            scores = score_batch([f"{d['title']} {d['content_summary']}" for d in news])
+            for d, s in zip(news, scores):
+                d["sentiment"] = s
+            if validators and pending is not None:
+                pending[url] = validators
+
+        except Exception as e:
+            logger.warning("抓取 RSS 失败 %s: %s", url, e)
+        return news
 
     async def get_news(
         self,
         db,
         fund_code: Optional[str] = None,
         days: int = 3,
+        collapse: bool = False,
     ) -> List[Dict[str, Any]]:
         """
         从 news_raw 查询新闻，按时间倒序
-        若 fund_code 为空则返回通用财经新闻
+        若 fund_code 为空则返回通用财经新闻；collapse 时只返回近似重复簇的规范条目
         """
         cutoff = datetime.utcnow() - timedelta(days=max(1, days))
         query: Dict[str, Any] = {"pub_date": {"$gte": cutoff}}
+        if collapse:
+            query.update(news_dedup.COLLAPSE_FILTER)
 
         if fund_code and fund_code.strip():
             fc = fund_code.strip()
@@ -216,7 +474,7 @@ class NewsFetchService:
                 {"fund_code": {"$exists": False}},
             ]
 
-        cursor = db[NEWS_COLLECTION].find(query).sort("pub_date", -1).limit(500)
+        cursor = db[NEWS_COLLECTION].find(query, {SEARCH_FIELD: 0, **news_dedup.FINGERPRINT_PROJECTION}).sort("pub_date", -1).limit(500)
         docs = await cursor.to_list(length=500)
 
         out = []
@@ -238,16 +496,25 @@ class NewsFetchService:
         page: int = 1,
         limit: int = 20,
         sort: Optional[List[tuple]] = None,
-    ) -> tuple[List[Dict[str, Any]], int]:
+        cursor: Optional[str] = None,
+        collapse: bool = False,
+        symbols: Optional[List[str]] = None,
+    ) -> Tuple[List[Dict[str, Any]], int, Optional[str]]:
         """
-        分页查询 news_raw，支持 keyword 全文搜索
-        sort: [(field, direction)] 如 [("pub_date", -1)]、[("sentiment", 1)]
-        返回 (items, total_count)，items 已格式化（去除 _id，日期转字符串）
+        游标分页查询 news_raw，支持 keyword 检索（search_terms 索引，见 news_search）
+        sort: [(field, direction)] 如 [("pub_date", -1)]、[("sentiment", 1)]，按 (field, _id) 定位下一页
+        cursor: 上一页返回的 next_cursor；缺省时按 page 定位（兼容旧参数）
+        collapse: 只返回近似重复簇的规范条目（重复数见 dup_count）
+        symbols: 只返回提及任一标的的新闻（标签见 entity_linker），给出时忽略 fund_code
+        返回 (items, total, next_cursor)，items 已格式化（去除 _id，日期转字符串），total 来自计数缓存
         """
-        cutoff = datetime.utcnow() - timedelta(days=max(1, days))
+        # 截断到分钟，使同一分钟内的查询共享计数缓存
+        cutoff = (datetime.utcnow() - timedelta(days=max(1, days))).replace(second=0, microsecond=0)
         conditions: List[Dict[str, Any]] = [{"pub_date": {"$gte": cutoff}}]
 
-        if fund_code and fund_code.strip():
+        if symbols is not None:
+            conditions.append({entity_linker.SYMBOLS_FIELD: {"$in": symbols}})
+        elif fund_code and fund_code.strip():
             fc = fund_code.strip()
             conditions.append({
                 "$or": [
@@ -258,18 +525,25 @@ class NewsFetchService:
             })
 
         if keyword and keyword.strip():
-            kw = keyword.strip()
-            escaped = re.escape(kw)
-            regex = {"$regex": escaped, "$options": "i"}
-            conditions.append({"$or": [{"title": regex}, {"content_summary": regex}]})
+            conditions.append(keyword_filter(keyword))
+
+        if collapse:
+            conditions.append(news_dedup.COLLAPSE_FILTER)
 
         query = {"$and": conditions} if len(conditions) > 1 else conditions[0]
 
-        sort_spec = sort if sort and isinstance(sort, list) and len(sort) > 0 else [("pub_date", -1)]
-        total = await db[NEWS_COLLECTION].count_documents(query)
-        skip = max(0, (page - 1) * limit)
-        cursor = db[NEWS_COLLECTION].find(query).sort(sort_spec).skip(skip).limit(limit)
-        docs = await cursor.to_list(length=limit)
+        sort_spec = sort[0] if sort and isinstance(sort, list) and len(sort) > 0 else ("pub_date", -1)
+        coll = db[NEWS_COLLECTION]
+        total = await count_cache.count(coll, query)
+        docs, next_cursor = await keyset_page(
+            coll,
+            query,
+            sort_spec,
+            limit,
+            cursor=cursor,
+            projection={SEARCH_FIELD: 0, **news_dedup.FINGERPRINT_PROJECTION},
+            skip=max(0, (page - 1) * limit),
+        )
 
         out = []
         for d in docs:
@@ -280,4 +554,15 @@ class NewsFetchService:
             if d.get("created_at") and hasattr(d["created_at"], "isoformat"):
                 d["created_at"] = d["created_at"].isoformat()
             out.append(d)
-        return out, total
+        return out, total, next_cursor
+
+
+_service: Optional[NewsFetchService] = None
+
+
+def get_news_fetch_service() -> NewsFetchService:
+    """进程内共享的新闻抓取服务（路由、定时任务与采集管道共用 feed 指标与写入统计）"""
+    global _service
+    if _service is None:
+        _service = NewsFetchService()
+    return _service
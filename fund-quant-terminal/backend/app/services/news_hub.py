@@ -0,0 +1,233 @@
+# =====================================================
+# 新闻实时推送 pub/sub
+# news_raw 写入路径（bulk_upsert_news）把新插入的条目发布到进程内 NewsHub，
+# 每条只序列化一次，按来源分桶找到候选订阅者后过滤 fund_code、|sentiment| 并放入各自的有界队列；
+# SSE 连接只读自己的队列，不查询 Mongo。慢客户端队列满时丢弃最旧事件并计数，不阻塞发布方。
+# 事件 id 为 news_raw 文档的 ObjectId，各 worker、重启前后一致；最近 NEWS_STREAM_REPLAY 条事件保留在环形缓冲，
+# 断线重连时按 Last-Event-ID 补发：缓冲中找到该 id 时补发其后的事件，否则（已滚出缓冲或连到其他 worker）补发 ObjectId 更大的事件。
+# 多 worker 部署时各进程的 NewsHub 互不相通：NEWS_STREAM_CHANGE_FEED 开启且 MongoDB 为副本集时，
+# 每个进程订阅 news_raw 的插入 change stream 作为事件来源，任一进程（如 leader 上的快讯轮询）写入的新闻都推送到全部连接；
+# 不支持 change stream（单机 mongod）时退化为写入进程内发布，此时 SSE 需单 worker 部署
+# =====================================================
+
+import asyncio
+import json
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+from bson import ObjectId
+from pymongo.errors import OperationFailure
+
+from app.config import settings
+from app.utils.logger import logger
+
+NEWS_COLLECTION = "news_raw"
+# change stream 中断后的重连间隔（秒）
+FEED_RETRY_SECONDS = 5.0
+
+# 推送给客户端的字段
+EVENT_FIELDS = ("title", "link", "pub_date", "source", "content_summary", "fund_code", "symbols", "sentiment", "dup_of")
+
+
+class StreamFilter:
+    """订阅过滤条件：来源、基金代码（来源 fund_code 或实体标签 fund:<代码>）、最小 |sentiment|"""
+
+    def __init__(self, source: Optional[str] = None, fund_code: Optional[str] = None, min_abs_sentiment: float = 0.0) -> None:
+        self.source = (source or "").strip() or None
+        self.fund_code = (fund_code or "").strip() or None
+        self.min_abs_sentiment = max(0.0, float(min_abs_sentiment or 0.0))
+
+    def match(self, item: Dict[str, Any]) -> bool:
+        if self.source and item.get("source") != self.source:
+            return False
+        if self.fund_code and item.get("fund_code") != self.fund_code and f"fund:{self.fund_code}" not in (item.get("symbols") or ()):
+            return False
+        if self.min_abs_sentiment and abs(float(item.get("sentiment") or 0.0)) < self.min_abs_sentiment:
+            return False
+        return True
+
+
+class Subscription:
+    """单个客户端：过滤条件 + 有界事件队列（元素为 (事件 id, 已序列化数据)）"""
+
+    def __init__(self, flt: StreamFilter, maxsize: int) -> None:
+        self.filter = flt
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def offer(self, event: Tuple[str, str]) -> None:
+        """非阻塞入队；队列满时丢弃最旧事件"""
+        if self.queue.full():
+            try:
+                self.queue.get_nowait()
+                self.dropped += 1
+            except asyncio.QueueEmpty:
+                pass
+        self.queue.put_nowait(event)
+
+
+def _to_event(doc: Dict[str, Any]) -> Dict[str, Any]:
+    item = {k: doc.get(k) for k in EVENT_FIELDS}
+    if isinstance(item.get("pub_date"), datetime):
+        item["pub_date"] = item["pub_date"].isoformat()
+    return item
+
+
+class NewsHub:
+    """进程内新闻发布/订阅中心"""
+
+    def __init__(self, queue_size: Optional[int] = None, replay: Optional[int] = None) -> None:
+        self._queue_size = max(1, queue_size or settings.NEWS_STREAM_QUEUE_SIZE)
+        # 来源 -> 订阅者；None 桶为不限来源的订阅
+        self._by_source: Dict[Optional[str], Set[Subscription]] = {}
+        # (文档 ObjectId, 过滤用条目, 已序列化数据)
+        self._replay: Deque[Tuple[ObjectId, Dict[str, Any], str]] = deque(maxlen=max(0, replay if replay is not None else settings.NEWS_STREAM_REPLAY))
+        self._last_id: Optional[ObjectId] = None
+        self.published = 0
+        self.delivered = 0
+        # 已断开连接累计的丢弃数
+        self._dropped_closed = 0
+
+    def subscribe(self, flt: StreamFilter, last_event_id: Optional[ObjectId] = None) -> Subscription:
+        """注册订阅；last_event_id 给出时从环形缓冲补发之后的匹配事件"""
+        sub = Subscription(flt, self._queue_size)
+        self._by_source.setdefault(flt.source, set()).add(sub)
+        if last_event_id is not None:
+            for oid, item, data in self._events_after(last_event_id):
+                if flt.match(item):
+                    sub.offer((str(oid), data))
+        return sub
+
+    def _events_after(self, last_id: ObjectId) -> List[Tuple[ObjectId, Dict[str, Any], str]]:
+        """
+        缓冲中有 last_id 时取其后的事件（change stream 下各进程缓冲同为 oplog 顺序，补发不遗漏）；
+        否则按 ObjectId 比较（生成时间先后，同一秒内跨进程的顺序不保证）
+        """
+        events = list(self._replay)
+        for i, (oid, _, _) in enumerate(events):
+            if oid == last_id:
+                return events[i + 1:]
+        return [e for e in events if e[0] > last_id]
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        bucket = self._by_source.get(sub.filter.source)
+        if bucket is not None and sub in bucket:
+            bucket.remove(sub)
+            self._dropped_closed += sub.dropped
+            if not bucket:
+                self._by_source.pop(sub.filter.source, None)
+
+    def publish(self, docs: Iterable[Dict[str, Any]]) -> int:
+        """发布新条目，返回投递次数；每条只序列化一次"""
+        delivered = 0
+        for doc in docs:
+            item = _to_event(doc)
+            oid = doc.get("_id") if isinstance(doc.get("_id"), ObjectId) else ObjectId()
+            data = json.dumps(item, ensure_ascii=False, default=str)
+            self._replay.append((oid, item, data))
+            self._last_id = oid
+            self.published += 1
+            event = (str(oid), data)
+            source = item.get("source")
+            for key in ((source, None) if source else (None,)):
+                for sub in self._by_source.get(key, ()):
+                    if sub.filter.match(item):
+                        sub.offer(event)
+                        delivered += 1
+        self.delivered += delivered
+        return delivered
+
+    def stats(self) -> Dict[str, Any]:
+        subs: List[Subscription] = [s for bucket in self._by_source.values() for s in bucket]
+        return {
+            "subscribers": len(subs),
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped": self._dropped_closed + sum(s.dropped for s in subs),
+            "last_event_id": str(self._last_id) if self._last_id else None,
+            "replay_buffer": len(self._replay),
+        }
+
+
+_hub: Optional[NewsHub] = None
+
+
+def get_news_hub() -> NewsHub:
+    """进程内共享的推送中心"""
+    global _hub
+    if _hub is None:
+        _hub = NewsHub()
+    return _hub
+
+
+class ChangeStreamFeed:
+    """news_raw 插入事件 -> 本进程 NewsHub；active 时写入路径不再直接发布，避免重复推送"""
+
+    def __init__(self) -> None:
+        self.active = False
+        self.supported: Optional[bool] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self, db) -> None:
+        if self._task is not None and not self._task.done():
+            return
+        self._task = asyncio.create_task(self._run(db), name="news_hub:change_stream")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        self.active = False
+
+    async def _run(self, db) -> None:
+        resume_token = None
+        pipeline = [{"$match": {"operationType": "insert"}}]
+        while True:
+            try:
+                async with db[NEWS_COLLECTION].watch(pipeline, resume_after=resume_token) as stream:
+                    self.active = self.supported = True
+                    logger.info("news_hub 已订阅 news_raw change stream")
+                    async for change in stream:
+                        resume_token = stream.resume_token
+                        get_news_hub().publish([change.get("fullDocument") or {}])
+            except asyncio.CancelledError:
+                raise
+            except OperationFailure as e:
+                if not self.supported:
+                    # 单机 mongod 不支持 change stream：退化为进程内发布
+                    self.supported = False
+                    logger.warning("news_hub change stream 不可用，仅推送本进程写入的新闻（SSE 需单 worker 部署）: %s", e)
+                    return
+                # resume token 可能已超出 oplog 范围，从当前位置重新订阅
+                resume_token = None
+                logger.warning("news_hub change stream 中断，%.0fs 后重连: %s", FEED_RETRY_SECONDS, e)
+            except Exception as e:
+                logger.warning("news_hub change stream 中断，%.0fs 后重连: %s", FEED_RETRY_SECONDS, e)
+            # 中断期间由写入路径直接发布（重连后按 resume token 补齐时可能重复推送少量条目）
+            self.active = False
+            await asyncio.sleep(FEED_RETRY_SECONDS)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"enabled": settings.NEWS_STREAM_CHANGE_FEED, "supported": self.supported, "active": self.active}
+
+
+_feed: Optional[ChangeStreamFeed] = None
+
+
+def get_change_feed() -> ChangeStreamFeed:
+    global _feed
+    if _feed is None:
+        _feed = ChangeStreamFeed()
+    return _feed
+
+
+def publish_news(docs: List[Dict[str, Any]]) -> None:
+    """写入路径调用：change stream 生效时由其发布；发布失败只记日志，不影响写入"""
+    if not docs or (_feed is not None and _feed.active):
+        return
+    try:
+        get_news_hub().publish(docs)
+    except Exception as e:
+        logger.warning("news_hub 发布失败: %s", e)
@@ -0,0 +1,534 @@
+# =====================================================
+# 新闻统一采集管道
+# 每个来源（RSS、华尔街见闻、东方财富、财联社、新浪）是一个小适配器，条目经有界队列串联的分阶段 worker：
+#   fetch -> normalize -> dedupe -> score -> enrich -> write
+# 统一规整为 news_raw 文档，情绪与检索词只在管道内计算一次，按批 bulk_upsert_news 写入（写入时按 SimHash 归簇）。
+# 队列满时上游 put 阻塞形成背压，单一来源突发大量条目时内存占用仍以队列容量为上限
+# =====================================================
+
+import abc
+import asyncio
+import contextlib
+import hashlib
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.services.cailianshe_service import SOURCE_CAILIANSHERSS, CailiansheService
+from app.services.eastmoney_service import SOURCE_EASTMONEY, EastMoneyService
+from app.services.news_fetch import NewsFetchService, bulk_upsert_news, get_news_fetch_service, tag_fund_codes
+from app.services.news_search import SEARCH_FIELD, build_search_terms
+from app.services.rss_client import get_rss_client
+from app.services.sentiment import score_batch
+from app.services.sina_service import SOURCE_SINA, SinaService
+from app.services.wallstreetcn_service import SOURCE_WALLSTREETCN, WallStreetCNService
+from app.utils.logger import logger
+
+SOURCE_RSS = "rss"
+STAGES = ("fetch", "normalize", "dedupe", "score", "enrich", "write")
+
+# 队列结束标记：上游全部完成后逐级向下传递
+_DONE = object()
+
+
+class PipelineContext:
+    """单次运行的参数：数据库、关注基金、时间下限与每源条数"""
+
+    def __init__(self, db, fund_codes: List[str], days: int, limit: int) -> None:
+        self.db = db
+        self.fund_codes = fund_codes
+        self.cutoff = datetime.utcnow() - timedelta(days=max(1, days))
+        self.limit = limit
+        # RSS feed 待保存的 validators：整轮写入无错误时才提交
+        self.feed_validators: Dict[str, Dict[str, Any]] = {}
+
+
+# ---------- 来源适配器 ----------
+
+
+def _parse_published(value: Any) -> Optional[datetime]:
+    """各来源 published_time（ISO 字符串，可能带时区）-> UTC naive datetime"""
+    if isinstance(value, datetime):
+        dt = value
+    elif value:
+        try:
+            dt = datetime.fromisoformat(str(value).strip().replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    else:
+        return None
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
+
+
+def normalize_parsed(item: Dict[str, Any], source: str) -> Optional[Dict[str, Any]]:
+    """
+    快讯类来源的统一解析结果 {title, published_time, summary, url} -> news_raw 文档。
+    无 url 的快讯以 来源:标题+时间 的摘要作为 link，保证重复抓取时仍能按 link 去重。
+    """
+    title = str(item.get("title") or "").strip()
+    summary = str(item.get("summary") or "")[:500]
+    url = str(item.get("url") or "").strip()
+    if not title and not url:
+        return None
+    published = item.get("published_time")
+    if not url:
+        digest = hashlib.sha1(f"{title}|{published or ''}".encode("utf-8")).hexdigest()
+        url = f"{source}:{digest}"
+    return {
+        "title": title,
+        "link": url,
+        "pub_date": _parse_published(published),
+        "source": source,
+        "content_summary": summary,
+        "fund_code": None,
+        "created_at": datetime.utcnow(),
+    }
+
+
+class SourceAdapter(abc.ABC):
+    """来源适配器：fetch 逐批产出原始条目，normalize 将单条转为 news_raw 文档（None 表示丢弃）"""
+
+    name = ""
+
+    @abc.abstractmethod
+    def fetch(self, ctx: PipelineContext) -> AsyncIterator[List[Any]]:
+        """逐批产出原始条目（子类以 async 生成器实现）"""
+
+    def normalize(self, item: Any) -> Optional[Dict[str, Any]]:
+        return normalize_parsed(item, self.name)
+
+
+class RssAdapter(SourceAdapter):
+    """NEWS_FEED_URLS 中的 RSS feed：按本轮基金展开去重 URL，每个 feed 完成即产出一批"""
+
+    name = SOURCE_RSS
+
+    def __init__(self, service: NewsFetchService) -> None:
+        self._service = service
+
+    async def fetch(self, ctx: PipelineContext) -> AsyncIterator[List[Any]]:
+        """
+        同时在途的 feed 不超过 NEWS_FETCH_CONCURRENCY（与 feed 信号量一致）：已完成的一批被下游取走后才开始下一个 feed，
+        fetch 队列满时下载与解析随之暂停；生成器关闭（取消或异常）时取消仍在途的任务
+        """
+        plan = iter(self._service.plan_cycle(ctx.fund_codes).items())
+        limit = max(1, settings.NEWS_FETCH_CONCURRENCY)
+        running: set = set()
+
+        def start_next() -> None:
+            for url, fc in plan:
+                running.add(asyncio.create_task(
+                    self._service._fetch_feed_docs(ctx.db, url, fc, ctx.cutoff, enrich=False, pending=ctx.feed_validators)
+                ))
+                return
+
+        try:
+            for _ in range(limit):
+                start_next()
+            while running:
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    running.discard(task)
+                    yield task.result()
+                    start_next()
+        finally:
+            for task in running:
+                task.cancel()
+            await asyncio.gather(*running, return_exceptions=True)
+
+    def normalize(self, item: Any) -> Optional[Dict[str, Any]]:
+        return item  # _fetch_feed_docs 已产出 news_raw 文档
+
+
+class WallStreetCNAdapter(SourceAdapter):
+    """华尔街见闻快讯"""
+
+    name = SOURCE_WALLSTREETCN
+
+    def __init__(self, channel: str = "global-channel") -> None:
+        self._service = WallStreetCNService()
+        self._channel = channel
+
+    async def fetch(self, ctx: PipelineContext) -> AsyncIterator[List[Any]]:
+        _, parsed = await self._service.fetch_and_parse("lives", limit=ctx.limit, channel=self._channel, score=False)
+        yield parsed
+
+
+class EastMoneyAdapter(SourceAdapter):
+    """东方财富 7*24 直播"""
+
+    name = SOURCE_EASTMONEY
+
+    def __init__(self) -> None:
+        self._service = EastMoneyService()
+
+    async def fetch(self, ctx: PipelineContext) -> AsyncIterator[List[Any]]:
+        _, parsed = await self._service.fetch_and_parse(limit=ctx.limit, score=False)
+        yield parsed
+
+
+class CailiansheAdapter(SourceAdapter):
+    """财联社电报"""
+
+    name = SOURCE_CAILIANSHERSS
+
+    def __init__(self, category: str = "") -> None:
+        self._service = CailiansheService()
+        self._category = category
+
+    async def fetch(self, ctx: PipelineContext) -> AsyncIterator[List[Any]]:
+        _, parsed = await self._service.fetch_and_parse(category=self._category, limit=ctx.limit, score=False)
+        yield parsed
+
+
+class SinaAdapter(SourceAdapter):
+    """新浪财经快讯（实际数据同东方财富快讯，按 link 与东方财富条目去重）"""
+
+    name = SOURCE_SINA
+
+    def __init__(self, category: str = "macro") -> None:
+        self._service = SinaService()
+        self._category = category
+
+    async def fetch(self, ctx: PipelineContext) -> AsyncIterator[List[Any]]:
+        _, parsed = await self._service.fetch_and_parse(category=self._category, limit=ctx.limit, score=False)
+        yield parsed
+
+
+ADAPTERS: Dict[str, Callable[[], SourceAdapter]] = {
+    SOURCE_RSS: lambda: RssAdapter(get_news_fetch_service()),
+    SOURCE_WALLSTREETCN: WallStreetCNAdapter,
+    SOURCE_EASTMONEY: EastMoneyAdapter,
+    SOURCE_CAILIANSHERSS: CailiansheAdapter,
+    SOURCE_SINA: SinaAdapter,
+}
+
+
+def build_adapters(names: Optional[List[str]] = None) -> List[SourceAdapter]:
+    """按来源名构建适配器；names 为空时读取 NEWS_PIPELINE_SOURCES。未知来源抛 ValueError"""
+    if names is None:
+        names = [n.strip() for n in (settings.NEWS_PIPELINE_SOURCES or "").split(",") if n.strip()]
+    unknown = [n for n in names if n not in ADAPTERS]
+    if unknown:
+        raise ValueError(f"未知新闻来源: {', '.join(unknown)}，可选 {', '.join(ADAPTERS)}")
+    return [ADAPTERS[n]() for n in dict.fromkeys(names)]
+
+
+# ---------- 阶段处理 ----------
+
+
+def score_docs(docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """score 阶段：标题 + 摘要整批一次打分，写入 sentiment（原地修改并返回）"""
+    scores = score_batch([f"{d['title']} {d['content_summary']}" for d in docs])
+    for d, s in zip(docs, scores):
+        d["sentiment"] = s
+    return docs
+
+
+def enrich_docs(docs: List[Dict[str, Any]], fund_codes: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """enrich 阶段：检索词 + 关注基金打标（原地修改并返回）"""
+    for d in docs:
+        d[SEARCH_FIELD] = build_search_terms(d["title"], d["content_summary"])
+    tag_fund_codes(docs, fund_codes or [])
+    return docs
+
+
+async def ingest_docs(db, docs: List[Dict[str, Any]], fund_codes: Optional[List[str]] = None) -> Dict[str, int]:
+    """
+    已规整的少量文档直接走 score -> enrich -> write（不经队列），供快讯增量轮询等高频小批量写入。
+    返回 bulk_upsert_news 的写入统计
+    """
+    if not docs:
+        return {}
+    enrich_docs(score_docs(docs), fund_codes)
+    return await bulk_upsert_news(db, docs)
+
+
+async def ingest_parsed(db, items: List[Dict[str, Any]], source: str) -> Dict[str, int]:
+    """快讯类来源的解析结果规整后经 ingest_docs 写入 news_raw（各来源 /test 接口的保存路径）"""
+    docs = [d for d in (normalize_parsed(it, source) for it in items or []) if d]
+    return await ingest_docs(db, docs)
+
+
+# ---------- 阶段指标 ----------
+
+
+class StageMetrics:
+    """单个阶段的累计计数：输入/输出/丢弃条数、批次数与处理耗时，以及输出队列的峰值深度"""
+
+    def __init__(self, name: str, queue: Optional[asyncio.Queue]) -> None:
+        self.name = name
+        self.queue = queue
+        self.items_in = 0
+        self.items_out = 0
+        self.dropped = 0
+        self.batches = 0
+        self.busy_s = 0.0
+        self.peak_depth = 0
+
+    def observe_queue(self) -> None:
+        if self.queue is not None:
+            self.peak_depth = max(self.peak_depth, self.queue.qsize())
+
+    def snapshot(self, elapsed: float) -> Dict[str, Any]:
+        """throughput 为输出条数 / 运行时长；queue_* 描述本阶段的输出队列"""
+        return {
+            "stage": self.name,
+            "in": self.items_in,
+            "out": self.items_out,
+            "dropped": self.dropped,
+            "batches": self.batches,
+            "busy_ms": round(self.busy_s * 1000, 1),
+            "throughput_per_s": round(self.items_out / elapsed, 1) if elapsed > 0 else 0.0,
+            "queue_depth": self.queue.qsize() if self.queue is not None else None,
+            "queue_peak": self.peak_depth if self.queue is not None else None,
+            "queue_max": self.queue.maxsize if self.queue is not None else None,
+        }
+
+
+# ---------- 管道 ----------
+
+
+async def _get_batch(queue: asyncio.Queue, max_items: int) -> Tuple[List[Any], bool]:
+    """阻塞取一条后尽量取满 max_items（不等待），返回 (批次, 是否已收到结束标记)"""
+    item = await queue.get()
+    if item is _DONE:
+        return [], True
+    batch = [item]
+    while len(batch) < max_items:
+        try:
+            item = queue.get_nowait()
+        except asyncio.QueueEmpty:
+            break
+        if item is _DONE:
+            return batch, True
+        batch.append(item)
+    return batch, False
+
+
+class NewsPipeline:
+    """
+    分阶段采集管道。fetch 每个来源一个 worker，其后每个阶段一个 worker，阶段之间为容量 queue_size 的有界队列；
+    score 与 write 按 batch_size 成批处理。同一时刻只运行一轮，并发调用排队等待。
+    """
+
+    def __init__(self, queue_size: Optional[int] = None, batch_size: Optional[int] = None) -> None:
+        self.queue_size = max(1, queue_size or settings.NEWS_PIPELINE_QUEUE_SIZE)
+        self.batch_size = max(1, batch_size or settings.NEWS_PIPELINE_BATCH_SIZE)
+        self._lock = asyncio.Lock()
+        self._metrics: Dict[str, StageMetrics] = {}
+        self._sources: Dict[str, Dict[str, Any]] = {}
+        self._started: Optional[float] = None
+        # 最近一轮完成后的统计（见 run 返回值）
+        self.last_run: Dict[str, Any] = {}
+
+    @property
+    def running(self) -> bool:
+        return self._lock.locked()
+
+    def stats(self) -> Dict[str, Any]:
+        """运行中返回实时阶段指标与队列深度，否则返回最近一轮统计"""
+        if self.running and self._started is not None:
+            elapsed = time.perf_counter() - self._started
+            return {
+                "running": True,
+                "elapsed_s": round(elapsed, 2),
+                "sources": list(self._sources.values()),
+                "stages": [m.snapshot(elapsed) for m in self._metrics.values()],
+            }
+        return {"running": False, **self.last_run}
+
+    async def run(
+        self,
+        db,
+        adapters: Optional[List[SourceAdapter]] = None,
+        fund_codes: Optional[List[str]] = None,
+        days: int = 3,
+        limit: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        运行一轮采集，返回 {started_at, elapsed_s, sources, stages, write}。
+        write 为各批 bulk_upsert_news 统计之和；单个来源失败只记入其 error，不影响其他来源。
+        """
+        adapters = adapters if adapters is not None else build_adapters()
+        fund_codes = [fc.strip() for fc in (fund_codes or []) if fc and fc.strip()]
+        ctx = PipelineContext(db, fund_codes, days, limit or settings.NEWS_PIPELINE_SOURCE_LIMIT)
+        async with self._lock:
+            return await self._run(ctx, adapters)
+
+    async def _run(self, ctx: PipelineContext, adapters: List[SourceAdapter]) -> Dict[str, Any]:
+        queues = {name: asyncio.Queue(maxsize=self.queue_size) for name in STAGES[:-1]}
+        self._metrics = {name: StageMetrics(name, queues.get(name)) for name in STAGES}
+        self._sources = {a.name: {"source": a.name, "fetched": 0, "fetch_ms": None, "error": None} for a in adapters}
+        self._started = time.perf_counter()
+        started_at = datetime.utcnow()
+        write_stats: Dict[str, int] = {
+            "received": 0, "inserted": 0, "modified": 0, "unchanged": 0, "duplicates": 0, "near_duplicates": 0, "errors": 0,
+        }
+        seen_links: set = set()
+
+        def normalize(batch: List[Tuple[SourceAdapter, Any]]) -> List[Dict[str, Any]]:
+            out = []
+            for adapter, item in batch:
+                try:
+                    doc = adapter.normalize(item)
+                except Exception as e:
+                    logger.debug("news_pipeline %s 规整失败: %s", adapter.name, e)
+                    continue
+                if not doc or not doc.get("link"):
+                    continue
+                pub = doc.get("pub_date")
+                if pub is not None and pub < ctx.cutoff:
+                    continue
+                out.append(doc)
+            return out
+
+        def dedupe(batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+            # 整轮按 link 去重：先到者保留（RSS 基金 feed 排在前面，保留基金标记）
+            out = []
+            for d in batch:
+                if d["link"] in seen_links:
+                    continue
+                seen_links.add(d["link"])
+                out.append(d)
+            return out
+
+        def enrich(batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+            return enrich_docs(batch, ctx.fund_codes)
+
+        async def write(batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+            try:
+                stats = await bulk_upsert_news(ctx.db, batch)
+            except Exception as e:
+                logger.warning("news_pipeline 批量写入失败: %s", e)
+                stats = {"received": len(batch), "errors": len(batch)}
+            for k in write_stats:
+                write_stats[k] += int(stats.get(k, 0))
+            return batch
+
+        workers = [
+            self._stage("normalize", queues["fetch"], queues["normalize"], normalize, self.batch_size),
+            self._stage("dedupe", queues["normalize"], queues["dedupe"], dedupe, self.batch_size),
+            self._stage("score", queues["dedupe"], queues["score"], score_docs, self.batch_size),
+            self._stage("enrich", queues["score"], queues["enrich"], enrich, self.batch_size),
+            self._writer(queues["enrich"], write),
+        ]
+        fetchers = [asyncio.create_task(self._fetch(a, ctx, queues["fetch"])) for a in adapters]
+
+        async def close_fetch() -> None:
+            await asyncio.gather(*fetchers)
+            await queues["fetch"].put(_DONE)
+
+        # 任一 worker 异常退出时其上游会永久阻塞在 put 上：首个异常即取消全部 worker 并抛出，锁随之释放
+        tasks = fetchers + [asyncio.create_task(close_fetch())] + [asyncio.create_task(w) for w in workers]
+        try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+            for t in tasks:
+                if t in done and not t.cancelled() and t.exception() is not None:
+                    raise t.exception()
+        finally:
+            for t in tasks:
+                t.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        # 整轮写入无错误才保存 RSS validators；否则下次重新下载，避免 304 跳过未入库的条目
+        if not write_stats["errors"]:
+            await get_rss_client().commit(ctx.db, ctx.feed_validators)
+
+        elapsed = time.perf_counter() - self._started
+        result = {
+            "started_at": started_at.isoformat(),
+            "elapsed_s": round(elapsed, 2),
+            "sources": list(self._sources.values()),
+            "stages": [m.snapshot(elapsed) for m in self._metrics.values()],
+            "write": write_stats,
+        }
+        self.last_run = result
+        logger.info(
+            "news_pipeline 完成 sources=%s elapsed=%.2fs received=%d inserted=%d modified=%d duplicates=%d errors=%d",
+            ",".join(self._sources), elapsed, write_stats["received"], write_stats["inserted"],
+            write_stats["modified"], write_stats["duplicates"], write_stats["errors"],
+        )
+        return result
+
+    async def _fetch(self, adapter: SourceAdapter, ctx: PipelineContext, out: asyncio.Queue) -> None:
+        """来源 worker：逐条放入 fetch 队列，队列满时在 put 上等待（背压）"""
+        metrics = self._metrics["fetch"]
+        source = self._sources[adapter.name]
+        t0 = time.perf_counter()
+        try:
+            # aclosing：本 worker 被取消时立即关闭适配器生成器，由其取消在途的下载任务
+            async with contextlib.aclosing(adapter.fetch(ctx)) as batches:
+                async for batch in batches:
+                    metrics.batches += 1
+                    for item in batch or []:
+                        await out.put((adapter, item))
+                        source["fetched"] += 1
+                        metrics.items_in += 1
+                        metrics.items_out += 1
+                        metrics.observe_queue()
+        except Exception as e:
+            source["error"] = str(e)[:200]
+            logger.warning("news_pipeline 来源 %s 拉取失败: %s", adapter.name, e)
+        elapsed = time.perf_counter() - t0
+        source["fetch_ms"] = round(elapsed * 1000, 1)
+        metrics.busy_s += elapsed  # 含队列满时的背压等待
+
+    async def _stage(
+        self,
+        name: str,
+        inq: asyncio.Queue,
+        outq: asyncio.Queue,
+        fn: Callable[[List[Any]], List[Any]],
+        batch_size: int,
+    ) -> None:
+        """通用阶段 worker：成批取出、处理、逐条放入下游；收到结束标记后向下游传递"""
+        metrics = self._metrics[name]
+        while True:
+            batch, done = await _get_batch(inq, batch_size)
+            if batch:
+                t0 = time.perf_counter()
+                out = fn(batch)
+                metrics.busy_s += time.perf_counter() - t0
+                metrics.batches += 1
+                metrics.items_in += len(batch)
+                metrics.items_out += len(out)
+                metrics.dropped += len(batch) - len(out)
+                for item in out:
+                    await outq.put(item)
+                    metrics.observe_queue()
+            if done:
+                await outq.put(_DONE)
+                return
+
+    async def _writer(self, inq: asyncio.Queue, write: Callable[[List[Dict[str, Any]]], Any]) -> None:
+        """写入 worker：攒满 batch_size 或上游结束时写一批"""
+        metrics = self._metrics["write"]
+        pending: List[Dict[str, Any]] = []
+        while True:
+            batch, done = await _get_batch(inq, self.batch_size)
+            pending.extend(batch)
+            while len(pending) >= self.batch_size or (done and pending):
+                chunk, pending = pending[: self.batch_size], pending[self.batch_size:]
+                t0 = time.perf_counter()
+                await write(chunk)
+                metrics.busy_s += time.perf_counter() - t0
+                metrics.batches += 1
+                metrics.items_in += len(chunk)
+                metrics.items_out += len(chunk)
+            if done:
+                return
+
+
+_pipeline: Optional[NewsPipeline] = None
+
+
+def get_news_pipeline() -> NewsPipeline:
+    """进程内共享的采集管道（定时任务与手动触发共用指标）"""
+    global _pipeline
+    if _pipeline is None:
+        _pipeline = NewsPipeline()
+    return _pipeline
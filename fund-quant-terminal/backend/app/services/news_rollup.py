@@ -0,0 +1,166 @@
+# =====================================================
+# 新闻情绪日汇总
+# news_sentiment_daily 每个自然日（UTC，与原 $dateToString 口径一致）一篇文档：
+#   {_id: "YYYY-MM-DD", buckets: {<fund_code>|market|all: {count, sum}}}
+# market 为未标记基金的新闻，all 为全部新闻。由 news_raw 写入路径按增量 $inc 维护，
+# 情绪趋势接口最多读取 days(≤60) 篇文档
+# =====================================================
+
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from pymongo import UpdateOne
+
+from app.utils.logger import logger
+
+NEWS_COLLECTION = "news_raw"
+ROLLUP_COLLECTION = "news_sentiment_daily"
+MARKET_BUCKET = "market"
+ALL_BUCKET = "all"
+
+# 单条新闻对汇总的贡献：(日期, 桶, 情绪)
+Contribution = Tuple[str, str, float]
+
+
+def bucket_key(fund_code: Optional[str]) -> str:
+    """基金代码 -> 桶名（字段路径中不能含 . 与 $）；空为 market"""
+    fc = (fund_code or "").strip().replace(".", "_").replace("$", "_")
+    return fc or MARKET_BUCKET
+
+
+def contribution(doc: Optional[Dict[str, Any]]) -> Optional[Contribution]:
+    """news_raw 文档 -> 汇总贡献；无 pub_date 的新闻不进入趋势（与原聚合一致）"""
+    if not doc:
+        return None
+    pub = doc.get("pub_date")
+    if not isinstance(pub, datetime):
+        return None
+    return pub.strftime("%Y-%m-%d"), bucket_key(doc.get("fund_code")), float(doc.get("sentiment") or 0.0)
+
+
+def _deltas(changes: Iterable[Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]]) -> Dict[str, Dict[str, float]]:
+    """(旧文档, 新文档) 列表 -> {日期: {"buckets.<桶>.count|sum": 增量}}"""
+    inc: Dict[str, Dict[str, float]] = defaultdict(dict)
+    for old, new in changes:
+        before, after = contribution(old), contribution(new)
+        if before == after:
+            continue
+        for c, sign in ((before, -1), (after, 1)):
+            if c is None:
+                continue
+            day, bucket, sentiment = c
+            fields = inc[day]
+            for b in (bucket, ALL_BUCKET):
+                fields[f"buckets.{b}.count"] = fields.get(f"buckets.{b}.count", 0) + sign
+                fields[f"buckets.{b}.sum"] = fields.get(f"buckets.{b}.sum", 0.0) + sign * sentiment
+    return inc
+
+
+async def apply_changes(
+    db,
+    changes: List[Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]],
+) -> int:
+    """按新闻写入前后的文档差异增量更新日汇总，返回更新的日期数"""
+    inc = _deltas(changes)
+    ops = [
+        UpdateOne({"_id": day}, {"$inc": {k: v for k, v in fields.items() if v}, "$set": {"updated_at": datetime.utcnow()}}, upsert=True)
+        for day, fields in inc.items()
+        if any(fields.values())
+    ]
+    if ops:
+        await db[ROLLUP_COLLECTION].bulk_write(ops, ordered=False)
+    return len(ops)
+
+
+async def rebuild(db, since: Optional[datetime] = None) -> int:
+    """
+    由 news_raw 全量（或 since 之后）重算日汇总，返回写入的日期数。
+    只覆盖 news_raw 中仍有数据的日期；已整日归档（见 retention）的日期保留原汇总
+    """
+    match: Dict[str, Any] = {"pub_date": {"$type": "date"}}
+    if since is not None:
+        match["pub_date"] = {"$gte": since.replace(hour=0, minute=0, second=0, microsecond=0)}
+    pipeline = [
+        {"$match": match},
+        {
+            "$group": {
+                "_id": {
+                    "day": {"$dateToString": {"format": "%Y-%m-%d", "date": "$pub_date"}},
+                    "bucket": {"$ifNull": ["$fund_code", ""]},
+                },
+                "count": {"$sum": 1},
+                "sum": {"$sum": {"$ifNull": ["$sentiment", 0]}},
+            }
+        },
+    ]
+    days: Dict[str, Dict[str, Dict[str, float]]] = defaultdict(dict)
+    async for row in db[NEWS_COLLECTION].aggregate(pipeline):
+        day = row["_id"]["day"]
+        bucket = bucket_key(str(row["_id"]["bucket"] or ""))
+        cur = days[day].setdefault(bucket, {"count": 0, "sum": 0.0})
+        cur["count"] += int(row["count"])
+        cur["sum"] += float(row["sum"])
+        total = days[day].setdefault(ALL_BUCKET, {"count": 0, "sum": 0.0})
+        total["count"] += int(row["count"])
+        total["sum"] += float(row["sum"])
+
+    now = datetime.utcnow()
+    ops = [UpdateOne({"_id": day}, {"$set": {"buckets": buckets, "updated_at": now}}, upsert=True) for day, buckets in days.items()]
+    if ops:
+        await db[ROLLUP_COLLECTION].bulk_write(ops, ordered=False)
+    logger.info("news_sentiment_daily 重算完成: %d 天", len(ops))
+    return len(ops)
+
+
+async def ensure_rollup(db) -> None:
+    """启动时若汇总为空而 news_raw 已有数据，则全量重算一次（后台执行）"""
+    try:
+        if await db[ROLLUP_COLLECTION].estimated_document_count() == 0 and await db[NEWS_COLLECTION].estimated_document_count() > 0:
+            await rebuild(db)
+    except Exception as e:
+        logger.warning("news_sentiment_daily 初始化失败: %s", e)
+
+
+async def daily_totals(
+    db,
+    start: datetime,
+    end: datetime,
+    fund_codes: Optional[List[str]] = None,
+) -> List[Tuple[str, float, int]]:
+    """
+    [start, end) 内按日 (日期, 情绪和, 条数)。fund_codes 指定时为这些基金 + 市场新闻，否则为全部新闻。
+    汇总不随 news_raw 归档删除而减少，可用于长区间回测
+    """
+    buckets = [bucket_key(fc) for fc in fund_codes] + [MARKET_BUCKET] if fund_codes else [ALL_BUCKET]
+    buckets = list(dict.fromkeys(buckets))
+    projection = {f"buckets.{b}": 1 for b in buckets}
+    query = {"_id": {"$gte": start.strftime("%Y-%m-%d"), "$lt": end.strftime("%Y-%m-%d")}}
+    rows = []
+    async for doc in db[ROLLUP_COLLECTION].find(query, projection).sort("_id", 1):
+        stats = doc.get("buckets") or {}
+        count = sum(int((stats.get(b) or {}).get("count") or 0) for b in buckets)
+        if count > 0:
+            rows.append((doc["_id"], sum(float((stats.get(b) or {}).get("sum") or 0.0) for b in buckets), count))
+    return rows
+
+
+async def sentiment_trend(db, fund_code: Optional[str], days: int) -> List[Dict[str, Any]]:
+    """
+    按日情绪趋势。fund_code 为空时统计全部新闻；否则为该基金新闻 + 未标记基金的市场新闻。
+    返回 [{date, avg_sentiment, count}]，按日期升序。
+    """
+    start = (datetime.utcnow() - timedelta(days=days)).strftime("%Y-%m-%d")
+    fc = (fund_code or "").strip()
+    buckets = [bucket_key(fc), MARKET_BUCKET] if fc else [ALL_BUCKET]
+    projection = {f"buckets.{b}": 1 for b in buckets}
+    cursor = db[ROLLUP_COLLECTION].find({"_id": {"$gte": start}}, projection).sort("_id", 1)
+    items = []
+    async for doc in cursor:
+        stats = doc.get("buckets") or {}
+        count = sum(int((stats.get(b) or {}).get("count") or 0) for b in buckets)
+        if count <= 0:
+            continue
+        total = sum(float((stats.get(b) or {}).get("sum") or 0.0) for b in buckets)
+        items.append({"date": doc["_id"], "avg_sentiment": round(total / count, 2), "count": count})
+    return items
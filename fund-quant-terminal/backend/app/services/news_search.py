@@ -0,0 +1,114 @@
+# =====================================================
+# 新闻关键词检索索引
+# news_raw.search_terms 保存标题+摘要的检索词（中文二元组、英文/数字三元组），
+# 配合 (search_terms, pub_date) 多键索引，关键词查询先用 $all 走索引缩小候选，
+# 再以原正则在候选集上精确校验。英文/数字按三元组而非整词索引，部分关键词（1617 -> 161725、fed -> federal）同样命中
+# =====================================================
+
+import re
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from pymongo import UpdateOne
+
+from app.utils.logger import logger
+
+NEWS_COLLECTION = "news_raw"
+SEARCH_FIELD = "search_terms"
+BACKFILL_BATCH = 1000
+CONFIG_COLLECTION = "config"
+# 完成一轮回填后记录当前检索词版本，之后成为 leader 时不再扫描全表
+BACKFILL_MARKER_ID = "news_search_terms_backfill"
+# 英文/数字段的 n-gram 长度；短于该长度的关键词段无法由索引覆盖，退化为仅正则
+WORD_GRAM = 3
+# 检索词版本标记（不会与真实检索词冲突），切词规则变化后据此回填旧文档
+TERMS_VERSION = "#v2"
+
+# 中文（含中日韩统一表意文字扩展 A）连续段；英文、数字连续段
+_CJK_RUN = re.compile(r"[㐀-䶿一-鿿]+")
+_WORD_RUN = re.compile(r"[0-9a-z]+")
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """
+    文本 -> 去重后的检索词（保持出现顺序）。
+    中文段切二元组，单字段保留单字；英文转小写，英文/数字段切三元组（不足三个字符的段保留整段）。
+    """
+    if not text:
+        return []
+    t = str(text).lower()
+    seen: Dict[str, None] = {}
+    for m in _CJK_RUN.finditer(t):
+        run = m.group()
+        if len(run) == 1:
+            seen.setdefault(run, None)
+            continue
+        for i in range(len(run) - 1):
+            seen.setdefault(run[i:i + 2], None)
+    for m in _WORD_RUN.finditer(t):
+        run = m.group()
+        if len(run) < WORD_GRAM:
+            seen.setdefault(run, None)
+            continue
+        for i in range(len(run) - WORD_GRAM + 1):
+            seen.setdefault(run[i:i + WORD_GRAM], None)
+    return list(seen)
+
+
+def build_search_terms(title: Optional[str], summary: Optional[str]) -> List[str]:
+    """新闻文档的 search_terms 字段（末尾附版本标记）"""
+    return tokenize(f"{title or ''} {summary or ''}") + [TERMS_VERSION]
+
+
+def keyword_filter(keyword: str) -> Dict[str, Any]:
+    """
+    关键词查询条件。关键词的检索词全部命中 search_terms（索引）且标题或摘要包含原关键词（正则校验）；
+    单个汉字、不足三个字符的英文/数字段等无法由 n-gram 覆盖的关键词退化为仅正则。
+    """
+    kw = keyword.strip()
+    escaped = re.escape(kw)
+    regex = {"$regex": escaped, "$options": "i"}
+    text_match = {"$or": [{"title": regex}, {"content_summary": regex}]}
+    terms = tokenize(kw)
+    # 单字中文段、短英文/数字段在文档侧只在孤立出现时才整段写入，可能是更长词的一部分，不能用于索引过滤
+    if not terms or any(len(t) == 1 and _CJK_RUN.fullmatch(t) or len(t) < WORD_GRAM and _WORD_RUN.fullmatch(t) for t in terms):
+        return text_match
+    return {"$and": [{SEARCH_FIELD: {"$all": terms}}, text_match]}
+
+
+async def backfill_search_terms(db, batch_size: int = BACKFILL_BATCH) -> int:
+    """
+    为缺少 search_terms 或检索词版本过旧的历史新闻补写检索词（启动后后台执行），返回处理条数。
+    $ne 无法有选择地走索引，完整回填一轮后在 config 记录版本标记，标记与当前版本一致时直接跳过
+    """
+    total = 0
+    try:
+        marker = await db[CONFIG_COLLECTION].find_one({"_id": BACKFILL_MARKER_ID})
+        if marker and marker.get("version") == TERMS_VERSION:
+            return 0
+        while True:
+            docs = await db[NEWS_COLLECTION].find(
+                {SEARCH_FIELD: {"$ne": TERMS_VERSION}},
+                {"title": 1, "content_summary": 1},
+            ).limit(batch_size).to_list(length=batch_size)
+            if not docs:
+                break
+            ops = [
+                UpdateOne(
+                    {"_id": d["_id"]},
+                    {"$set": {SEARCH_FIELD: build_search_terms(d.get("title"), d.get("content_summary"))}},
+                )
+                for d in docs
+            ]
+            await db[NEWS_COLLECTION].bulk_write(ops, ordered=False)
+            total += len(ops)
+        await db[CONFIG_COLLECTION].update_one(
+            {"_id": BACKFILL_MARKER_ID},
+            {"$set": {"version": TERMS_VERSION, "backfilled_at": datetime.utcnow(), "docs": total}},
+            upsert=True,
+        )
+        if total:
+            logger.info("news_raw search_terms 回填完成: %d 条", total)
+    except Exception as e:
+        logger.warning("news_raw search_terms 回填失败（已处理 %d 条）: %s", total, e)
+    return total
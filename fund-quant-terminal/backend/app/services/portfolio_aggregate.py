@@ -0,0 +1,121 @@
+# =====================================================
+# 投资组合汇总服务
+# 现金 + 全部持仓 + 持仓市值，通过 Mongo 聚合一次算出并进程内缓存
+# 所有改动持仓/现金的写路径需调用 invalidate() 使缓存失效
+# =====================================================
+
+import asyncio
+import copy
+import time
+from typing import Any, Dict, Optional
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.config import settings
+from app.services.account_service import get_capital
+from app.utils.logger import logger
+
+ASSETS_COLLECTION = "assets"
+
+# 持仓单价：current_price 非空非零优先，否则 cost_price，再否则 0（与旧版 `a or b or 0` 一致）
+_PRICE_EXPR = {
+    "$cond": [
+        {"$ne": [{"$ifNull": ["$current_price", 0]}, 0]},
+        "$current_price",
+        {"$ifNull": ["$cost_price", 0]},
+    ]
+}
+
+_SUMMARY_PIPELINE = [
+    {"$sort": {"created_at": -1}},
+    {
+        "$group": {
+            "_id": None,
+            "holdings": {"$push": "$$ROOT"},
+            "holdings_value": {
+                "$sum": {"$multiply": [{"$ifNull": ["$quantity", 0]}, _PRICE_EXPR]}
+            },
+        }
+    },
+]
+
+
+def _serialize_doc(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """序列化 MongoDB 文档，移除 _id 并转为 id"""
+    d = dict(doc)
+    if "_id" in d:
+        d["id"] = str(d["_id"])
+        del d["_id"]
+    return d
+
+
+class PortfolioAggregateService:
+    """
+    投资组合汇总（单用户模式）。
+
+    summary 结构：capital, holdings（按 created_at 倒序）, holdings_value, total_value。
+    结果缓存 PORTFOLIO_SUMMARY_CACHE_TTL 秒；写路径调用 invalidate() 立即失效。
+    使用代际计数，避免写入期间正在计算的旧结果被回填进缓存。
+    """
+
+    def __init__(self, ttl: Optional[float] = None) -> None:
+        self._ttl = float(settings.PORTFOLIO_SUMMARY_CACHE_TTL if ttl is None else ttl)
+        self._cached: Optional[Dict[str, Any]] = None
+        self._cached_at = 0.0
+        self._generation = 0
+        self._lock = asyncio.Lock()
+
+    def invalidate(self) -> None:
+        """使缓存失效（持仓、现金、交易、决策写入后调用）"""
+        self._generation += 1
+        self._cached = None
+
+    def _is_fresh(self) -> bool:
+        return self._cached is not None and (time.monotonic() - self._cached_at) < self._ttl
+
+    async def _compute(self, db: AsyncIOMotorDatabase) -> Dict[str, Any]:
+        """Mongo 聚合计算持仓市值，现金单独读取"""
+        capital = await get_capital(db)
+        cursor = db[ASSETS_COLLECTION].aggregate(_SUMMARY_PIPELINE)
+        rows = await cursor.to_list(length=1)
+        row = rows[0] if rows else {}
+        holdings = [_serialize_doc(d) for d in row.get("holdings", [])]
+        holdings_value = float(row.get("holdings_value") or 0)
+        return {
+            "capital": capital,
+            "holdings": holdings,
+            "holdings_value": round(holdings_value, 2),
+            "total_value": round(capital + holdings_value, 2),
+        }
+
+    async def get_summary(self, db: AsyncIOMotorDatabase) -> Dict[str, Any]:
+        """获取资产汇总，命中缓存时不访问数据库。返回副本，调用方可自由修改"""
+        if self._is_fresh():
+            return copy.deepcopy(self._cached)
+        async with self._lock:
+            if self._is_fresh():
+                return copy.deepcopy(self._cached)
+            generation = self._generation
+            summary = await self._compute(db)
+            if generation == self._generation:
+                self._cached = summary
+                self._cached_at = time.monotonic()
+            else:
+                logger.debug("portfolio_aggregate: 计算期间缓存已失效，不回填")
+            return copy.deepcopy(summary)
+
+
+_service: Optional[PortfolioAggregateService] = None
+
+
+def get_portfolio_aggregate_service() -> PortfolioAggregateService:
+    """返回进程内 PortfolioAggregateService 单例（可用于 FastAPI Depends）"""
+    global _service
+    if _service is None:
+        _service = PortfolioAggregateService()
+    return _service
+
+
+def invalidate_portfolio_summary() -> None:
+    """写路径使用的便捷函数：使资产汇总缓存失效"""
+    get_portfolio_aggregate_service().invalidate()
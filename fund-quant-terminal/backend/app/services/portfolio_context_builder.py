@@ -5,18 +5,18 @@
 
 import asyncio
 from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List
 
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from pydantic import BaseModel, Field
 
-from app.services.account_service import get_capital
 from app.services.data_fetcher import DataFetcherService
+from app.services.portfolio_aggregate import get_portfolio_aggregate_service
+from app.services.risk_metrics import get_risk_metrics_service
 from app.services.wallstreetcn_service import WallStreetCNService
 from app.utils.logger import logger
 
 # 常量
-ASSETS_COLLECTION = "assets"
 CONFIG_COLLECTION = "config"
 RISK_PROFILE_DOC_ID = "risk_profile"
 RISK_PROFILE_USER_PREFIX = "risk_profile_"
@@ -39,42 +39,16 @@ class PortfolioContextOutput(BaseModel):
     market_snapshot: Dict[str, Any] = Field(default_factory=dict, description="市场指数快照")
     timestamp: str = Field(default="", description="构建时间 ISO8601")
     risk_profile: str = Field(default=DEFAULT_RISK_PROFILE, description="用户风险偏好")
-
-
-def _serialize_doc(doc: Optional[Dict]) -> Dict:
-    """序列化 MongoDB 文档，移除 _id 并转为 id"""
-    if not doc:
-        return {}
-    d = dict(doc)
-    if "_id" in d:
-        d["id"] = str(d["_id"])
-        del d["_id"]
-    return d
+    risk_metrics: Dict[str, Any] = Field(default_factory=dict, description="组合风险指标")
 
 
 async def _fetch_asset_summary(db: AsyncIOMotorDatabase) -> Dict[str, Any]:
     """
     获取资产汇总：现金、持仓、持仓市值、总资产。
-    复用 assets 路由逻辑，当前为单用户模式，暂不按 user_id 过滤。
+    复用共享 PortfolioAggregateService（带缓存），当前为单用户模式，暂不按 user_id 过滤。
     """
     try:
-        capital = await get_capital(db)
-        coll = db[ASSETS_COLLECTION]
-        cursor = coll.find({})
-        docs = await cursor.to_list(length=500)
-        holdings = []
-        holdings_value = 0.0
-        for d in docs:
-            h = _serialize_doc(d)
-            holdings.append(h)
-            price = h.get("current_price") or h.get("cost_price") or 0
-            holdings_value += (h.get("quantity") or 0) * float(price)
-        return {
-            "capital": capital,
-            "holdings": holdings,
-            "holdings_value": round(holdings_value, 2),
-            "total_value": round(capital + holdings_value, 2),
-        }
+        return await get_portfolio_aggregate_service().get_summary(db)
     except Exception as e:
         logger.exception("_fetch_asset_summary 异常: %s", e)
         return {
@@ -214,6 +188,20 @@ async def _fetch_risk_profile(db: AsyncIOMotorDatabase, user_id: str) -> str:
     return DEFAULT_RISK_PROFILE
 
 
+async def _fetch_risk_metrics(db: AsyncIOMotorDatabase) -> Dict[str, Any]:
+    """
+    获取组合风险指标（复用 RiskMetricsService 的内存状态，通常只需增量或直接命中）。
+    持仓明细只保留风险贡献最大的 10 项，控制上下文长度。
+    """
+    try:
+        metrics = await get_risk_metrics_service().compute(db)
+        metrics["holdings"] = metrics.get("holdings", [])[:10]
+        return metrics
+    except Exception as e:
+        logger.warning("_fetch_risk_metrics 异常: %s", e)
+        return {}
+
+
 def get_portfolio_context_builder() -> "PortfolioContextBuilder":
     """FastAPI Depends：返回 PortfolioContextBuilder 单例"""
     return PortfolioContextBuilder()
@@ -224,7 +212,7 @@ class PortfolioContextBuilder:
     投资组合上下文构建器。
 
     聚合资产汇总、华尔街见闻近期新闻、沪深300/上证基金指数市场快照、
-    用户风险偏好，供 AI 决策或前端展示使用。
+    用户风险偏好与组合风险指标，供 AI 决策或前端展示使用。
     """
 
     def __init__(self) -> None:
@@ -238,7 +226,7 @@ class PortfolioContextBuilder:
             user_id: 用户 ID，用于风险偏好查询。
 
         Returns:
-            asset_summary, recent_news, market_snapshot, timestamp, risk_profile
+            asset_summary, recent_news, market_snapshot, timestamp, risk_profile, risk_metrics
         """
         from app.database import get_database as _get_db
         db = await _get_db()
@@ -250,9 +238,10 @@ class PortfolioContextBuilder:
         news_task = _fetch_recent_news(self._wallstreetcn_service, limit=10)
         market_task = _fetch_market_snapshot(data_service)
         risk_task = _fetch_risk_profile(db, user_id)
+        metrics_task = _fetch_risk_metrics(db)
 
-        asset_summary, recent_news, market_snapshot, risk_profile = await asyncio.gather(
-            asset_task, news_task, market_task, risk_task
+        asset_summary, recent_news, market_snapshot, risk_profile, risk_metrics = await asyncio.gather(
+            asset_task, news_task, market_task, risk_task, metrics_task
         )
 
         ctx = {
@@ -261,5 +250,6 @@ class PortfolioContextBuilder:
             "market_snapshot": market_snapshot,
             "timestamp": timestamp,
             "risk_profile": risk_profile,
+            "risk_metrics": risk_metrics,
         }
         return PortfolioContextOutput(**ctx).model_dump()
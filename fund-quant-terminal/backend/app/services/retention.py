@@ -0,0 +1,257 @@
+# =====================================================
+# 数据保留与冷归档
+# news_raw、decision_logs 超过保留天数的文档每晚按批压缩（BSON + zlib）写入 <集合>_archive，
+# 写入成功后再从热集合删除。归档块记录所含文档 _id（ids），写入前剔除已在归档中的文档，
+# 插入归档块后、删除热数据前中断时，重跑只删除这些文档而不会重复归档。
+# 情绪趋势与回测读 news_sentiment_daily 日汇总，归档不影响历史情绪
+# =====================================================
+
+import hashlib
+import time
+import zlib
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+import bson
+from bson import Binary
+from pymongo.errors import DuplicateKeyError
+
+from app.config import settings
+from app.utils.logger import logger
+from app.utils.pagination import count_cache
+
+ARCHIVE_SUFFIX = "_archive"
+RUNS_COLLECTION = "retention_runs"
+CODEC = "bson+zlib"
+# 列表接口最多查询 30 天，保留天数不得低于该窗口
+MIN_RETENTION_DAYS = 31
+
+
+class RetentionPolicy:
+    """单个集合的保留策略：按 time_field（缺失时 fallback_field）判断文档时间"""
+
+    def __init__(self, collection: str, time_field: str, fallback_field: str, days: int) -> None:
+        self.collection = collection
+        self.time_field = time_field
+        self.fallback_field = fallback_field
+        self.days = days
+
+    @property
+    def archive_collection(self) -> str:
+        return self.collection + ARCHIVE_SUFFIX
+
+    @property
+    def enabled(self) -> bool:
+        return self.days > 0
+
+    def cutoff(self, now: Optional[datetime] = None) -> datetime:
+        """保留期起点，对齐到 UTC 零点：按整日归档，日汇总重算不会遇到半天的数据"""
+        t = (now or datetime.utcnow()) - timedelta(days=max(self.days, MIN_RETENTION_DAYS))
+        return t.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    def expired_filter(self, cutoff: datetime) -> Dict[str, Any]:
+        return {
+            "$or": [
+                {self.time_field: {"$lt": cutoff}},
+                {self.time_field: None, self.fallback_field: {"$lt": cutoff}},
+            ]
+        }
+
+    def doc_time(self, doc: Dict[str, Any]) -> Optional[datetime]:
+        return doc.get(self.time_field) or doc.get(self.fallback_field)
+
+
+def get_policies() -> List[RetentionPolicy]:
+    return [
+        RetentionPolicy("news_raw", "pub_date", "created_at", settings.NEWS_RETENTION_DAYS),
+        RetentionPolicy("decision_logs", "timestamp", "created_at", settings.DECISION_LOGS_RETENTION_DAYS),
+    ]
+
+
+def _get_policy(collection: str) -> RetentionPolicy:
+    for p in get_policies():
+        if p.collection == collection:
+            return p
+    raise ValueError(f"不支持的集合: {collection}，可选 news_raw、decision_logs")
+
+
+def encode_chunk(docs: List[Dict[str, Any]]) -> Tuple[bytes, int]:
+    """文档列表 -> (压缩后字节, 压缩前字节数)"""
+    raw = bson.encode({"docs": docs})
+    return zlib.compress(raw, 6), len(raw)
+
+
+def decode_chunk(payload: bytes) -> List[Dict[str, Any]]:
+    return bson.decode(zlib.decompress(payload)).get("docs", [])
+
+
+async def _insert_chunk(cold, policy: RetentionPolicy, docs: List[Dict[str, Any]], stats: Dict[str, Any]) -> None:
+    """压缩 docs 写入一个归档块并累计 stats"""
+    ids = [d["_id"] for d in docs]
+    payload, raw_bytes = encode_chunk(docs)
+    times = [t for t in (policy.doc_time(d) for d in docs) if isinstance(t, datetime)]
+    chunk = {
+        "_id": hashlib.sha1(b"".join(bson.encode({"i": i}) for i in ids)).hexdigest(),
+        "ids": ids,
+        "start": min(times) if times else None,
+        "end": max(times) if times else None,
+        "count": len(docs),
+        "codec": CODEC,
+        "raw_bytes": raw_bytes,
+        "stored_bytes": len(payload),
+        "payload": Binary(payload),
+        "archived_at": datetime.utcnow(),
+    }
+    try:
+        await cold.insert_one(chunk)
+    except DuplicateKeyError:
+        logger.info("%s 归档块 %s 已存在（并发归档），跳过写入", policy.collection, chunk["_id"])
+        return
+    stats["archived"] += len(docs)
+    stats["chunks"] += 1
+    stats["raw_bytes"] += raw_bytes
+    stats["stored_bytes"] += len(payload)
+
+
+async def archive_collection(db, policy: RetentionPolicy, batch_size: Optional[int] = None) -> Dict[str, Any]:
+    """
+    将 policy.collection 中早于保留期的文档按批归档并删除，返回
+    {collection, cutoff, archived, chunks, raw_bytes, stored_bytes, elapsed_s, docs_per_s}
+    """
+    batch_size = max(1, batch_size or settings.RETENTION_BATCH_SIZE)
+    cutoff = policy.cutoff()
+    hot, cold = db[policy.collection], db[policy.archive_collection]
+    stats: Dict[str, Any] = {
+        "collection": policy.collection, "cutoff": cutoff.isoformat(),
+        "archived": 0, "chunks": 0, "raw_bytes": 0, "stored_bytes": 0,
+    }
+    t0 = time.perf_counter()
+    query = policy.expired_filter(cutoff)
+    deleted = 0
+    while True:
+        docs = await hot.find(query).sort("_id", 1).limit(batch_size).to_list(length=batch_size)
+        if not docs:
+            break
+        ids = [d["_id"] for d in docs]
+        archived = set(ids) & {
+            i
+            async for chunk in cold.find({"ids": {"$in": ids}}, {"ids": 1})
+            for i in chunk.get("ids", [])
+        }
+        if archived:
+            logger.info("%s 有 %d 条文档已在归档中（上次归档后未删除），直接删除热数据", policy.collection, len(archived))
+            docs = [d for d in docs if d["_id"] not in archived]
+        if docs:
+            await _insert_chunk(cold, policy, docs, stats)
+        deleted += (await hot.delete_many({"_id": {"$in": ids}})).deleted_count
+        if len(ids) < batch_size:
+            break
+    elapsed = time.perf_counter() - t0
+    stats["elapsed_s"] = round(elapsed, 2)
+    stats["docs_per_s"] = round(stats["archived"] / elapsed, 1) if elapsed > 0 else 0.0
+    if deleted:
+        count_cache.invalidate(policy.collection)
+    return stats
+
+
+async def run_retention(db) -> Dict[str, Any]:
+    """按全部已启用策略归档一轮，结果写入 retention_runs 并返回"""
+    started = datetime.utcnow()
+    results = []
+    for policy in get_policies():
+        if not policy.enabled:
+            continue
+        try:
+            results.append(await archive_collection(db, policy))
+        except Exception as e:
+            logger.warning("%s 归档失败: %s", policy.collection, e)
+            results.append({"collection": policy.collection, "error": str(e)[:200]})
+    run = {
+        "started_at": started,
+        "elapsed_s": round((datetime.utcnow() - started).total_seconds(), 2),
+        "collections": results,
+    }
+    try:
+        await db[RUNS_COLLECTION].insert_one(dict(run))
+    except Exception as e:
+        logger.warning("retention_runs 写入失败: %s", e)
+    logger.info(
+        "数据归档完成: %s",
+        ", ".join(f"{r['collection']}={r.get('archived', 0)}" for r in results) or "未启用",
+    )
+    return run
+
+
+async def _hot_stats(db, collection: str) -> Dict[str, Any]:
+    try:
+        s = await db.command("collStats", collection)
+        return {
+            "count": int(s.get("count", 0)),
+            "size_bytes": int(s.get("size", 0)),
+            "storage_bytes": int(s.get("storageSize", 0)),
+            "index_bytes": int(s.get("totalIndexSize", 0)),
+        }
+    except Exception:
+        return {"count": await db[collection].estimated_document_count()}
+
+
+async def retention_stats(db) -> Dict[str, Any]:
+    """各集合热数据大小、冷归档规模与最近一次归档结果"""
+    items = []
+    for policy in get_policies():
+        cold = [
+            row async for row in db[policy.archive_collection].aggregate([
+                {"$group": {
+                    "_id": None,
+                    "chunks": {"$sum": 1},
+                    "docs": {"$sum": "$count"},
+                    "raw_bytes": {"$sum": "$raw_bytes"},
+                    "stored_bytes": {"$sum": "$stored_bytes"},
+                    "oldest": {"$min": "$start"},
+                }},
+            ])
+        ]
+        archive = cold[0] if cold else {"chunks": 0, "docs": 0, "raw_bytes": 0, "stored_bytes": 0, "oldest": None}
+        archive.pop("_id", None)
+        if archive.get("oldest"):
+            archive["oldest"] = archive["oldest"].isoformat()
+        items.append({
+            "collection": policy.collection,
+            "retention_days": policy.days,
+            "hot": await _hot_stats(db, policy.collection),
+            "archive": archive,
+        })
+    last = await db[RUNS_COLLECTION].find_one({}, {"_id": 0}, sort=[("started_at", -1)])
+    if last and isinstance(last.get("started_at"), datetime):
+        last["started_at"] = last["started_at"].isoformat()
+    return {"collections": items, "last_run": last}
+
+
+async def query_archive(
+    db,
+    collection: str,
+    start: datetime,
+    end: datetime,
+    match: Optional[Dict[str, Any]] = None,
+    limit: int = 100,
+) -> List[Dict[str, Any]]:
+    """
+    按需查询冷归档：解压与 [start, end) 有重叠的归档块，按文档时间与 match 等值条件过滤，
+    按时间倒序返回至多 limit 条。未知集合抛 ValueError
+    """
+    policy = _get_policy(collection)
+    cursor = db[policy.archive_collection].find(
+        {"start": {"$lt": end}, "end": {"$gte": start}},
+    ).sort("end", -1)
+    match = {k: v for k, v in (match or {}).items() if v is not None}
+    out: List[Dict[str, Any]] = []
+    async for chunk in cursor:
+        for d in decode_chunk(chunk["payload"]):
+            t = policy.doc_time(d)
+            if not isinstance(t, datetime) or not (start <= t < end):
+                continue
+            if any(d.get(k) != v for k, v in match.items()):
+                continue
+            out.append(d)
+    out.sort(key=lambda d: policy.doc_time(d), reverse=True)
+    return out[:limit]
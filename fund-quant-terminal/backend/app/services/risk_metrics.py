@@ -0,0 +1,252 @@
+# =====================================================
+# 组合风险指标服务
+# 基于 holding_histories 对齐收益矩阵，向量化计算波动率、最大回撤、
+# Sharpe、Sortino、历史 VaR/CVaR 及各持仓风险贡献；
+# 收益矩阵与协方差累加量常驻内存，新净值点到达时只追加新行
+# =====================================================
+
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.config import settings
+from app.services.nav_matrix import SeriesKey, histories_stamp, holding_key, load_price_matrix
+from app.services.portfolio_aggregate import get_portfolio_aggregate_service
+from app.utils.logger import logger
+
+TRADING_DAYS = 252
+DEFAULT_WINDOW = 250
+VAR_CONFIDENCE = 0.95
+# 增量更新时每条序列只读取最后 INCREMENTAL_TAIL 个净值点
+INCREMENTAL_TAIL = 60
+
+
+def _round(v: float, n: int = 6) -> Optional[float]:
+    return None if v is None or not np.isfinite(v) else round(float(v), n)
+
+
+def max_drawdown(returns: np.ndarray) -> float:
+    """由日收益序列计算最大回撤（正数，0.1 表示 10%）"""
+    if returns.size == 0:
+        return 0.0
+    equity = np.cumprod(1.0 + returns)
+    peak = np.maximum.accumulate(np.concatenate([[1.0], equity]))[1:]
+    return float(np.max(1.0 - equity / peak))
+
+
+def portfolio_risk(
+    R: np.ndarray,
+    weights: np.ndarray,
+    s1: np.ndarray,
+    s2: np.ndarray,
+    risk_free: float,
+) -> Dict[str, Any]:
+    """
+    由收益矩阵 R (T, N)、权重 w 及累加量 s1=ΣR、s2=ΣRᵀR 计算组合指标。
+    协方差直接由累加量得到，无需重新扫描历史；回撤与 VaR 需要组合收益序列 R @ w。
+    """
+    n = R.shape[0]
+    if n < 2 or weights.size == 0:
+        return {"observations": int(n)}
+    mean = s1 / n
+    cov = (s2 - np.outer(s1, s1) / n) / (n - 1)
+    port_var = float(weights @ cov @ weights)
+    port_sd = float(np.sqrt(max(port_var, 0.0)))
+    rp = R @ weights
+    rf_daily = risk_free / TRADING_DAYS
+
+    ann_return = float(weights @ mean) * TRADING_DAYS
+    ann_vol = port_sd * np.sqrt(TRADING_DAYS)
+    downside = np.minimum(rp - rf_daily, 0.0)
+    downside_dev = float(np.sqrt(np.mean(downside ** 2))) * np.sqrt(TRADING_DAYS)
+    q = np.quantile(rp, 1.0 - VAR_CONFIDENCE)
+    tail = rp[rp <= q]
+
+    if port_sd > 0:
+        marginal = cov @ weights / port_sd
+        contrib = weights * marginal
+    else:
+        marginal = np.zeros_like(weights)
+        contrib = np.zeros_like(weights)
+    return {
+        "observations": int(n),
+        "annual_return": _round(ann_return),
+        "volatility": _round(ann_vol),
+        "max_drawdown": _round(max_drawdown(rp)),
+        "sharpe": _round((ann_return - risk_free) / ann_vol) if ann_vol > 0 else None,
+        "sortino": _round((ann_return - risk_free) / downside_dev) if downside_dev > 0 else None,
+        "var_95": _round(-q),
+        "cvar_95": _round(-float(tail.mean())) if tail.size else None,
+        "_marginal": marginal * np.sqrt(TRADING_DAYS),
+        "_contrib": contrib * np.sqrt(TRADING_DAYS),
+        "_sd": ann_vol,
+    }
+
+
+class _RiskState:
+    """单个窗口的收益矩阵及累加量"""
+
+    __slots__ = ("requested", "keys", "dates", "R", "s1", "s2", "stamp")
+
+    def __init__(
+        self,
+        requested: List[SeriesKey],
+        keys: List[SeriesKey],
+        dates: np.ndarray,
+        R: np.ndarray,
+        stamp: Any,
+    ) -> None:
+        self.requested = frozenset(requested)
+        self.keys = keys
+        self.dates = dates  # 每行收益对应的日期（收益日）
+        self.R = R
+        self.s1 = R.sum(axis=0)
+        self.s2 = R.T @ R
+        self.stamp = stamp
+
+    @property
+    def last_date(self) -> Optional[np.datetime64]:
+        return self.dates[-1] if len(self.dates) else None
+
+    def append(self, dates: np.ndarray, rows: np.ndarray, window: int) -> None:
+        """追加新收益行并按窗口淘汰最旧行，累加量同步增减"""
+        if rows.size:
+            self.R = np.vstack([self.R, rows])
+            self.dates = np.concatenate([self.dates, dates])
+            self.s1 = self.s1 + rows.sum(axis=0)
+            self.s2 = self.s2 + rows.T @ rows
+        extra = self.R.shape[0] - window
+        if extra > 0:
+            old = self.R[:extra]
+            self.s1 = self.s1 - old.sum(axis=0)
+            self.s2 = self.s2 - old.T @ old
+            self.R = self.R[extra:]
+            self.dates = self.dates[extra:]
+
+
+def _returns_from_prices(prices: np.ndarray) -> np.ndarray:
+    """价格矩阵 -> 收益矩阵；标的首个净值之前的收益按 0 处理"""
+    if prices.shape[0] < 2:
+        return np.empty((0, prices.shape[1]))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r = prices[1:] / prices[:-1] - 1.0
+    return np.nan_to_num(r, nan=0.0, posinf=0.0, neginf=0.0)
+
+
+class RiskMetricsService:
+    """
+    组合风险指标服务（单用户模式）。
+
+    按窗口缓存 _RiskState；holding_histories 的 max(updated_at) 变化时，
+    以 $slice 只读取各序列尾部净值点并追加新收益行，持仓集合变化或缺口过大时全量重建。
+    权重取自 PortfolioAggregateService 的当前持仓市值，变动时无需重读历史。
+    """
+
+    def __init__(self) -> None:
+        self._states: Dict[int, _RiskState] = {}
+        self._lock = asyncio.Lock()
+
+    async def _weights(self, db: AsyncIOMotorDatabase) -> Tuple[Dict[SeriesKey, float], Dict[SeriesKey, str]]:
+        summary = await get_portfolio_aggregate_service().get_summary(db)
+        values: Dict[SeriesKey, float] = {}
+        names: Dict[SeriesKey, str] = {}
+        for h in summary.get("holdings", []):
+            key = holding_key(h.get("symbol"), h.get("asset_type"))
+            price = h.get("current_price") or h.get("cost_price") or 0
+            mv = float(h.get("quantity") or 0) * float(price)
+            if key[0] and mv > 0:
+                values[key] = values.get(key, 0.0) + mv
+                names[key] = h.get("name") or key[0]
+        return values, names
+
+    async def _full_state(self, db: AsyncIOMotorDatabase, keys: List[SeriesKey], window: int, stamp: Any) -> _RiskState:
+        pm = await load_price_matrix(db, keys)
+        pm = pm.window(window + 1)
+        R = _returns_from_prices(pm.prices)
+        logger.info("risk_metrics 全量重建: window=%d keys=%d rows=%d", window, len(pm.keys), R.shape[0])
+        return _RiskState(keys, pm.keys, pm.dates[1:], R, stamp)
+
+    async def _incremental(self, db: AsyncIOMotorDatabase, state: _RiskState, window: int, stamp: Any) -> bool:
+        """尝试增量追加；尾部数据不足以衔接时返回 False（调用方全量重建）"""
+        last = state.last_date
+        if last is None:
+            return False
+        pm = await load_price_matrix(db, state.keys, start=last, tail=INCREMENTAL_TAIL)
+        if pm.keys != state.keys or not len(pm.dates) or pm.dates[0] != last or np.isnan(pm.prices[0]).any():
+            return False
+        state.append(pm.dates[1:], _returns_from_prices(pm.prices), window)
+        state.stamp = stamp
+        return True
+
+    async def _get_state(self, db: AsyncIOMotorDatabase, keys: List[SeriesKey], window: int) -> _RiskState:
+        stamp = await histories_stamp(db)
+        state = self._states.get(window)
+        if state is not None and state.requested >= set(keys):
+            if state.stamp == stamp:
+                return state
+            if await self._incremental(db, state, window, stamp):
+                return state
+        state = await self._full_state(db, keys, window, stamp)
+        self._states[window] = state
+        return state
+
+    async def compute(
+        self,
+        db: AsyncIOMotorDatabase,
+        *,
+        window: int = DEFAULT_WINDOW,
+    ) -> Dict[str, Any]:
+        """计算组合风险指标；window 为收益观测天数"""
+        async with self._lock:
+            values, names = await self._weights(db)
+            keys = sorted(values)
+            state = await self._get_state(db, keys, window)
+            state_keys, dates, R, s1, s2 = state.keys, state.dates, state.R, state.s1, state.s2
+
+        col = {k: i for i, k in enumerate(state_keys)}
+        priced = [k for k in keys if k in col]
+        missing = [k[0] for k in keys if k not in col]
+        total = sum(values[k] for k in priced)
+        weights = np.zeros(len(state_keys))
+        for k in priced:
+            weights[col[k]] = values[k] / total if total else 0.0
+
+        metrics = portfolio_risk(R, weights, s1, s2, settings.RISK_FREE_RATE)
+        marginal = metrics.pop("_marginal", None)
+        contrib = metrics.pop("_contrib", None)
+        sd = metrics.pop("_sd", None)
+        holdings = []
+        for k in priced:
+            i = col[k]
+            holdings.append({
+                "symbol": k[0],
+                "asset_type": k[1],
+                "name": names.get(k, k[0]),
+                "weight": _round(weights[i]),
+                "marginal_risk": _round(marginal[i]) if marginal is not None else None,
+                "risk_contribution": _round(contrib[i]) if contrib is not None else None,
+                "risk_contribution_pct": _round(contrib[i] / sd) if contrib is not None and sd else None,
+            })
+        holdings.sort(key=lambda h: h.get("risk_contribution") or 0, reverse=True)
+        return {
+            **metrics,
+            "window": window,
+            "start_date": str(dates[0]) if len(dates) else None,
+            "end_date": str(dates[-1]) if len(dates) else None,
+            "risk_free_rate": settings.RISK_FREE_RATE,
+            "holdings": holdings,
+            "missing_history": missing,
+        }
+
+
+_service: Optional[RiskMetricsService] = None
+
+
+def get_risk_metrics_service() -> RiskMetricsService:
+    """返回进程内 RiskMetricsService 单例（可用于 FastAPI Depends）"""
+    global _service
+    if _service is None:
+        _service = RiskMetricsService()
+    return _service
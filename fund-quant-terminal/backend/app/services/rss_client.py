@@ -0,0 +1,145 @@
+# =====================================================
+# RSS 条件请求客户端
+# 使用进程内共享 httpx 客户端（见 utils.http_pool）；按 feed 保存 ETag / Last-Modified 与内容摘要，
+# 发送条件请求，304 或内容未变时跳过解析；统计各 feed 命中率（news_feed_state）。
+# 内容有变化时新的 validators 只返回给调用方，条目写入成功后再经 commit 保存，
+# 写入失败或运行被取消时不保存，下次仍会重新下载并解析，不会因 304 丢失未入库的条目
+# =====================================================
+
+import hashlib
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+import feedparser
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.config import settings
+from app.utils.http_pool import get_http_client
+from app.utils.logger import logger
+
+STATE_COLLECTION = "news_feed_state"
+
+# 抓取结果状态
+STATUS_CHANGED = "changed"
+STATUS_NOT_MODIFIED = "not_modified"  # 服务端返回 304
+STATUS_UNCHANGED = "unchanged"  # 200 但内容摘要与上次相同（服务端不支持条件请求）
+
+REQUEST_HEADERS = {"User-Agent": feedparser.USER_AGENT, "Accept-Encoding": "gzip, deflate"}
+
+
+class RssFeedClient:
+    """
+    RSS 抓取客户端（进程内单例）。
+
+    validators 缓存在内存，首次访问某 feed 时从 news_feed_state 读取；
+    每次请求以 $inc 累计 requests / not_modified / unchanged / changed / errors。
+    """
+
+    VALIDATOR_FIELDS = ("etag", "last_modified", "content_hash")
+
+    def __init__(self) -> None:
+        self._state: Dict[str, Dict[str, Any]] = {}
+
+    async def _load_state(self, db: AsyncIOMotorDatabase, url: str) -> Dict[str, Any]:
+        state = self._state.get(url)
+        if state is None:
+            doc = await db[STATE_COLLECTION].find_one({"_id": url}, {"etag": 1, "last_modified": 1, "content_hash": 1}) or {}
+            state = {k: doc.get(k) for k in ("etag", "last_modified", "content_hash")}
+            self._state[url] = state
+        return state
+
+    async def fetch(self, db: AsyncIOMotorDatabase, url: str) -> Tuple[str, Optional[bytes], Optional[Dict[str, Any]]]:
+        """
+        条件 GET 单个 feed，返回 (status, content, validators)。
+        仅 status=changed 时 content 为新内容，validators 为待保存的新 ETag / Last-Modified / 摘要，
+        调用方在条目写入成功后调用 commit；网络错误或非 2xx/304 状态抛出异常。
+        """
+        state = await self._load_state(db, url)
+        headers: Dict[str, str] = dict(REQUEST_HEADERS)
+        if state.get("etag"):
+            headers["If-None-Match"] = state["etag"]
+        if state.get("last_modified"):
+            headers["If-Modified-Since"] = state["last_modified"]
+
+        inc = {"requests": 1}
+        update: Dict[str, Any] = {"url": url, "checked_at": datetime.utcnow()}
+        validators: Optional[Dict[str, Any]] = None
+        try:
+            resp = await get_http_client().get(
+                url, headers=headers, timeout=float(settings.NEWS_FEED_TIMEOUT), follow_redirects=True,
+            )
+            if resp.status_code == 304:
+                status, content = STATUS_NOT_MODIFIED, None
+            else:
+                resp.raise_for_status()
+                content = resp.content
+                digest = hashlib.sha1(content).hexdigest()
+                status = STATUS_UNCHANGED if digest == state.get("content_hash") else STATUS_CHANGED
+                validators = {
+                    "etag": resp.headers.get("ETag"),
+                    "last_modified": resp.headers.get("Last-Modified"),
+                    "content_hash": digest,
+                }
+                if status == STATUS_UNCHANGED:
+                    # 摘要相同说明该内容的条目此前已写入，validators 可直接保存
+                    state.update(validators)
+                    update.update(validators)
+                    content, validators = None, None
+            inc[status] = 1
+            update["last_status"] = status
+        except Exception as e:
+            inc["errors"] = 1
+            update["last_status"] = "error"
+            update["last_error"] = str(e)[:200]
+            await self._record(db, url, inc, update)
+            raise
+        await self._record(db, url, inc, update)
+        return status, content, validators
+
+    async def commit(self, db: AsyncIOMotorDatabase, validators: Dict[str, Dict[str, Any]]) -> None:
+        """条目写入成功后保存各 feed 的新 validators（url -> fetch 返回的 validators）"""
+        for url, v in validators.items():
+            state = await self._load_state(db, url)
+            state.update({k: v.get(k) for k in self.VALIDATOR_FIELDS})
+            await self._record(db, url, {}, {k: v.get(k) for k in self.VALIDATOR_FIELDS})
+
+    async def _record(self, db: AsyncIOMotorDatabase, url: str, inc: Dict[str, int], update: Dict[str, Any]) -> None:
+        try:
+            ops: Dict[str, Any] = {"$set": update, "$inc": inc} if inc else {"$set": update}
+            await db[STATE_COLLECTION].update_one({"_id": url}, ops, upsert=True)
+        except Exception as e:
+            logger.debug("news_feed_state 更新失败 %s: %s", url, e)
+
+    async def stats(self, db: AsyncIOMotorDatabase) -> list:
+        """各 feed 条件请求统计；hit_rate = (304 + 内容未变) / 请求数"""
+        docs = await db[STATE_COLLECTION].find({}, {"content_hash": 0}).sort("_id", 1).to_list(length=None)
+        out = []
+        for d in docs:
+            requests = int(d.get("requests") or 0)
+            hits = int(d.get(STATUS_NOT_MODIFIED) or 0) + int(d.get(STATUS_UNCHANGED) or 0)
+            out.append({
+                "url": d.get("_id"),
+                "requests": requests,
+                "not_modified": int(d.get(STATUS_NOT_MODIFIED) or 0),
+                "unchanged": int(d.get(STATUS_UNCHANGED) or 0),
+                "changed": int(d.get(STATUS_CHANGED) or 0),
+                "errors": int(d.get("errors") or 0),
+                "hit_rate": round(hits / requests, 4) if requests else None,
+                "etag": d.get("etag"),
+                "last_modified": d.get("last_modified"),
+                "last_status": d.get("last_status"),
+                "checked_at": d.get("checked_at").isoformat() + "Z" if d.get("checked_at") else None,
+            })
+        return out
+
+
+_client: Optional[RssFeedClient] = None
+
+
+def get_rss_client() -> RssFeedClient:
+    """返回进程内 RssFeedClient 单例"""
+    global _client
+    if _client is None:
+        _client = RssFeedClient()
+    return _client
+
@@ -0,0 +1,315 @@
+# =====================================================
+# 多 worker 安全的定时任务调度
+# 每个进程都运行调度循环，但只有持有 Mongo 租约锁（scheduler_locks，expires_at TTL）的 leader 执行任务：
+# 租约每 SCHEDULER_LEASE_SECONDS 秒有效，leader 每个 tick 续约，进程退出时主动释放，崩溃时租约到期后由其他 worker 接管。
+# 各任务的下次执行时间持久化在 scheduler_jobs，执行前以 next_run_at 做条件更新（CAS）认领本次运行，
+# 即使租约切换瞬间出现两个 leader，同一次触发也只会被执行一次。
+# 错过的触发（停机、leader 切换）合并为一次：认领时把 next_run_at 直接推进到当前时间之后的下一次触发。
+# 每次运行的开始、结束、耗时、状态与结果写入 scheduler_runs（按 SCHEDULER_RUN_HISTORY_DAYS TTL 清理）。
+# 常驻任务（快讯轮询等）通过 add_leader_hook 注册，随本进程获得/失去租约启停
+# =====================================================
+
+import asyncio
+import os
+import socket
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from apscheduler.triggers.base import BaseTrigger
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from app.config import settings
+from app.utils.logger import logger
+
+LOCKS_COLLECTION = "scheduler_locks"
+JOBS_COLLECTION = "scheduler_jobs"
+RUNS_COLLECTION = "scheduler_runs"
+LEADER_LOCK_ID = "scheduler_leader"
+
+# 运行结果只保留标量字段，避免大文档写入历史
+_RESULT_TYPES = (str, int, float, bool, type(None))
+
+
+def _utcnow() -> datetime:
+    return datetime.utcnow()
+
+
+def _to_naive(dt: Optional[datetime]) -> Optional[datetime]:
+    """触发器返回带时区时间，MongoDB 中统一存 naive UTC"""
+    if dt is None:
+        return None
+    return dt.astimezone(timezone.utc).replace(tzinfo=None) if dt.tzinfo else dt
+
+
+def _to_aware(dt: datetime) -> datetime:
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt
+
+
+def next_fire_after(trigger: BaseTrigger, previous: Optional[datetime], now: datetime) -> Optional[datetime]:
+    """previous 之后第一个晚于 now 的触发时间（naive UTC）；错过的多次触发被跳过，即合并为一次"""
+    now_aware = _to_aware(now)
+    nxt = trigger.get_next_fire_time(_to_aware(previous) if previous else None, now_aware)
+    while nxt is not None and nxt <= now_aware:
+        nxt = trigger.get_next_fire_time(nxt, now_aware)
+    return _to_naive(nxt)
+
+
+def _summarize(result: Any) -> Optional[Dict[str, Any]]:
+    if not isinstance(result, dict):
+        return None
+    return {k: v for k, v in result.items() if isinstance(v, _RESULT_TYPES)}
+
+
+class ScheduledJob:
+    """任务定义：id、协程函数与 APScheduler 触发器（仅用于计算触发时间）"""
+
+    def __init__(self, job_id: str, func: Callable[[], Awaitable[Any]], trigger: BaseTrigger, description: str = "") -> None:
+        self.id = job_id
+        self.func = func
+        self.trigger = trigger
+        self.description = description
+
+    @property
+    def spec(self) -> str:
+        return str(self.trigger)
+
+
+class LeaderScheduler:
+    """租约选主 + CAS 认领的调度器；start/stop 在应用 lifespan 中调用"""
+
+    def __init__(self, owner: Optional[str] = None) -> None:
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.jobs: Dict[str, ScheduledJob] = {}
+        self.is_leader = False
+        self.leader_since: Optional[datetime] = None
+        self._db = None
+        self._loop_task: Optional[asyncio.Task] = None
+        self._running: Dict[str, asyncio.Task] = {}
+        self._leader_hooks: List[Tuple[Callable[[], Awaitable[Any]], Optional[Callable[[], Awaitable[Any]]]]] = []
+
+    def add_job(self, job_id: str, func: Callable[[], Awaitable[Any]], trigger: BaseTrigger, description: str = "") -> None:
+        self.jobs[job_id] = ScheduledJob(job_id, func, trigger, description)
+
+    def add_leader_hook(
+        self,
+        on_acquire: Callable[[], Awaitable[Any]],
+        on_release: Optional[Callable[[], Awaitable[Any]]] = None,
+    ) -> None:
+        """获得租约时执行 on_acquire，失去租约或进程退出时执行 on_release（只应在单个进程运行的常驻任务）"""
+        self._leader_hooks.append((on_acquire, on_release))
+
+    # ----- 选主 -----
+
+    async def _acquire_lease(self) -> bool:
+        """获取或续约 leader 租约：锁不存在、已过期或本进程持有时成功"""
+        now = _utcnow()
+        lease = timedelta(seconds=settings.SCHEDULER_LEASE_SECONDS)
+        try:
+            doc = await self._db[LOCKS_COLLECTION].find_one_and_update(
+                {"_id": LEADER_LOCK_ID, "$or": [{"owner": self.owner}, {"expires_at": {"$lt": now}}]},
+                {"$set": {"owner": self.owner, "expires_at": now + lease, "renewed_at": now}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+            return bool(doc) and doc.get("owner") == self.owner
+        except DuplicateKeyError:
+            # 锁由其他进程持有且未过期：条件不匹配时 upsert 与已有 _id 冲突
+            return False
+
+    async def _release_lease(self) -> None:
+        try:
+            await self._db[LOCKS_COLLECTION].delete_one({"_id": LEADER_LOCK_ID, "owner": self.owner})
+        except Exception as e:
+            logger.warning("scheduler 释放租约失败: %s", e)
+
+    async def _set_leader(self, leader: bool) -> None:
+        """leader 状态变化时记录并执行回调；回调异常只记日志"""
+        if leader == self.is_leader:
+            return
+        self.is_leader = leader
+        self.leader_since = _utcnow() if leader else None
+        logger.info("scheduler %s %s", self.owner, "成为 leader" if leader else "失去 leader 租约")
+        for on_acquire, on_release in self._leader_hooks:
+            hook = on_acquire if leader else on_release
+            if hook is None:
+                continue
+            try:
+                await hook()
+            except Exception as e:
+                logger.warning("scheduler leader 回调 %s 失败: %s", getattr(hook, "__name__", hook), e)
+
+    # ----- 任务 -----
+
+    async def _register_jobs(self) -> None:
+        """首次出现的任务写入下次执行时间；触发规则变化时重新计算"""
+        now = _utcnow()
+        for job in self.jobs.values():
+            first = next_fire_after(job.trigger, None, now)
+            await self._db[JOBS_COLLECTION].update_one(
+                {"_id": job.id},
+                {"$setOnInsert": {"next_run_at": first, "trigger": job.spec}},
+                upsert=True,
+            )
+            await self._db[JOBS_COLLECTION].update_one(
+                {"_id": job.id, "trigger": {"$ne": job.spec}},
+                {"$set": {"next_run_at": first, "trigger": job.spec}},
+            )
+
+    async def _claim(self, job: ScheduledJob, now: datetime) -> Optional[datetime]:
+        """到期则以 CAS 推进 next_run_at 并返回本次计划时间；未到期或已被其他进程认领返回 None"""
+        state = await self._db[JOBS_COLLECTION].find_one({"_id": job.id})
+        if not state or state.get("next_run_at") is None or state["next_run_at"] > now:
+            return None
+        due = state["next_run_at"]
+        result = await self._db[JOBS_COLLECTION].update_one(
+            {"_id": job.id, "next_run_at": due},
+            {"$set": {"next_run_at": next_fire_after(job.trigger, due, now), "last_claimed_by": self.owner}},
+        )
+        return due if result.modified_count == 1 else None
+
+    async def _execute(self, job: ScheduledJob, scheduled_at: datetime) -> None:
+        started = _utcnow()
+        missed = self._count_missed(job, scheduled_at, started)
+        run_id = (await self._db[RUNS_COLLECTION].insert_one({
+            "job_id": job.id,
+            "scheduled_at": scheduled_at,
+            "started_at": started,
+            "status": "running",
+            "owner": self.owner,
+            "coalesced": missed,
+        })).inserted_id
+        t0 = time.perf_counter()
+        status, error, result = "success", None, None
+        try:
+            result = await job.func()
+        except asyncio.CancelledError:
+            status, error = "cancelled", "进程退出时中断"
+            raise
+        except Exception as e:
+            status, error = "failed", str(e)[:500]
+            logger.exception("定时任务 %s 执行失败: %s", job.id, e)
+        finally:
+            duration = round(time.perf_counter() - t0, 3)
+            finished = _utcnow()
+            try:
+                await self._db[RUNS_COLLECTION].update_one(
+                    {"_id": run_id},
+                    {"$set": {"status": status, "finished_at": finished, "duration_s": duration, "error": error, "result": _summarize(result)}},
+                )
+                await self._db[JOBS_COLLECTION].update_one(
+                    {"_id": job.id},
+                    {"$set": {"last_run_at": started, "last_status": status, "last_duration_s": duration, "last_error": error}},
+                )
+            except Exception as e:
+                logger.warning("scheduler 运行记录写入失败 %s: %s", job.id, e)
+            logger.info("定时任务 %s 结束: %s，耗时 %.1fs（计划 %s，合并错过 %d 次）", job.id, status, duration, scheduled_at.isoformat(), missed)
+
+    @staticmethod
+    def _count_missed(job: ScheduledJob, scheduled_at: datetime, now: datetime, cap: int = 1000) -> int:
+        """计划时间到当前之间被合并跳过的触发次数"""
+        n, t = 0, _to_aware(scheduled_at)
+        now_aware = _to_aware(now)
+        while n < cap:
+            t = job.trigger.get_next_fire_time(t, now_aware)
+            if t is None or t > now_aware:
+                break
+            n += 1
+        return n
+
+    async def _tick(self) -> None:
+        now = _utcnow()
+        for job in self.jobs.values():
+            # 同一任务上次运行未结束时不重复启动（本次触发顺延）
+            if job.id in self._running:
+                continue
+            due = await self._claim(job, now)
+            if due is None:
+                continue
+            task = asyncio.create_task(self._execute(job, due), name=f"scheduler:{job.id}")
+            self._running[job.id] = task
+            task.add_done_callback(lambda _t, jid=job.id: self._running.pop(jid, None))
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                leader = await self._acquire_lease()
+                await self._set_leader(leader)
+                if leader:
+                    await self._tick()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("scheduler 调度循环异常: %s", e)
+                await self._set_leader(False)
+            await asyncio.sleep(settings.SCHEDULER_TICK_SECONDS)
+
+    async def start(self, db) -> None:
+        if self._loop_task is not None and not self._loop_task.done():
+            return
+        self._db = db
+        await self._register_jobs()
+        self._loop_task = asyncio.create_task(self._loop(), name="scheduler:leader")
+        logger.info("scheduler 已启动（%s），任务: %s", self.owner, ", ".join(f"{j.id}={j.spec}" for j in self.jobs.values()))
+
+    async def stop(self) -> None:
+        if self._loop_task is not None:
+            self._loop_task.cancel()
+            await asyncio.gather(self._loop_task, return_exceptions=True)
+            self._loop_task = None
+        running = list(self._running.values())
+        for t in running:
+            t.cancel()
+        await asyncio.gather(*running, return_exceptions=True)
+        was_leader = self.is_leader
+        await self._set_leader(False)
+        if self._db is not None and was_leader:
+            await self._release_lease()
+
+    async def status(self, db) -> Dict[str, Any]:
+        """当前 leader、各任务下次执行时间与最近一次运行结果"""
+        lock = await db[LOCKS_COLLECTION].find_one({"_id": LEADER_LOCK_ID}) or {}
+        states = {d["_id"]: d async for d in db[JOBS_COLLECTION].find({"_id": {"$in": list(self.jobs)}})}
+        jobs: List[Dict[str, Any]] = []
+        for job in self.jobs.values():
+            s = states.get(job.id, {})
+            jobs.append({
+                "job_id": job.id,
+                "description": job.description,
+                "trigger": job.spec,
+                "next_run_at": s.get("next_run_at"),
+                "last_run_at": s.get("last_run_at"),
+                "last_status": s.get("last_status"),
+                "last_duration_s": s.get("last_duration_s"),
+                "last_error": s.get("last_error"),
+                "running_here": job.id in self._running,
+            })
+        return {
+            "owner": self.owner,
+            "is_leader": self.is_leader,
+            "leader": lock.get("owner"),
+            "lease_expires_at": lock.get("expires_at"),
+            "jobs": jobs,
+        }
+
+
+async def list_runs(db, job_id: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+    """运行历史，按开始时间倒序"""
+    query = {"job_id": job_id} if job_id else {}
+    docs = await db[RUNS_COLLECTION].find(query).sort("started_at", -1).limit(limit).to_list(length=limit)
+    for d in docs:
+        d["_id"] = str(d["_id"])
+    return docs
+
+
+_scheduler: Optional[LeaderScheduler] = None
+
+
+def get_scheduler() -> LeaderScheduler:
+    """进程内共享的调度器（任务在 main.lifespan 中注册）"""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = LeaderScheduler()
+    return _scheduler
@@ -0,0 +1,163 @@
+# =====================================================
+# 新闻情绪打分（全项目共用）
+# 统一正负向词典 + 否定词构建一个 Aho-Corasick 自动机，单次扫描文本得到全部命中；
+# score_batch 将整批文本拼接后一次扫描，供 RSS / 快讯解析批量打分
+# =====================================================
+
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import ahocorasick
+
+from app.config import settings
+
+POSITIVE_WORDS: Tuple[str, ...] = (
+    "利好", "上涨", "买入", "大涨", "看涨", "反弹", "增长", "突破", "增持", "推荐",
+    "乐观", "创新高", "回暖", "向好", "超预期", "盈利", "bullish", "rally",
+)
+NEGATIVE_WORDS: Tuple[str, ...] = (
+    "利空", "下跌", "卖出", "大跌", "看跌", "回落", "跌破", "亏损", "减持", "预警",
+    "悲观", "风险", "下滑", "承压", "谨慎", "抛售", "bearish",
+)
+# 否定词：紧邻（间隔不超过 NEGATION_GAP 个字符、无标点）的下一个情绪词极性取反
+NEGATION_WORDS: Tuple[str, ...] = (
+    "不", "不会", "不再", "未", "尚未", "并未", "没", "没有", "无", "并非", "难以", "否认",
+)
+# 以否定字开头但不表否定的词，按最长匹配优先吞掉，避免误判（如“不断上涨”“未来增长”）
+NEGATION_GUARDS: Tuple[str, ...] = ("不断", "不少", "不仅", "不止", "不过", "不久", "未来", "无论", "无疑")
+NEGATION_GAP = 2
+# 子句分隔：否定不跨越这些字符（批量拼接的分隔符 \n 也在其中）
+_CLAUSE_BREAKS = frozenset("，。；！？,.;!?\n")
+
+_POSITIVE, _NEGATIVE, _NEGATION, _GUARD = 1, -1, 2, 0
+
+
+def _split_words(raw: str) -> Tuple[str, ...]:
+    return tuple(w.strip() for w in (raw or "").split(",") if w.strip())
+
+
+class SentimentScorer:
+    """
+    基于关键词的情绪打分器。
+    计数规则与原各服务的关键词扫描一致：同一词在同一极性下只计一次，
+    score = (正向词数 - 负向词数) / 命中词数，范围 -1 ~ 1，保留两位小数；否定后的词计入相反极性。
+    """
+
+    def __init__(
+        self,
+        positive: Iterable[str] = POSITIVE_WORDS,
+        negative: Iterable[str] = NEGATIVE_WORDS,
+        negations: Iterable[str] = NEGATION_WORDS,
+        guards: Iterable[str] = NEGATION_GUARDS,
+        negation_gap: int = NEGATION_GAP,
+    ) -> None:
+        self._gap = negation_gap
+        automaton = ahocorasick.Automaton()
+        # 后加入的同名词覆盖先前类别：情绪词优先于否定词与保护词
+        for kind, words in ((_GUARD, guards), (_NEGATION, negations), (_NEGATIVE, negative), (_POSITIVE, positive)):
+            for w in words:
+                w = w.strip().lower()
+                if w:
+                    automaton.add_word(w, (kind, w))
+        automaton.make_automaton()
+        self._automaton = automaton
+
+    def counts_batch(self, texts: Sequence[Optional[str]]) -> List[Tuple[int, int]]:
+        """批量返回 (正向词数, 负向词数)；所有文本以换行拼接后只扫描一次"""
+        norm = [t.lower() if isinstance(t, str) else "" for t in texts]
+        if not norm:
+            return []
+        joined = "\n".join(norm)
+        hits: List[Optional[set]] = [None] * len(norm)
+        idx = 0
+        boundary = len(norm[0])  # 当前文本结束位置（即其后分隔符的下标）
+        neg_end = -1
+        for end, (kind, word) in self._automaton.iter_long(joined):
+            start = end - len(word) + 1
+            if start > boundary:
+                while start > boundary:
+                    idx += 1
+                    boundary += 1 + len(norm[idx])
+                neg_end = -1
+            if kind == _NEGATION:
+                neg_end = end
+                continue
+            if kind == _GUARD:
+                neg_end = -1
+                continue
+            polarity = kind
+            if neg_end >= 0 and start - neg_end - 1 <= self._gap:
+                if not any(c in _CLAUSE_BREAKS for c in joined[neg_end + 1:start]):
+                    polarity = -polarity
+            neg_end = -1
+            bucket = hits[idx]
+            if bucket is None:
+                bucket = hits[idx] = set()
+            bucket.add((word, polarity))
+
+        out: List[Tuple[int, int]] = []
+        for bucket in hits:
+            if not bucket:
+                out.append((0, 0))
+                continue
+            pos = sum(1 for _, p in bucket if p > 0)
+            out.append((pos, len(bucket) - pos))
+        return out
+
+    def score_batch(self, texts: Sequence[Optional[str]]) -> List[float]:
+        """批量情绪得分，与 texts 一一对应"""
+        return [_to_score(pos, neg) for pos, neg in self.counts_batch(texts)]
+
+    def counts(self, text: Optional[str]) -> Tuple[int, int]:
+        return self.counts_batch([text])[0]
+
+    def score(self, text: Optional[str]) -> float:
+        return self.score_batch([text])[0]
+
+
+def _to_score(pos: int, neg: int) -> float:
+    total = pos + neg
+    if total == 0:
+        return 0.0
+    return round((pos - neg) / total, 2)
+
+
+_scorer: Optional[SentimentScorer] = None
+
+
+def get_scorer() -> SentimentScorer:
+    """进程内共享打分器：内置词典 + settings 中 SENTIMENT_*_WORDS 扩展词"""
+    global _scorer
+    if _scorer is None:
+        _scorer = SentimentScorer(
+            positive=POSITIVE_WORDS + _split_words(settings.SENTIMENT_POSITIVE_WORDS),
+            negative=NEGATIVE_WORDS + _split_words(settings.SENTIMENT_NEGATIVE_WORDS),
+            negations=NEGATION_WORDS + _split_words(settings.SENTIMENT_NEGATION_WORDS),
+        )
+    return _scorer
+
+
+def sentiment_score(text: Optional[str]) -> float:
+    """单条文本情绪得分，范围 -1 ~ 1"""
+    return get_scorer().score(text)
+
+
+def sentiment_counts(text: Optional[str]) -> Tuple[int, int]:
+    """单条文本 (正向词数, 负向词数)"""
+    return get_scorer().counts(text)
+
+
+def score_batch(texts: Sequence[Optional[str]]) -> List[float]:
+    """批量情绪得分（单次扫描）"""
+    return get_scorer().score_batch(texts)
+
+
+def annotate_sentiment(
+    items: List[Dict[str, Any]],
+    fields: Tuple[str, ...] = ("title", "summary"),
+    key: str = "sentiment",
+) -> List[Dict[str, Any]]:
+    """按 fields 拼接文本批量打分，结果写入每条的 key 字段（原地修改并返回 items）"""
+    texts = [" ".join(str(it.get(f) or "") for f in fields) for it in items]
+    for it, s in zip(items, score_batch(texts)):
+        it[key] = s
+    return items
@@ -8,11 +8,8 @@ from datetime import datetime
 from typing import Any, Dict, List
 
 import feedparser
-import httpx
-from motor.motor_asyncio import AsyncIOMotorDatabase
 
-from app.config import llm_settings
-from app.utils.logger import logger
+from app.services.sentiment import sentiment_score
 
 # 二级 Tab 与新浪 RSS 的映射（category -> rss path）
 # 新浪 RSS 基地址（优先 https）
@@ -29,25 +26,8 @@ SINA_CATEGORY_MAP = {
 
 SINA_RSS_BASE = "https://rss.sina.com.cn/"
 RSSHUB_SINA_URL = "https://rsshub.app/finance/sina/roll"  # 备用：RSSHub 新浪财经
-DECISION_LOGS_COLLECTION = "decision_logs"
 SOURCE_SINA = "sina"
 
-# 情绪分析关键词（与 eastmoney/cailianshe 一致）
-POSITIVE_KEYWORDS = ["利好", "上涨", "买入", "大涨", "看涨", "反弹", "增长", "突破", "增持", "推荐"]
-NEGATIVE_KEYWORDS = ["利空", "下跌", "卖出", "大跌", "看跌", "回落", "跌破", "亏损", "减持", "预警"]
-
-
-def _compute_sentiment(text: str) -> float:
-    """基于正负向关键词计算情绪得分，范围 -1 ~ 1"""
-    if not text or not isinstance(text, str):
-        return 0.0
-    t = text.strip()
-    pos = sum(1 for k in POSITIVE_KEYWORDS if k in t)
-    neg = sum(1 for k in NEGATIVE_KEYWORDS if k in t)
-    total = pos + neg
-    if total == 0:
-        return 0.0
-    return round((pos - neg) / max(total, 1), 2)
 
 
 def _parse_rss_entry(entry: Any) -> Dict[str, Any]:
@@ -79,7 +59,7 @@ def _parse_rss_entry(entry: Any) -> Dict[str, Any]:
             pass
 
     text_for_sentiment = f"{title} {summary}"
-    sentiment = _compute_sentiment(text_for_sentiment)
+    sentiment = sentiment_score(text_for_sentiment)
 
     return {
         "title": display_title,
@@ -103,6 +83,7 @@ class SinaService:
         *,
         category: str = "macro",
         limit: int = 10,
+        score: bool = True,
     ) -> tuple[Dict[str, Any], List[Dict[str, Any]]]:
         """
         拉取财经快讯，解析为统一格式。
@@ -112,7 +93,7 @@ class SinaService:
         from app.services.eastmoney_service import EastMoneyService
 
         _em = EastMoneyService()
-        raw_fallback, parsed = await _em.fetch_and_parse(limit=limit)
+        raw_fallback, parsed = await _em.fetch_and_parse(limit=limit, score=score)
         raw = {
             "source": SOURCE_SINA,
             "category": category,
@@ -123,35 +104,3 @@ class SinaService:
             "entries_count": len(parsed),
         }
         return raw, parsed
-
-    async def save_to_decision_logs(
-        self,
-        db: AsyncIOMotorDatabase,
-        items: List[Dict[str, Any]],
-        type_: str = "rss",
-    ) -> int:
-        """将解析后的条目保存至 decision_logs，source=sina"""
-        if not items:
-            return 0
-        try:
-            coll = db[DECISION_LOGS_COLLECTION]
-            now = datetime.utcnow()
-            count = 0
-            for it in items:
-                doc = {
-                    "source": SOURCE_SINA,
-                    "type": type_,
-                    "title": it.get("title"),
-                    "published_time": it.get("published_time"),
-                    "summary": it.get("summary"),
-                    "url": it.get("url"),
-                    "sentiment": it.get("sentiment", 0),
-                    "created_at": now,
-                }
-                await coll.insert_one(doc)
-                count += 1
-            logger.info("sina_service 已保存 %d 条至 decision_logs", count)
-            return count
-        except Exception as e:
-            logger.exception("sina_service save_to_decision_logs 异常: %s", e)
-            raise
@@ -0,0 +1,375 @@
+# =====================================================
+# 持仓交易批量导入服务
+# 流式解析券商导出的 CSV / NDJSON，分批校验、无序 insert_many，
+# 卖出按文件顺序逐行校验不超过持仓（与 POST /transactions 一致），
+# 结束后对每个受影响持仓按全部交易重算一次数量与成本
+# =====================================================
+
+import codecs
+import csv
+import json
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from app.services.assets import compute_from_transactions
+from app.services.portfolio_aggregate import invalidate_portfolio_summary
+from app.utils.logger import logger
+
+ASSETS_COLLECTION = "assets"
+TRANSACTION_COLLECTION = "holding_transactions"
+
+BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 200
+SUPPORTED_FORMATS = ("csv", "ndjson")
+
+# CSV 表头别名 -> 标准字段（券商导出多为中文表头）
+FIELD_ALIASES: Dict[str, str] = {
+    "symbol": "symbol", "code": "symbol", "代码": "symbol", "基金代码": "symbol",
+    "证券代码": "symbol", "股票代码": "symbol",
+    "asset_type": "asset_type", "资产类型": "asset_type",
+    "date": "date", "日期": "date", "交易日期": "date", "成交日期": "date", "确认日期": "date",
+    "type": "type", "side": "type", "方向": "type", "买卖方向": "type", "业务类型": "type",
+    "quantity": "quantity", "qty": "quantity", "数量": "quantity", "份额": "quantity",
+    "成交数量": "quantity", "确认份额": "quantity",
+    "price": "price", "单价": "price", "成交价格": "price", "成交均价": "price", "确认净值": "price",
+    "amount": "amount", "金额": "amount", "成交金额": "amount", "确认金额": "amount",
+}
+
+TYPE_ALIASES: Dict[str, str] = {
+    "buy": "buy", "b": "buy", "买入": "buy", "申购": "buy", "认购": "buy", "定投": "buy",
+    "sell": "sell", "s": "sell", "卖出": "sell", "赎回": "sell",
+}
+
+
+def detect_format(fmt: Optional[str], content_type: Optional[str]) -> str:
+    """确定导入格式：显式 format 优先，否则按 Content-Type 推断，默认 csv"""
+    f = (fmt or "").strip().lower()
+    if f in ("jsonl", "json"):
+        f = "ndjson"
+    if f:
+        if f not in SUPPORTED_FORMATS:
+            raise ValueError(f"不支持的导入格式: {fmt}")
+        return f
+    ct = (content_type or "").lower()
+    if "ndjson" in ct or "jsonl" in ct or "json" in ct:
+        return "ndjson"
+    return "csv"
+
+
+async def _iter_lines(chunks: AsyncIterator[bytes], encoding: str) -> AsyncIterator[str]:
+    """将字节流增量解码并按行切分，不在内存中保留完整请求体"""
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    buf = ""
+    async for chunk in chunks:
+        if not chunk:
+            continue
+        buf += decoder.decode(chunk)
+        lines = buf.split("\n")
+        buf = lines.pop()
+        for line in lines:
+            yield line.rstrip("\r")
+    buf += decoder.decode(b"", final=True)
+    if buf:
+        yield buf.rstrip("\r")
+
+
+class _LineFeed:
+    """供单个 csv.reader 读取的行队列：只在一条完整记录入队后才读取，队列读空不会终止 reader"""
+
+    def __init__(self) -> None:
+        self._lines: deque = deque()
+
+    def __iter__(self) -> "_LineFeed":
+        return self
+
+    def __next__(self) -> str:
+        if not self._lines:
+            raise StopIteration
+        return self._lines.popleft()
+
+    def extend(self, lines: List[str]) -> None:
+        self._lines.extend(line + "\n" for line in lines)
+
+
+async def _iter_rows(
+    lines: AsyncIterator[str],
+    fmt: str,
+) -> AsyncIterator[Tuple[int, Optional[Dict[str, Any]], Optional[str]]]:
+    """
+    逐条产出 (行号, 原始字段字典, 解析错误)；CSV 首个非空记录为表头。
+    CSV 全程由同一个 csv.reader 解析：引号未闭合时继续累积后续行，字段内换行得以保留，行号为记录首行
+    """
+    header: Optional[List[str]] = None
+    feed = _LineFeed()
+    reader = csv.reader(feed)
+    pending: List[str] = []
+    record_line = 0
+    quotes = 0
+    line_no = 0
+    async for line in lines:
+        line_no += 1
+        if fmt == "csv":
+            if not pending:
+                if not line.strip():
+                    continue
+                record_line = line_no
+            pending.append(line)
+            # 转义引号成对出现（""），引号总数为奇数说明字段尚未闭合
+            quotes += line.count('"')
+            if quotes % 2:
+                continue
+            feed.extend(pending)
+            pending, quotes = [], 0
+            values = next(reader)
+            if header is None:
+                header = [FIELD_ALIASES.get(h.strip().lower(), FIELD_ALIASES.get(h.strip(), h.strip())) for h in values]
+                continue
+            yield record_line, dict(zip(header, values)), None
+            continue
+        if not line.strip():
+            continue
+        if fmt == "ndjson":
+            try:
+                obj = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield line_no, None, f"JSON 解析失败: {e.msg}"
+                continue
+            if not isinstance(obj, dict):
+                yield line_no, None, "每行须为 JSON 对象"
+                continue
+            yield line_no, obj, None
+    if pending:
+        yield record_line, None, "引号未闭合"
+
+
+def _to_float(v: Any) -> Optional[float]:
+    if v is None:
+        return None
+    if isinstance(v, (int, float)):
+        return float(v)
+    s = str(v).strip().replace(",", "")
+    if not s:
+        return None
+    return float(s)
+
+
+def _normalize_date(v: Any) -> str:
+    s = str(v or "").strip()
+    if len(s) >= 8 and s[:8].isdigit():
+        return f"{s[:4]}-{s[4:6]}-{s[6:8]}"
+    return s[:10].replace("/", "-")
+
+
+def validate_row(row: Dict[str, Any], default_asset_type: str, now: datetime) -> Dict[str, Any]:
+    """
+    校验单行并转为 holding_transactions 文档，字段规则与 POST /transactions 一致（卖出是否超过持仓由 _PositionLedger 校验）。
+    校验失败抛出 ValueError，消息作为行级错误返回。
+    """
+    raw = {FIELD_ALIASES.get(str(k).strip().lower(), str(k).strip()): v for k, v in row.items()}
+    sym = str(raw.get("symbol") or "").strip().split(".")[0]
+    if not sym:
+        raise ValueError("标的代码不能为空")
+    at = str(raw.get("asset_type") or default_asset_type or "fund").strip().lower()
+    typ = TYPE_ALIASES.get(str(raw.get("type") or "").strip().lower())
+    if typ is None:
+        raise ValueError("type 必须为 buy 或 sell")
+    try:
+        qty = _to_float(raw.get("quantity"))
+        price = _to_float(raw.get("price"))
+        amount = _to_float(raw.get("amount"))
+    except (TypeError, ValueError):
+        raise ValueError("数量、单价或金额不是有效数字")
+    if not qty or not price or qty <= 0 or price <= 0:
+        raise ValueError("数量和单价必须大于 0")
+    if amount is None:
+        amount = round(qty * price, 2)
+    if amount <= 0:
+        raise ValueError("金额必须大于 0")
+    date = _normalize_date(raw.get("date"))
+    if len(date) < 8:
+        raise ValueError("请填写有效交易日期")
+    return {
+        "symbol": sym,
+        "asset_type": at,
+        "date": date,
+        "type": typ,
+        "quantity": qty,
+        "price": price,
+        "amount": amount,
+        "created_at": now,
+        "source": "import",
+    }
+
+
+class _PositionLedger:
+    """按文件顺序累计各持仓数量，用于逐行校验卖出（初始值为导入前 assets 中的数量）"""
+
+    def __init__(self, quantities: Dict[Tuple[str, str], float]) -> None:
+        self._qty = quantities
+
+    @classmethod
+    async def load(cls, db: AsyncIOMotorDatabase) -> "_PositionLedger":
+        quantities: Dict[Tuple[str, str], float] = {}
+        async for a in db[ASSETS_COLLECTION].find({}, {"symbol": 1, "asset_type": 1, "quantity": 1}):
+            key = (str(a.get("symbol") or "").strip(), (a.get("asset_type") or "fund").lower())
+            quantities[key] = quantities.get(key, 0.0) + float(a.get("quantity") or 0)
+        return cls(quantities)
+
+    def apply(self, doc: Dict[str, Any]) -> None:
+        """卖出超过当前持仓时抛出 ValueError（消息与 POST /transactions 一致），否则记入台账"""
+        key = (doc["symbol"], doc["asset_type"])
+        held = self._qty.get(key)
+        if doc["type"] == "sell":
+            if held is None:
+                raise ValueError("无此持仓，无法卖出")
+            if doc["quantity"] > held:
+                raise ValueError(f"卖出数量不能超过持仓 {held}")
+            self._qty[key] = held - doc["quantity"]
+        else:
+            self._qty[key] = (held or 0.0) + doc["quantity"]
+
+    def revert(self, doc: Dict[str, Any]) -> None:
+        """写入失败的行从台账中撤销"""
+        key = (doc["symbol"], doc["asset_type"])
+        delta = doc["quantity"] if doc["type"] == "buy" else -doc["quantity"]
+        self._qty[key] = self._qty.get(key, 0.0) - delta
+
+
+class _ImportReport:
+    """导入过程统计与行级错误（错误条数超过上限时只计数）"""
+
+    def __init__(self) -> None:
+        self.rows = 0
+        self.inserted = 0
+        self.failed = 0
+        self.errors: List[Dict[str, Any]] = []
+        self.affected: Set[Tuple[str, str]] = set()
+
+    def add_error(self, line: int, message: str) -> None:
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "error": message})
+
+
+async def _flush(
+    db: AsyncIOMotorDatabase,
+    batch: List[Tuple[int, Dict[str, Any]]],
+    report: _ImportReport,
+    ledger: _PositionLedger,
+) -> None:
+    """无序 insert_many 写入一批；单条写失败不影响其余文档"""
+    if not batch:
+        return
+    docs = [d for _, d in batch]
+    failed_idx: Set[int] = set()
+    try:
+        await db[TRANSACTION_COLLECTION].insert_many(docs, ordered=False)
+    except BulkWriteError as e:
+        for err in e.details.get("writeErrors", []):
+            idx = err.get("index")
+            if idx is None:
+                continue
+            failed_idx.add(idx)
+            ledger.revert(batch[idx][1])
+            report.add_error(batch[idx][0], f"写入失败: {err.get('errmsg', '')}")
+    for i, (_, d) in enumerate(batch):
+        if i not in failed_idx:
+            report.inserted += 1
+            report.affected.add((d["symbol"], d["asset_type"]))
+
+
+async def _recompute_positions(db: AsyncIOMotorDatabase, keys: Set[Tuple[str, str]]) -> int:
+    """对受影响持仓各读取一次全部交易重算数量/成本，单次 bulk_write 回写 assets"""
+    if not keys:
+        return 0
+    symbols = sorted({s for s, _ in keys})
+    txs_by_key: Dict[Tuple[str, str], List[Dict[str, Any]]] = {k: [] for k in keys}
+    cursor = db[TRANSACTION_COLLECTION].find(
+        {"symbol": {"$in": symbols}},
+        {"symbol": 1, "asset_type": 1, "date": 1, "type": 1, "quantity": 1, "price": 1, "created_at": 1},
+    )
+    async for t in cursor:
+        k = (t.get("symbol"), t.get("asset_type"))
+        if k in txs_by_key:
+            txs_by_key[k].append(t)
+
+    now = datetime.utcnow()
+    ops = []
+    for (sym, at), txs in txs_by_key.items():
+        qty, cost = compute_from_transactions(txs)
+        last_price = max(txs, key=lambda x: (x.get("date") or "", x.get("created_at") or datetime.min)).get("price") if txs else None
+        ops.append(UpdateOne(
+            {"symbol": sym, "asset_type": at},
+            {
+                "$set": {"quantity": qty, "cost_price": cost, "updated_at": now},
+                "$setOnInsert": {"name": sym, "current_price": last_price, "created_at": now},
+            },
+            upsert=True,
+        ))
+    await db[ASSETS_COLLECTION].bulk_write(ops, ordered=False)
+    return len(ops)
+
+
+async def import_transactions(
+    db: AsyncIOMotorDatabase,
+    chunks: AsyncIterator[bytes],
+    *,
+    fmt: str = "csv",
+    default_asset_type: str = "fund",
+    encoding: str = "utf-8-sig",
+) -> Dict[str, Any]:
+    """
+    流式导入交易记录。
+    卖出按文件顺序校验不超过持仓（导入前持仓 + 前面已通过的行），超出的行记为错误不写入。
+    每 BATCH_SIZE 条有效行写入一次；全部写完后按受影响持仓重算台账并使资产汇总缓存失效。
+    返回 rows、inserted、failed、positions_updated、elapsed_sec、rows_per_sec、errors。
+    """
+    start = time.monotonic()
+    report = _ImportReport()
+    batch: List[Tuple[int, Dict[str, Any]]] = []
+    now = datetime.utcnow()
+    ledger = await _PositionLedger.load(db)
+
+    async for line_no, row, parse_err in _iter_rows(_iter_lines(chunks, encoding), fmt):
+        report.rows += 1
+        if parse_err is not None:
+            report.add_error(line_no, parse_err)
+            continue
+        try:
+            doc = validate_row(row, default_asset_type, now)
+            ledger.apply(doc)
+        except ValueError as e:
+            report.add_error(line_no, str(e))
+            continue
+        batch.append((line_no, doc))
+        if len(batch) >= BATCH_SIZE:
+            await _flush(db, batch, report, ledger)
+            batch = []
+    await _flush(db, batch, report, ledger)
+
+    positions = await _recompute_positions(db, report.affected)
+    if positions:
+        invalidate_portfolio_summary()
+
+    elapsed = time.monotonic() - start
+    rows_per_sec = round(report.rows / elapsed, 1) if elapsed > 0 else float(report.rows)
+    logger.info(
+        "transaction_import 完成: rows=%d inserted=%d failed=%d positions=%d %.2fs (%.1f rows/s)",
+        report.rows, report.inserted, report.failed, positions, elapsed, rows_per_sec,
+    )
+    return {
+        "rows": report.rows,
+        "inserted": report.inserted,
+        "failed": report.failed,
+        "positions_updated": positions,
+        "elapsed_sec": round(elapsed, 3),
+        "rows_per_sec": rows_per_sec,
+        "errors": report.errors,
+        "errors_truncated": report.failed > len(report.errors),
+    }
@@ -1,6 +1,6 @@
 # =====================================================
 # 华尔街见闻 API 客户端
-# 支持异步 / 同步调用，10 秒超时，3 次指数退避重试
+# 支持异步 / 同步调用，10 秒超时，3 次指数退避重试；连接复用进程内共享客户端（见 utils.http_pool）
 # =====================================================
 
 from functools import wraps
@@ -9,6 +9,7 @@ from typing import Any
 import httpx
 from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential
 
+from app.utils.http_pool import get_http_client, get_sync_http_client
 from app.utils.logger import logger
 
 # 快讯 lives 需用 api-one.wallstcn.com；api-prod 返回空 data
@@ -38,23 +39,12 @@ class WallStreetCNClient:
         self._base_url = base_url.rstrip("/")
         self._timeout = timeout
         self._headers = {**DEFAULT_HEADERS, **(headers or {})}
-        self._async_client = None
-        self._sync_client = None
-
-    def _get_async_client(self):
-        if self._async_client is None or (hasattr(self._async_client, 'is_closed') and self._async_client.is_closed):
-            self._async_client = httpx.AsyncClient(base_url=self._base_url, headers=self._headers, timeout=self._timeout)
-        return self._async_client
-
-    def _get_sync_client(self):
-        if self._sync_client is None or (hasattr(self._sync_client, 'is_closed') and self._sync_client.is_closed):
-            self._sync_client = httpx.Client(base_url=self._base_url, headers=self._headers, timeout=self._timeout)
-        return self._sync_client
 
     async def _get_json_async(self, path: str, params: dict | None = None):
-        client = self._get_async_client()
         try:
-            resp = await client.get(path, params=params or {})
+            resp = await get_http_client().get(
+                self._base_url + path, params=params or {}, headers=self._headers, timeout=self._timeout,
+            )
             resp.raise_for_status()
             return resp.json()
         except httpx.HTTPStatusError as e:
@@ -65,9 +55,10 @@ class WallStreetCNClient:
             raise
 
     def _get_json_sync(self, path: str, params: dict | None = None):
-        client = self._get_sync_client()
         try:
-            resp = client.get(path, params=params or {})
+            resp = get_sync_http_client().get(
+                self._base_url + path, params=params or {}, headers=self._headers, timeout=self._timeout,
+            )
             resp.raise_for_status()
             return resp.json()
         except httpx.HTTPStatusError as e:
@@ -126,11 +117,7 @@ class WallStreetCNClient:
         return self._get_json_sync("/apiv1/search", params={"keyword": keyword, "limit": limit})
 
     def close(self):
-        if self._async_client and hasattr(self._async_client, 'is_closed') and not self._async_client.is_closed:
-            self._async_client.close()
-        if self._sync_client and hasattr(self._sync_client, 'is_closed') and not self._sync_client.is_closed:
-            self._sync_client.close()
+        """连接池为进程内共享，由应用 shutdown 时 close_http_clients 统一关闭；保留接口兼容"""
 
     async def aclose(self):
-        if self._async_client and hasattr(self._async_client, 'is_closed') and not self._async_client.is_closed:
-            await self._async_client.aclose()
+        """同 close"""
@@ -1,6 +1,6 @@
 # =====================================================
 # 华尔街见闻业务服务
-# 调用 Client、解析关键字段、可选保存至 decision_logs
+# 调用 Client、解析关键字段、保存经 news_pipeline.ingest_parsed 写入 news_raw
 #
 # 【Grok Agent 调用指南】
 # 未来 Grok 4.2 决策时可调用 POST /api/wallstreetcn/test 获取股市情报：
@@ -16,32 +16,13 @@
 from datetime import datetime
 from typing import Any, Dict, List, Optional
 
-from motor.motor_asyncio import AsyncIOMotorDatabase
-
 from app.config import settings
+from app.services.sentiment import annotate_sentiment
 from app.services.wallstreetcn_client import WallStreetCNClient
-from app.utils.logger import logger
 
-# 情绪分析关键词（复用 news_fetch 逻辑）
-POSITIVE_KEYWORDS = ["利好", "上涨", "买入", "大涨", "看涨", "反弹", "增长", "突破", "增持", "推荐"]
-NEGATIVE_KEYWORDS = ["利空", "下跌", "卖出", "大跌", "看跌", "回落", "跌破", "亏损", "减持", "预警"]
-DECISION_LOGS_COLLECTION = "decision_logs"
 SOURCE_WALLSTREETCN = "wallstreetcn"
 
 
-def _compute_sentiment(text: str) -> float:
-    """基于正负向关键词计算情绪得分，范围 -1 ~ 1"""
-    if not text or not isinstance(text, str):
-        return 0.0
-    t = text.strip()
-    pos = sum(1 for k in POSITIVE_KEYWORDS if k in t)
-    neg = sum(1 for k in NEGATIVE_KEYWORDS if k in t)
-    total = pos + neg
-    if total == 0:
-        return 0.0
-    return round((pos - neg) / max(total, 1), 2)
-
-
 def _parse_timestamp(ts: Any) -> Optional[datetime]:
     """解析时间戳：支持 Unix 秒、毫秒或 ISO 字符串"""
     if ts is None:
@@ -80,7 +61,7 @@ def _extract_items(raw: Any) -> List[Dict[str, Any]]:
 
 
 def _parse_item(item: Dict[str, Any]) -> Dict[str, Any]:
-    """解析单条为统一格式：title, published_time, summary, url, sentiment"""
+    """解析单条为统一格式：title, published_time, summary, url（sentiment 由调用方批量打分）"""
     title = str(item.get("title") or item.get("headline") or "").strip()
     content = str(item.get("content_text") or item.get("content") or item.get("summary") or "").strip()
     summary = content[:500] if content else ""
@@ -89,14 +70,11 @@ def _parse_item(item: Dict[str, Any]) -> Dict[str, Any]:
     url = str(item.get("uri") or item.get("link") or item.get("url") or "").strip()
     ts = item.get("display_time") or item.get("created_at") or item.get("published_at") or item.get("timestamp")
     published_time = _parse_timestamp(ts)
-    text_for_sentiment = f"{title} {summary}"
-    sentiment = _compute_sentiment(text_for_sentiment)
     return {
         "title": display_title,
         "published_time": published_time.isoformat() if published_time else None,
         "summary": summary,
         "url": url or None,
-        "sentiment": sentiment,
     }
 
 
@@ -115,10 +93,12 @@ class WallStreetCNService:
         channel: str = "news",
         keyword: Optional[str] = None,
         code: Optional[str] = None,
+        score: bool = True,
     ) -> tuple[Any, List[Dict[str, Any]]]:
         """
         调用 Client 拉取数据，对新闻类结果解析关键字段。
-        返回 (raw, parsed_items)，parsed_items 仅对 lives/articles/keyword 有值。
+        返回 (raw, parsed_items)，parsed_items 仅对 lives/articles/keyword 有值；
+        score=False 时不打情绪分（由采集管道统一打分）。
         """
         raw = None
         if type_ == "lives":
@@ -139,40 +119,38 @@ class WallStreetCNService:
         if type_ in ("lives", "articles", "keyword"):
             items = _extract_items(raw)
             parsed = [_parse_item(i) for i in items]
+            if score:
+                annotate_sentiment(parsed)
             return raw, parsed
         return raw, []
 
-    async def save_to_decision_logs(
+    async def fetch_lives_since(
         self,
-        db: AsyncIOMotorDatabase,
-        items: List[Dict[str, Any]],
-        type_: str,
-    ) -> int:
+        since_id: int,
+        *,
+        channel: str = "global-channel",
+        limit: int = 50,
+        max_pages: int = 5,
+    ) -> List[Dict[str, Any]]:
         """
-        将解析后的条目保存至 decision_logs，source=wallstreetcn。
-        返回成功写入条数。
+        增量拉取快讯：从最新一页起按 next_cursor 向更早翻页，遇到 id <= since_id 的条目即停止（最多 max_pages 页）。
+        since_id 为 0 时只取最新一页（首次轮询建立游标）。返回按 id 升序的原始条目
         """
-        if not items:
-            return 0
-        try:
-            coll = db[DECISION_LOGS_COLLECTION]
-            now = datetime.utcnow()
-            count = 0
+        out: List[Dict[str, Any]] = []
+        cursor: Any = 0
+        for _ in range(max(1, max_pages)):
+            raw = await self._client.get_live_news(limit=limit, cursor=cursor, channel=channel)
+            items = _extract_items(raw)
+            reached = False
             for it in items:
-                doc = {
-                    "source": SOURCE_WALLSTREETCN,
-                    "type": type_,
-                    "title": it.get("title"),
-                    "published_time": it.get("published_time"),
-                    "summary": it.get("summary"),
-                    "url": it.get("url"),
-                    "sentiment": it.get("sentiment", 0),
-                    "created_at": now,
-                }
-                await coll.insert_one(doc)
-                count += 1
-            logger.info("wallstreetcn_service 已保存 %d 条至 decision_logs", count)
-            return count
-        except Exception as e:
-            logger.exception("wallstreetcn_service save_to_decision_logs 异常: %s", e)
-            raise
+                if int(it.get("id") or 0) <= since_id:
+                    reached = True
+                    continue
+                out.append(it)
+            data = raw.get("data") if isinstance(raw, dict) else None
+            next_cursor = data.get("next_cursor") if isinstance(data, dict) else None
+            if not items or reached or not since_id or not next_cursor:
+                break
+            cursor = next_cursor
+        out.sort(key=lambda it: int(it.get("id") or 0))
+        return out
@@ -0,0 +1,257 @@
+# =====================================================
+# 进程内共享 httpx 客户端
+# 所有上游 HTTP 调用（RSS、华尔街见闻、东方财富、财联社）复用同一组连接池：
+# 按 直连 / 代理（LLMSettings.HTTPS_PROXY、HTTP_PROXY）各一个客户端，连接按 host 复用 keep-alive，
+# 安装 h2 时启用 HTTP/2。请求头、超时、重定向由调用方按次传入。
+# 客户端在首次使用时创建，应用 shutdown 时由 close_http_clients 统一关闭；
+# 各 host 的请求数、错误数、在途请求与首包耗时由计量 transport 统计，见 http_pool_stats
+# =====================================================
+
+import importlib.util
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+
+from app.config import llm_settings, settings
+from app.utils.logger import logger
+
+DIRECT = "direct"
+PROXY = "proxy"
+
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+class _HostStats:
+    """单个 host 的请求计数（计量 transport 共用，线程安全）"""
+
+    __slots__ = ("requests", "errors", "in_flight", "peak_in_flight", "total_ms", "max_ms")
+
+    def __init__(self) -> None:
+        self.requests = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def snapshot(self) -> Dict[str, Any]:
+        done = self.requests - self.in_flight
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "avg_ms": round(self.total_ms / done, 1) if done > 0 else None,
+            "max_ms": round(self.max_ms, 1),
+        }
+
+
+class _Meter:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.hosts: Dict[str, _HostStats] = {}
+
+    def begin(self, host: str) -> _HostStats:
+        with self._lock:
+            s = self.hosts.get(host)
+            if s is None:
+                s = self.hosts[host] = _HostStats()
+            s.requests += 1
+            s.in_flight += 1
+            s.peak_in_flight = max(s.peak_in_flight, s.in_flight)
+            return s
+
+    def end(self, s: _HostStats, started: float, ok: bool) -> None:
+        ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            s.in_flight -= 1
+            s.total_ms += ms
+            s.max_ms = max(s.max_ms, ms)
+            if not ok:
+                s.errors += 1
+
+
+class _MeteredAsyncTransport(httpx.AsyncBaseTransport):
+    """包装连接池 transport：按 host 计数，耗时为收到响应头为止"""
+
+    def __init__(self, inner: httpx.AsyncHTTPTransport, meter: _Meter) -> None:
+        self.inner = inner
+        self._meter = meter
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        s = self._meter.begin(request.url.host)
+        started, ok = time.perf_counter(), False
+        try:
+            resp = await self.inner.handle_async_request(request)
+            ok = resp.status_code < 500
+            return resp
+        finally:
+            self._meter.end(s, started, ok)
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
+
+
+class _MeteredSyncTransport(httpx.BaseTransport):
+    def __init__(self, inner: httpx.HTTPTransport, meter: _Meter) -> None:
+        self.inner = inner
+        self._meter = meter
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        s = self._meter.begin(request.url.host)
+        started, ok = time.perf_counter(), False
+        try:
+            resp = self.inner.handle_request(request)
+            ok = resp.status_code < 500
+            return resp
+        finally:
+            self._meter.end(s, started, ok)
+
+    def close(self) -> None:
+        self.inner.close()
+
+
+def proxy_url() -> Optional[str]:
+    """代理地址：与原各服务一致，HTTPS_PROXY 优先"""
+    return (llm_settings.HTTPS_PROXY or llm_settings.HTTP_PROXY) or None
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=max(1, settings.HTTP_POOL_MAX_CONNECTIONS),
+        max_keepalive_connections=max(1, settings.HTTP_POOL_MAX_KEEPALIVE),
+        keepalive_expiry=settings.HTTP_POOL_KEEPALIVE_EXPIRY,
+    )
+
+
+def _connections(transport: Any) -> Tuple[int, int, Dict[str, int]]:
+    """连接池快照：(连接数, 空闲数, 各 host 连接数)；依赖 httpcore 内部结构，取不到时返回空"""
+    pool = getattr(getattr(transport, "inner", None), "_pool", None)
+    conns = list(getattr(pool, "connections", None) or [])
+    idle, per_host = 0, {}
+    for c in conns:
+        try:
+            if c.is_idle():
+                idle += 1
+            origin = getattr(c, "_origin", None)
+            host = origin.host.decode() if origin is not None else "?"
+            per_host[host] = per_host.get(host, 0) + 1
+        except Exception:
+            continue
+    return len(conns), idle, per_host
+
+
+class HttpClientRegistry:
+    """按 (直连/代理, 异步/同步) 缓存客户端；代理未配置时代理变体即直连客户端"""
+
+    def __init__(self) -> None:
+        self._async: Dict[str, httpx.AsyncClient] = {}
+        self._sync: Dict[str, httpx.Client] = {}
+        self._meter = _Meter()
+        self._lock = threading.Lock()
+        self._http2 = settings.HTTP_CLIENT_HTTP2 and HTTP2_AVAILABLE
+        if settings.HTTP_CLIENT_HTTP2 and not HTTP2_AVAILABLE:
+            logger.info("http_pool 未安装 h2，使用 HTTP/1.1")
+
+    def _variant(self, proxy: bool) -> Tuple[str, Optional[str]]:
+        url = proxy_url() if proxy else None
+        return (PROXY, url) if url else (DIRECT, None)
+
+    def get(self, proxy: bool = False) -> httpx.AsyncClient:
+        """共享异步客户端；proxy=True 时走配置的代理（RSSHub 等境外源）"""
+        key, url = self._variant(proxy)
+        client = self._async.get(key)
+        if client is None or client.is_closed:
+            transport = httpx.AsyncHTTPTransport(http2=self._http2, limits=_limits(), proxy=url)
+            client = httpx.AsyncClient(
+                transport=_MeteredAsyncTransport(transport, self._meter),
+                timeout=settings.HTTP_CLIENT_TIMEOUT,
+                # 未显式配置代理时仍沿用系统/环境变量代理
+                trust_env=url is None,
+            )
+            self._async[key] = client
+        return client
+
+    def get_sync(self, proxy: bool = False) -> httpx.Client:
+        """共享同步客户端（同步调用路径使用，线程安全）"""
+        key, url = self._variant(proxy)
+        with self._lock:
+            client = self._sync.get(key)
+            if client is None or client.is_closed:
+                transport = httpx.HTTPTransport(http2=self._http2, limits=_limits(), proxy=url)
+                client = httpx.Client(
+                    transport=_MeteredSyncTransport(transport, self._meter),
+                    timeout=settings.HTTP_CLIENT_TIMEOUT,
+                    trust_env=url is None,
+                )
+                self._sync[key] = client
+            return client
+
+    async def aclose(self) -> None:
+        for client in self._async.values():
+            if not client.is_closed:
+                await client.aclose()
+        self._async.clear()
+        with self._lock:
+            for client in self._sync.values():
+                if not client.is_closed:
+                    client.close()
+            self._sync.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        clients = []
+        for kind, pool in (("async", self._async), ("sync", self._sync)):
+            for key, client in pool.items():
+                total, idle, per_host = _connections(client._transport)
+                clients.append({
+                    "client": f"{kind}:{key}",
+                    "closed": client.is_closed,
+                    "connections": total,
+                    "idle": idle,
+                    "per_host": per_host,
+                })
+        with self._meter._lock:
+            hosts = {h: s.snapshot() for h, s in sorted(self._meter.hosts.items())}
+        limits = _limits()
+        return {
+            "http2": self._http2,
+            "proxy": bool(proxy_url()),
+            "limits": {
+                "max_connections": limits.max_connections,
+                "max_keepalive_connections": limits.max_keepalive_connections,
+                "keepalive_expiry": limits.keepalive_expiry,
+            },
+            "clients": clients,
+            "hosts": hosts,
+        }
+
+
+_registry: Optional[HttpClientRegistry] = None
+
+
+def get_http_registry() -> HttpClientRegistry:
+    global _registry
+    if _registry is None:
+        _registry = HttpClientRegistry()
+    return _registry
+
+
+def get_http_client(proxy: bool = False) -> httpx.AsyncClient:
+    """进程内共享的异步 httpx 客户端"""
+    return get_http_registry().get(proxy)
+
+
+def get_sync_http_client(proxy: bool = False) -> httpx.Client:
+    return get_http_registry().get_sync(proxy)
+
+
+async def close_http_clients() -> None:
+    """关闭全部共享客户端（应用 shutdown 时调用）"""
+    if _registry is not None:
+        await _registry.aclose()
+
+
+def http_pool_stats() -> Dict[str, Any]:
+    return get_http_registry().stats()
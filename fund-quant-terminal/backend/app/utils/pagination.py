@@ -0,0 +1,116 @@
+# =====================================================
+# 游标（keyset）分页工具
+# 按 (排序字段, _id) 定位下一页，不使用 skip；游标为不透明的 base64 字符串。
+# 列表总数走带 TTL 的计数缓存，无过滤条件时使用 estimated_document_count
+# =====================================================
+
+import base64
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import json_util
+
+from app.config import settings
+
+SortSpec = Tuple[str, int]
+
+
+def encode_cursor(doc: Dict[str, Any], sort: SortSpec) -> str:
+    """由当前页最后一条文档生成游标（记录排序字段、方向、字段值与 _id）"""
+    field, direction = sort
+    raw = json_util.dumps({"f": field, "d": direction, "v": doc.get(field), "id": doc["_id"]})
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: SortSpec) -> Tuple[Any, Any]:
+    """解析游标为 (字段值, _id)；游标损坏或与当前排序不一致时抛 ValueError"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json_util.loads(base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8"))
+    except Exception:
+        raise ValueError("无效的分页游标")
+    if (data.get("f"), data.get("d")) != tuple(sort) or "id" not in data:
+        raise ValueError("分页游标与当前排序不一致，请从第一页重新查询")
+    return data.get("v"), data["id"]
+
+
+def keyset_filter(sort: SortSpec, value: Any, last_id: Any) -> Dict[str, Any]:
+    """
+    游标之后的查询条件。排序为 (field, direction), (_id, direction)；
+    MongoDB 中 null/缺失值排在最小端，降序时位于末尾、升序时位于开头，需单独处理。
+    """
+    field, direction = sort
+    op = "$lt" if direction < 0 else "$gt"
+    same = {field: value, "_id": {op: last_id}}
+    if value is None:
+        # 降序：null 段已是末尾，只剩同为 null 的后续文档；升序：null 段之后是全部非 null 文档
+        return same if direction < 0 else {"$or": [same, {field: {"$ne": None}}]}
+    branches: List[Dict[str, Any]] = [{field: {op: value}}, same]
+    if direction < 0:
+        branches.append({field: None})
+    return {"$or": branches}
+
+
+async def keyset_page(
+    coll,
+    query: Dict[str, Any],
+    sort: SortSpec,
+    limit: int,
+    cursor: Optional[str] = None,
+    projection: Optional[Dict[str, Any]] = None,
+    skip: int = 0,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    游标分页查询，返回 (当前页文档, next_cursor)；多取一条判断是否还有下一页，没有则 next_cursor 为 None。
+    skip 仅用于兼容旧的页码参数且在无游标时生效。返回的文档保留 _id，由调用方序列化。
+    """
+    field, direction = sort
+    if cursor:
+        value, last_id = decode_cursor(cursor, sort)
+        after = keyset_filter(sort, value, last_id)
+        query = {"$and": [query, after]} if query else after
+    find = coll.find(query, projection).sort([(field, direction), ("_id", direction)])
+    if skip and not cursor:
+        find = find.skip(skip)
+    docs = await find.limit(limit + 1).to_list(length=limit + 1)
+    if len(docs) <= limit:
+        return docs, None
+    docs = docs[:limit]
+    return docs, encode_cursor(docs[-1], sort)
+
+
+class CountCache:
+    """列表总数缓存：键为 (集合名, 查询条件)，TTL 内复用上次计数"""
+
+    def __init__(self, ttl: Optional[float] = None, max_size: int = 256) -> None:
+        self._ttl = ttl
+        self._max_size = max_size
+        self._entries: Dict[Tuple[str, str], Tuple[float, int]] = {}
+
+    @property
+    def ttl(self) -> float:
+        return float(self._ttl if self._ttl is not None else settings.LIST_COUNT_CACHE_TTL)
+
+    async def count(self, coll, query: Dict[str, Any]) -> int:
+        key = (coll.name, json_util.dumps(query, sort_keys=True))
+        now = time.monotonic()
+        hit = self._entries.get(key)
+        if hit is not None and now - hit[0] < self.ttl:
+            return hit[1]
+        total = await coll.estimated_document_count() if not query else await coll.count_documents(query)
+        if len(self._entries) >= self._max_size:
+            self._entries = {k: v for k, v in self._entries.items() if now - v[0] < self.ttl}
+            if len(self._entries) >= self._max_size:
+                self._entries.pop(next(iter(self._entries)))
+        self._entries[key] = (now, total)
+        return total
+
+    def invalidate(self, collection: Optional[str] = None) -> None:
+        """写入后主动失效（collection 为空时清空全部）"""
+        if collection is None:
+            self._entries.clear()
+        else:
+            self._entries = {k: v for k, v in self._entries.items() if k[0] != collection}
+
+
+count_cache = CountCache()
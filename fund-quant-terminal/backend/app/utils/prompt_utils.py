@@ -21,8 +21,6 @@ COLLECTION_TEMPLATES = "agent_role_templates"
 CONFIG_AGENT_ROLE = "agent_role_config"
 COLLECTION_GROK_PROMPTS = "grok_prompts"
 COLLECTION_DECISION_LOGS = "decision_logs"
-COLLECTION_ASSETS = "assets"
-ACCOUNT_DOC_ID = "main"
 
 
 def _truncate(content: str, max_len: int = MAX_CONTENT_CHARS) -> str:
@@ -85,32 +83,29 @@ async def load_system_prompt(db: AsyncIOMotorDatabase, provider: str) -> str:
 
 
 async def _get_asset_summary(db: AsyncIOMotorDatabase) -> str:
-    """获取资产摘要：现金 + 持仓"""
+    """获取资产摘要：现金 + 持仓（来自共享 PortfolioAggregateService 缓存）"""
+    from app.services.portfolio_aggregate import get_portfolio_aggregate_service
+
     parts = []
     try:
-        doc = await db["account"].find_one({"_id": ACCOUNT_DOC_ID})
-        cap = float(doc["capital"]) if doc and "capital" in doc else 0
-        parts.append(f"现金: {cap:.2f} 元")
+        summary = await get_portfolio_aggregate_service().get_summary(db)
     except Exception as e:
-        logger.debug("prompt_utils: get_capital failed: %s", e)
+        logger.debug("prompt_utils: get asset summary failed: %s", e)
+        summary = None
 
-    try:
-        cursor = db[COLLECTION_ASSETS].find({}).sort("created_at", -1).limit(50)
-        docs = await cursor.to_list(length=50)
-        if docs:
-            lines = []
-            for d in docs:
-                sym = d.get("symbol") or ""
-                name = d.get("name") or ""
-                qty = float(d.get("quantity") or 0)
-                cost = d.get("cost_price")
-                cur = d.get("current_price")
-                if sym and name:
-                    lines.append(f"  - {name}({sym}): {qty} 份" + (f", 成本 {cost}" if cost else "") + (f", 现价 {cur}" if cur else ""))
-            if lines:
-                parts.append("持仓:\n" + "\n".join(lines[:20]))
-    except Exception as e:
-        logger.debug("prompt_utils: get assets failed: %s", e)
+    if summary:
+        parts.append(f"现金: {float(summary.get('capital') or 0):.2f} 元")
+        lines = []
+        for d in summary.get("holdings", [])[:50]:
+            sym = d.get("symbol") or ""
+            name = d.get("name") or ""
+            qty = float(d.get("quantity") or 0)
+            cost = d.get("cost_price")
+            cur = d.get("current_price")
+            if sym and name:
+                lines.append(f"  - {name}({sym}): {qty} 份" + (f", 成本 {cost}" if cost else "") + (f", 现价 {cur}" if cur else ""))
+        if lines:
+            parts.append("持仓:\n" + "\n".join(lines[:20]))
 
     s = "\n".join(parts) if parts else "（暂无资产数据）"
     return _truncate(s, MAX_ASSET_SUMMARY_CHARS)
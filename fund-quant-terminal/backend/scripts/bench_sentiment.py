@@ -0,0 +1,89 @@
+# =====================================================
+# 情绪打分基准测试
+# 对比原各服务逐关键词 `in` 扫描与共享 Aho-Corasick 打分器（逐条 / 批量）
+# 用法（backend 目录下）：python scripts/bench_sentiment.py [条数] [重复次数]
+# =====================================================
+
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services.sentiment import NEGATIVE_WORDS, POSITIVE_WORDS, SentimentScorer  # noqa: E402
+
+FILLER = "基金 市场 今日 板块 资金 指数 机构 行业 政策 经济 数据 公司 投资者 消息 表示 预计 "
+
+
+def legacy_score(text: str, positive=POSITIVE_WORDS, negative=NEGATIVE_WORDS) -> float:
+    """原实现：每个关键词各扫描一次文本"""
+    if not text or not isinstance(text, str):
+        return 0.0
+    t = text.lower().strip()
+    pos = sum(1 for k in positive if k in t)
+    neg = sum(1 for k in negative if k in t)
+    total = pos + neg
+    if total == 0:
+        return 0.0
+    return round((pos - neg) / max(total, 1), 2)
+
+
+def make_texts(n: int, seed: int = 7) -> list:
+    """模拟标题 + 500 字以内摘要"""
+    rng = random.Random(seed)
+    words = list(POSITIVE_WORDS + NEGATIVE_WORDS)
+    texts = []
+    for _ in range(n):
+        parts = [FILLER * rng.randint(1, 8)]
+        for _ in range(rng.randint(0, 4)):
+            parts.append(rng.choice(words))
+            parts.append(FILLER[: rng.randint(5, 40)])
+        texts.append("".join(parts)[:520])
+    return texts
+
+
+def bench(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def synthetic_words(n: int, seed: int = 11) -> tuple:
+    """扩展词典用的随机双字词（不与填充文本重叠）"""
+    rng = random.Random(seed)
+    used = set(FILLER + "".join(POSITIVE_WORDS + NEGATIVE_WORDS))
+    pool = [chr(c) for c in range(0x6000, 0x7000) if chr(c) not in used]
+    return tuple(rng.choice(pool) + rng.choice(pool) for _ in range(n))
+
+
+def run(texts: list, positive: tuple, negative: tuple, repeat: int) -> None:
+    n = len(texts)
+    scorer = SentimentScorer(positive=positive, negative=negative, negations=())
+    # 无否定词时两种实现计数规则相同，结果应一致
+    mismatch = sum(1 for t, s in zip(texts, scorer.score_batch(texts)) if legacy_score(t, positive, negative) != s)
+
+    t_legacy = bench(lambda: [legacy_score(t, positive, negative) for t in texts], repeat)
+    t_single = bench(lambda: [scorer.score(t) for t in texts], repeat)
+    t_batch = bench(lambda: scorer.score_batch(texts), repeat)
+
+    print(f"texts={n} avg_len={sum(map(len, texts)) / n:.0f} keywords={len(positive) + len(negative)} mismatch={mismatch}")
+    for name, t in (("legacy in-scan", t_legacy), ("automaton per text", t_single), ("automaton batch", t_batch)):
+        print(f"  {name:<20} {t * 1000:9.2f} ms  {t / n * 1e6:7.2f} us/text  x{t_legacy / t:5.2f}")
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    texts = make_texts(n)
+    # 内置词典；以及扩展到数百词时（逐词扫描随词数线性增长，自动机与词数基本无关）
+    run(texts, POSITIVE_WORDS, NEGATIVE_WORDS, repeat)
+    extra = synthetic_words(400)
+    run(texts, POSITIVE_WORDS + extra[:200], NEGATIVE_WORDS + extra[200:], repeat)
+
+
+if __name__ == "__main__":
+    main()
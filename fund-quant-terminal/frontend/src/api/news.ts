@@ -13,6 +13,12 @@ export interface NewsItem {
   fund_code?: string;
   created_at?: string;
   sentiment_score?: number;
+  /** 近似重复新闻指向的规范条目 link */
+  dup_of?: string | null;
+  /** 规范条目被其他来源重复转发的条数 */
+  dup_count?: number;
+  /** 提及的标的，如 fund:161725、stock:600519 */
+  symbols?: string[];
 }
 
 export interface SentimentSummary {
@@ -27,6 +33,8 @@ export interface NewsListResponse {
   total: number;
   page: number;
   limit: number;
+  /** 下一页游标，无更多数据时为 null */
+  next_cursor?: string | null;
   sentiment_summary?: SentimentSummary;
 }
 
@@ -51,9 +59,14 @@ export const getNewsList = (
     days?: number;
     keyword?: string;
     page?: number;
+    cursor?: string;
     limit?: number;
     sort?: string;
     refresh?: boolean;
+    /** 折叠近似重复新闻 */
+    collapse?: boolean;
+    holdings?: boolean;
+    symbols?: string[];
   },
   config?: { skipLoading?: boolean }
 ) =>
@@ -63,9 +76,13 @@ export const getNewsList = (
       days: params?.days ?? 7,
       keyword: params?.keyword || undefined,
       page: params?.page ?? 1,
+      cursor: params?.cursor || undefined,
       limit: params?.limit ?? 20,
       sort: params?.sort || undefined,
       refresh: params?.refresh ?? false,
+      collapse: params?.collapse || undefined,
+      holdings: params?.holdings || undefined,
+      symbols: params?.symbols?.length ? params.symbols.join(",") : undefined,
     },
     timeout: 30000,
     skipLoading: config?.skipLoading,
@@ -95,3 +112,30 @@ export const postNewsGrokDecision = (params: { fund_code?: string; include_news?
     "/news/grok-decision",
     { fund_code: params.fund_code ?? "", include_news: params.include_news ?? true }
   );
+
+export interface NewsStreamItem {
+  title: string;
+  link: string;
+  pub_date: string | null;
+  source: string;
+  content_summary?: string | null;
+  fund_code?: string | null;
+  symbols?: string[];
+  sentiment?: number | null;
+  dup_of?: string | null;
+}
+
+/** 新闻实时推送：SSE GET /api/news/stream，返回 EventSource，调用方负责 close() */
+export const subscribeNewsStream = (
+  onItem: (item: NewsStreamItem) => void,
+  params?: { source?: string; fund_code?: string; min_sentiment?: number }
+) => {
+  const query = new URLSearchParams();
+  if (params?.source) query.set("source", params.source);
+  if (params?.fund_code) query.set("fund_code", params.fund_code);
+  if (params?.min_sentiment) query.set("min_sentiment", String(params.min_sentiment));
+  const qs = query.toString();
+  const es = new EventSource(`${request.defaults.baseURL}/news/stream${qs ? `?${qs}` : ""}`);
+  es.addEventListener("news", (ev) => onItem(JSON.parse((ev as MessageEvent).data) as NewsStreamItem));
+  return es;
+};